@@ -1,13 +1,11 @@
 import pandas as pd
 import numpy as np
-import re
 import nltk
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
 from sklearn.model_selection import train_test_split
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.naive_bayes import MultinomialNB
 from sklearn.metrics import classification_report, accuracy_score
+from text_preprocessing import clean_series, clean_text, preprocess_series, preprocess_text
 
 # Download required NLTK data
 print("Downloading required NLTK data...")
@@ -15,36 +13,6 @@ nltk.download('punkt')
 nltk.download('stopwords')
 nltk.download('wordnet')
 
-def clean_text(text):
-    # Convert to lowercase
-    text = text.lower()
-    
-    # Remove URLs
-    text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
-    
-    # Remove special characters and numbers
-    text = re.sub(r'[^\w\s]', '', text)
-    text = re.sub(r'\d+', '', text)
-    
-    # Remove extra whitespace
-    text = ' '.join(text.split())
-    
-    return text
-
-def preprocess_text(text):
-    # Tokenization
-    tokens = nltk.word_tokenize(text)
-    
-    # Remove stopwords
-    stop_words = set(stopwords.words('english'))
-    tokens = [token for token in tokens if token not in stop_words]
-    
-    # Lemmatization
-    lemmatizer = WordNetLemmatizer()
-    tokens = [lemmatizer.lemmatize(token) for token in tokens]
-    
-    return ' '.join(tokens)
-
 # Create sample data
 print("\nCreating sample dataset...")
 sample_data = {
@@ -71,8 +39,8 @@ df = pd.DataFrame(sample_data)
 
 # Apply text cleaning and preprocessing
 print("Preprocessing text data...")
-df['cleaned_text'] = df['text'].apply(clean_text)
-df['processed_text'] = df['cleaned_text'].apply(preprocess_text)
+df['cleaned_text'] = clean_series(df['text'])
+df['processed_text'] = preprocess_series(df['text'])
 
 # Split the data
 X_train, X_test, y_train, y_test = train_test_split(
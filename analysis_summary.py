@@ -0,0 +1,254 @@
+import numpy as np
+import pandas as pd
+
+# Confidence histograms keep this many decimal places (0.001 buckets)
+CONFIDENCE_DECIMALS = 3
+
+# Characters of a duplicate post kept to show what its cluster is about
+CLUSTER_SAMPLE_CHARS = 120
+
+class AnalysisSummary:
+    """Report statistics for scored posts, built in one pass and mergeable across chunks"""
+
+    def __init__(self, sample_size=5):
+        self.sample_size = sample_size
+        self.total_posts = 0
+        self.sentiment_counts = {}
+        self.source_counts = {}
+        self.length_sum = 0
+        self.length_min = None
+        self.length_max = None
+        self.confidence_sum = 0.0
+        self.confidence_min = None
+        self.confidence_max = None
+        # Exact post-length histogram and per-sentiment confidence histograms for the charts
+        self.length_counts = {}
+        self.confidence_counts = {}
+        # The first sample_size posts, in order
+        self.samples = []
+        # Posts whose score was fanned out from their cluster's representative, by kind ('exact' or
+        # 'near'), and per cluster the number of such posts plus the text of the first one
+        self.duplicate_counts = {}
+        self.clusters = {}
+        # Posts per most likely stress category and the sum of every category's score,
+        # for posts scored by the stress classifier
+        self.stress_counts = {}
+        self.stress_score_sums = {}
+
+    @classmethod
+    def from_frame(cls, df, sample_size=5):
+        """Summarize a DataFrame with text, source, sentiment and confidence columns"""
+        summary = cls(sample_size)
+        if df is None or df.empty:
+            return summary
+
+        frame = pd.DataFrame({
+            'sentiment': df['sentiment'].astype(str).to_numpy(),
+            'source': df['source'].astype(str).to_numpy(),
+            'length': df['text'].fillna("").astype(str).str.len().to_numpy(),
+            'confidence': df['confidence'].astype(float).to_numpy()
+        })
+        frame['bucket'] = frame['confidence'].round(CONFIDENCE_DECIMALS)
+
+        groups = frame.groupby(['sentiment', 'source'], sort=False).agg(
+            posts=('length', 'size'), length_sum=('length', 'sum'), length_min=('length', 'min'),
+            length_max=('length', 'max'), confidence_sum=('confidence', 'sum'),
+            confidence_min=('confidence', 'min'), confidence_max=('confidence', 'max'))
+
+        summary.total_posts = len(frame)
+        summary.sentiment_counts = _int_dict(groups['posts'].groupby(level='sentiment', sort=False).sum())
+        summary.source_counts = _int_dict(groups['posts'].groupby(level='source', sort=False).sum())
+        summary.length_sum = int(groups['length_sum'].sum())
+        summary.length_min = int(groups['length_min'].min())
+        summary.length_max = int(groups['length_max'].max())
+        summary.confidence_sum = float(groups['confidence_sum'].sum())
+        summary.confidence_min = float(groups['confidence_min'].min())
+        summary.confidence_max = float(groups['confidence_max'].max())
+        summary.length_counts = {int(length): int(count)
+                                 for length, count in frame['length'].value_counts(sort=False).items()}
+        for (sentiment, bucket), count in frame.groupby(['sentiment', 'bucket'], sort=False).size().items():
+            summary.confidence_counts.setdefault(sentiment, {})[float(bucket)] = int(count)
+
+        if 'duplicate' in df:
+            duplicates = df[df['duplicate'].fillna("").astype(str) != ""]
+            summary.duplicate_counts = _int_dict(duplicates['duplicate'].astype(str).value_counts())
+            for cluster, text in zip(duplicates['cluster'].astype(str), duplicates['text'].fillna("").astype(str)):
+                if cluster in summary.clusters:
+                    summary.clusters[cluster][0] += 1
+                else:
+                    summary.clusters[cluster] = [1, text[:CLUSTER_SAMPLE_CHARS]]
+
+        if 'stress' in df:
+            stressed = df[df['stress'].notna()]
+            summary.stress_counts = _int_dict(stressed['stress'].astype(str).value_counts())
+            summary.stress_score_sums = {column[len('stress['):-1]: float(stressed[column].sum())
+                                         for column in df.columns
+                                         if column.startswith('stress[') and column.endswith(']')}
+
+        head = df.head(sample_size)
+        summary.samples = [
+            {'text': "" if pd.isna(text) else str(text), 'source': str(source), 'sentiment': str(sentiment), 'confidence': float(confidence)}
+            for text, source, sentiment, confidence in zip(
+                head['text'], head['source'], head['sentiment'], head['confidence'])
+        ]
+        return summary
+
+    @classmethod
+    def from_chunks(cls, chunks, sample_size=5):
+        """Summarize an iterable of DataFrames without holding them all in memory"""
+        summary = cls(sample_size)
+        for chunk in chunks:
+            summary = summary.merge(cls.from_frame(chunk, sample_size))
+        return summary
+
+    def merge(self, other):
+        """Combine two summaries, as if computed over this summary's posts followed by other's"""
+        merged = AnalysisSummary(self.sample_size)
+        merged.total_posts = self.total_posts + other.total_posts
+        merged.sentiment_counts = _add_counts(self.sentiment_counts, other.sentiment_counts)
+        merged.source_counts = _add_counts(self.source_counts, other.source_counts)
+        merged.length_sum = self.length_sum + other.length_sum
+        merged.length_min = _extreme(min, self.length_min, other.length_min)
+        merged.length_max = _extreme(max, self.length_max, other.length_max)
+        merged.confidence_sum = self.confidence_sum + other.confidence_sum
+        merged.confidence_min = _extreme(min, self.confidence_min, other.confidence_min)
+        merged.confidence_max = _extreme(max, self.confidence_max, other.confidence_max)
+        merged.length_counts = _add_counts(self.length_counts, other.length_counts)
+        for sentiment in set(self.confidence_counts) | set(other.confidence_counts):
+            merged.confidence_counts[sentiment] = _add_counts(self.confidence_counts.get(sentiment, {}),
+                                                              other.confidence_counts.get(sentiment, {}))
+        merged.samples = (self.samples + other.samples)[:self.sample_size]
+        merged.duplicate_counts = _add_counts(self.duplicate_counts, other.duplicate_counts)
+        merged.clusters = {cluster: list(entry) for cluster, entry in self.clusters.items()}
+        for cluster, (count, sample) in other.clusters.items():
+            if cluster in merged.clusters:
+                merged.clusters[cluster][0] += count
+            else:
+                merged.clusters[cluster] = [count, sample]
+        merged.stress_counts = _add_counts(self.stress_counts, other.stress_counts)
+        merged.stress_score_sums = _add_counts(self.stress_score_sums, other.stress_score_sums)
+        return merged
+
+    @property
+    def avg_length(self):
+        return self.length_sum / self.total_posts if self.total_posts else 0.0
+
+    @property
+    def avg_confidence(self):
+        return self.confidence_sum / self.total_posts if self.total_posts else 0.0
+
+    def sentiment_distribution(self):
+        """(sentiment, count, percentage) rows, most common first"""
+        return self._distribution(self.sentiment_counts)
+
+    def source_distribution(self):
+        """(source, count, percentage) rows, most common first"""
+        return self._distribution(self.source_counts)
+
+    @property
+    def duplicate_posts(self):
+        return sum(self.duplicate_counts.values())
+
+    def largest_clusters(self, limit=10):
+        """(posts in cluster including its representative, sample text) rows, largest first"""
+        return sorted(((count + 1, sample) for count, sample in self.clusters.values()),
+                      key=lambda row: -row[0])[:limit]
+
+    @property
+    def stress_posts(self):
+        return sum(self.stress_counts.values())
+
+    def stress_distribution(self):
+        """(category, posts it is most likely for, percentage, mean score) rows, most common first"""
+        posts = self.stress_posts
+        categories = set(self.stress_counts) | set(self.stress_score_sums)
+        rows = [(category, self.stress_counts.get(category, 0),
+                 self.stress_counts.get(category, 0) / posts * 100 if posts else 0.0,
+                 self.stress_score_sums.get(category, 0.0) / posts if posts else 0.0)
+                for category in categories]
+        return sorted(rows, key=lambda row: (-row[1], -row[3], row[0]))
+
+    def _distribution(self, counts):
+        return [(value, count, count / self.total_posts * 100)
+                for value, count in sorted(counts.items(), key=lambda item: -item[1])]
+
+    def length_histogram(self):
+        """Distinct post lengths and how often each occurs, for weighted histograms"""
+        lengths = np.array(sorted(self.length_counts), dtype=np.int64)
+        return lengths, np.array([self.length_counts[length] for length in lengths], dtype=np.int64)
+
+    def confidence_box_stats(self):
+        """Box plot statistics per sentiment (matplotlib bxp format) from the confidence histograms"""
+        stats = []
+        for sentiment, _, _ in self.sentiment_distribution():
+            histogram = self.confidence_counts.get(sentiment)
+            if not histogram:
+                continue
+            values = np.array(sorted(histogram))
+            cumulative = np.cumsum([histogram[value] for value in values])
+
+            def quantile(q):
+                return float(values[np.searchsorted(cumulative, q * cumulative[-1])])
+
+            q1, median, q3 = quantile(0.25), quantile(0.5), quantile(0.75)
+            low, high = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+            inside = values[(values >= low) & (values <= high)]
+            stats.append({'label': sentiment, 'q1': q1, 'med': median, 'q3': q3,
+                          'whislo': float(inside.min()), 'whishi': float(inside.max()),
+                          'fliers': values[(values < low) | (values > high)].tolist()})
+        return stats
+
+    def to_dict(self):
+        """JSON-friendly form (histogram keys become strings)"""
+        return {
+            'sample_size': self.sample_size,
+            'total_posts': self.total_posts,
+            'sentiment_counts': self.sentiment_counts,
+            'source_counts': self.source_counts,
+            'length_sum': self.length_sum,
+            'length_min': self.length_min,
+            'length_max': self.length_max,
+            'confidence_sum': self.confidence_sum,
+            'confidence_min': self.confidence_min,
+            'confidence_max': self.confidence_max,
+            'length_counts': {str(length): count for length, count in self.length_counts.items()},
+            'confidence_counts': {sentiment: {repr(bucket): count for bucket, count in histogram.items()}
+                                  for sentiment, histogram in self.confidence_counts.items()},
+            'samples': self.samples,
+            'duplicate_counts': self.duplicate_counts,
+            'clusters': self.clusters,
+            'stress_counts': self.stress_counts,
+            'stress_score_sums': self.stress_score_sums
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        summary = cls(data['sample_size'])
+        for key in ['total_posts', 'sentiment_counts', 'source_counts', 'length_sum', 'length_min',
+                    'length_max', 'confidence_sum', 'confidence_min', 'confidence_max', 'samples']:
+            setattr(summary, key, data[key])
+        summary.length_counts = {int(length): count for length, count in data['length_counts'].items()}
+        # Summaries saved before duplicate detection have no cluster statistics
+        summary.duplicate_counts = data.get('duplicate_counts', {})
+        summary.clusters = data.get('clusters', {})
+        summary.stress_counts = data.get('stress_counts', {})
+        summary.stress_score_sums = data.get('stress_score_sums', {})
+        summary.confidence_counts = {sentiment: {float(bucket): count for bucket, count in histogram.items()}
+                                     for sentiment, histogram in data['confidence_counts'].items()}
+        return summary
+
+def _int_dict(series):
+    return {key: int(value) for key, value in series.items()}
+
+def _add_counts(left, right):
+    merged = dict(left)
+    for key, count in right.items():
+        merged[key] = merged.get(key, 0) + count
+    return merged
+
+def _extreme(pick, left, right):
+    if left is None:
+        return right
+    if right is None:
+        return left
+    return pick(left, right)
@@ -0,0 +1,65 @@
+import argparse
+import time
+import pandas as pd
+from inference_backends import BACKENDS
+from model_registry import DEFAULT_MODEL
+from reddit_corpus import load_labelled_posts, post_text
+from sentiment_engine import SentimentEngine
+from stand_in_model import build_stand_in_analyzer
+
+def compare_backends(backends=BACKENDS, model_name=DEFAULT_MODEL, analyzer=None, limit=None):
+    """Score the labelled Reddit posts with each backend and compare them with the first one"""
+    posts = load_labelled_posts()
+    if limit:
+        posts = posts.head(limit)
+    texts = post_text(posts).tolist()
+    print(f"Scoring {len(texts)} labelled posts with {', '.join(backends)}...")
+
+    rows = []
+    reference = None
+    for backend in backends:
+        started = time.perf_counter()
+        engine = SentimentEngine(model_name, analyzer=analyzer, backend=backend)
+        setup_seconds = time.perf_counter() - started
+        # One small batch first so lazy initialisation is not timed as inference
+        engine.analyze(texts[:8])
+
+        started = time.perf_counter()
+        labels, scores = engine.analyze(texts)
+        elapsed = time.perf_counter() - started
+        result = pd.DataFrame({'label': posts['label'], 'sentiment': labels, 'confidence': scores})
+        if reference is None:
+            reference = result
+
+        agrees = result['sentiment'] == reference['sentiment']
+        rows.append({
+            'backend': backend,
+            'setup_s': setup_seconds,
+            'posts_per_sec': len(texts) / elapsed if elapsed else 0.0,
+            'agreement': agrees.mean(),
+            'max_conf_diff': (result['confidence'] - reference['confidence']).abs().max(),
+            # Agreement within each stress category, to catch drift on one kind of post
+            **{f"agree[{label}]": rate for label, rate in agrees.groupby(result['label']).mean().items()}
+        })
+
+    summary = pd.DataFrame(rows)
+    summary['speedup'] = summary['posts_per_sec'] / summary['posts_per_sec'].iloc[0]
+    print(f"\nParity against the {backends[0]} backend:")
+    print(summary.to_string(index=False, float_format=lambda value: f"{value:.3f}"))
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Check accuracy parity and speed of the inference backends")
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=BACKENDS)
+    parser.add_argument('--limit', type=int, default=None, help="only score the first N labelled posts")
+    parser.add_argument('--stand-in', action='store_true',
+                        help="use the deterministic offline model instead of downloading DistilBERT")
+    args = parser.parse_args()
+
+    if args.stand_in:
+        compare_backends(args.backends, 'stand-in', build_stand_in_analyzer(), args.limit)
+    else:
+        compare_backends(args.backends, limit=args.limit)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+import matplotlib
+matplotlib.use('Agg')
+import numpy as np
+import pandas as pd
+import torch
+from generate_report import ReportGenerator
+from inference_backends import BACKENDS, DEFAULT_BACKEND
+from model_registry import DEFAULT_MODEL, get_pipeline
+from post_store import ScoredPostStore
+from reddit_corpus import RedditCorpus, load_labelled_posts, post_text
+from resource_usage import peak_rss_mb
+from sentiment_engine import SentimentEngine
+from stand_in_model import build_stand_in_analyzer
+
+# Character-length ranges used to sweep text length
+LENGTH_BUCKETS = {'short': (0, 200), 'medium': (200, 1000), 'long': (1000, None)}
+
+def sample_texts(samples_per_bucket=64, seed=0, files_sampled=6):
+    """Sample posts from the raw and labelled Reddit data, grouped by length bucket"""
+    rng = random.Random(seed)
+    pool = []
+    corpus = RedditCorpus()
+    files = corpus.discover()
+    for corpus_file in rng.sample(files, min(files_sampled, len(files))):
+        chunk = next(corpus.read_file(corpus_file, chunksize=2000))
+        pool.extend(post_text(chunk).tolist())
+    pool.extend(post_text(load_labelled_posts()).tolist())
+
+    buckets = {}
+    for bucket, (low, high) in LENGTH_BUCKETS.items():
+        matching = [text for text in pool if len(text) >= low and (high is None or len(text) < high)]
+        buckets[bucket] = rng.sample(matching, min(samples_per_bucket, len(matching)))
+    return buckets
+
+def _latency_stats(latencies):
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        'p50_ms': float(np.percentile(latencies_ms, 50)),
+        'p99_ms': float(np.percentile(latencies_ms, 99)),
+        'mean_ms': float(latencies_ms.mean())
+    }
+
+def bench_load(stand_in):
+    """Time loading the model (or building the offline stand-in)"""
+    started = time.perf_counter()
+    analyzer = build_stand_in_analyzer() if stand_in else get_pipeline(DEFAULT_MODEL)
+    return time.perf_counter() - started, analyzer
+
+def bench_tokenize(engine, buckets):
+    """Time tokenization alone for every length bucket"""
+    results = {}
+    for bucket, texts in buckets.items():
+        started = time.perf_counter()
+        encodings = engine.tokenizer(texts, truncation=True, max_length=engine.max_length)['input_ids']
+        elapsed = time.perf_counter() - started
+        results[bucket] = {
+            'posts': len(texts),
+            'seconds': elapsed,
+            'mean_tokens': float(np.mean([len(ids) for ids in encodings])) if encodings else 0.0
+        }
+    return results
+
+def bench_inference(engine, buckets, batch_sizes):
+    """Sweep batch size over each length bucket, recording throughput and per-batch latency"""
+    results = []
+    for bucket, texts in buckets.items():
+        for batch_size in batch_sizes:
+            engine.batch_size = batch_size
+            latencies = []
+            engine.on_batch = lambda posts, seconds: latencies.append(seconds)
+            try:
+                started = time.perf_counter()
+                engine.analyze(texts)
+                elapsed = time.perf_counter() - started
+            finally:
+                engine.on_batch = None
+
+            result = {
+                'bucket': bucket,
+                'batch_size': batch_size,
+                'posts': len(texts),
+                'batches': len(latencies),
+                'seconds': elapsed,
+                'posts_per_sec': len(texts) / elapsed if elapsed else 0.0,
+                'peak_rss_mb': peak_rss_mb()
+            }
+            result.update(_latency_stats(latencies) if latencies else {})
+            results.append(result)
+            print(f"  {bucket:>6} x batch {batch_size:>3}: {result['posts_per_sec']:8.1f} posts/sec, "
+                  f"p50 {result.get('p50_ms', 0):7.1f} ms, p99 {result.get('p99_ms', 0):7.1f} ms")
+    return results
+
+def bench_persist_and_report(scored):
+    """Time appending to and reading back the scored post store, then rendering the HTML report"""
+    working_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        os.chdir(temp_dir)
+        try:
+            store = ScoredPostStore()
+            started = time.perf_counter()
+            store.append(scored)
+            persist_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            store.read(['sentiment', 'confidence'])
+            read_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            ReportGenerator().generate_analysis_report(store.root)
+            report_seconds = time.perf_counter() - started
+        finally:
+            os.chdir(working_dir)
+    return {'persist_seconds': persist_seconds, 'read_seconds': read_seconds,
+            'report_seconds': report_seconds}
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmarks(stand_in=False, samples_per_bucket=64, batch_sizes=(1, 8, 32, 64), seed=0,
+                   output_dir='benchmark_results', backend=DEFAULT_BACKEND):
+    """Run every stage and write the results as JSON"""
+    print("Sampling benchmark inputs...")
+    buckets = sample_texts(samples_per_bucket, seed)
+
+    print("Loading model...")
+    load_seconds, analyzer = bench_load(stand_in)
+    started = time.perf_counter()
+    engine = SentimentEngine('stand-in' if stand_in else DEFAULT_MODEL, analyzer=analyzer, backend=backend)
+    # Quantizing or exporting the model is part of the load cost of those backends
+    load_seconds += time.perf_counter() - started
+
+    print("Timing tokenization...")
+    tokenize = bench_tokenize(engine, buckets)
+
+    print("Timing inference...")
+    inference = bench_inference(engine, buckets, batch_sizes)
+
+    print("Timing persistence and report rendering...")
+    texts = [text for bucket_texts in buckets.values() for text in bucket_texts]
+    scored = pd.DataFrame({'text': texts, 'source': 'reddit',
+                           'timestamp': datetime.now().isoformat()})
+    engine.batch_size = max(batch_sizes)
+    scored['sentiment'], scored['confidence'] = engine.analyze(scored['text'])
+    persist = bench_persist_and_report(scored)
+
+    results = {
+        'commit': _git_commit(),
+        'timestamp': datetime.now().isoformat(),
+        'model': 'stand-in' if stand_in else DEFAULT_MODEL,
+        'backend': backend,
+        'environment': {
+            'python': platform.python_version(),
+            'torch': torch.__version__,
+            'torch_threads': torch.get_num_threads(),
+            'cpu_count': os.cpu_count()
+        },
+        'seed': seed,
+        'stages': {'load_seconds': load_seconds, 'tokenize': tokenize, **persist},
+        'inference': inference,
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    output_file = os.path.join(output_dir, f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nBenchmark results saved to {output_file}")
+    return output_file
+
+def compare(baseline_file, candidate_file):
+    """Print throughput and stage timings of two result files side by side"""
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(candidate_file, 'r', encoding='utf-8') as f:
+        candidate = json.load(f)
+
+    print(f"Baseline:  {baseline['commit']} ({baseline['model']}, {baseline.get('backend', 'pytorch')})")
+    print(f"Candidate: {candidate['commit']} ({candidate['model']}, {candidate.get('backend', 'pytorch')})\n")
+    before = {(r['bucket'], r['batch_size']): r for r in baseline['inference']}
+    for result in candidate['inference']:
+        old = before.get((result['bucket'], result['batch_size']))
+        if old is None:
+            continue
+        change = (result['posts_per_sec'] / old['posts_per_sec'] - 1) * 100 if old['posts_per_sec'] else 0.0
+        print(f"{result['bucket']:>6} x batch {result['batch_size']:>3}: "
+              f"{old['posts_per_sec']:8.1f} -> {result['posts_per_sec']:8.1f} posts/sec ({change:+.1f}%)")
+    for stage in ['load_seconds', 'persist_seconds', 'read_seconds', 'report_seconds']:
+        print(f"{stage}: {baseline['stages'][stage]:.3f}s -> {candidate['stages'][stage]:.3f}s")
+    print(f"peak_rss_mb: {baseline['peak_rss_mb']:.0f} -> {candidate['peak_rss_mb']:.0f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scoring and reporting pipeline")
+    parser.add_argument('--stand-in', action='store_true',
+                        help="use a deterministic local model instead of downloading DistilBERT")
+    parser.add_argument('--samples', type=int, default=64, help="posts per length bucket")
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 8, 32, 64])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--backend', choices=BACKENDS, default=DEFAULT_BACKEND)
+    parser.add_argument('--output-dir', default='benchmark_results')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CANDIDATE'),
+                        help="compare two result files instead of running")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+    else:
+        run_benchmarks(args.stand_in, args.samples, args.batch_sizes, args.seed, args.output_dir,
+                       args.backend)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+import argparse
+import os
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.model_selection import train_test_split
+from sklearn.naive_bayes import MultinomialNB
+from model_registry import DEFAULT_MODEL
+from reddit_corpus import RedditCorpus, post_text
+from sentiment_engine import SentimentEngine
+from stand_in_model import build_stand_in_analyzer
+from text_preprocessing import preprocess_series, preprocessing_signature
+
+DEFAULT_CASCADE_PATH = os.path.join('models', 'sentiment_cascade.joblib')
+
+class CascadeClassifier:
+    """TF-IDF + Naive Bayes first pass that sends only uncertain posts to the transformer"""
+
+    def __init__(self, engine=None, margin=0.5):
+        self.engine = engine
+        # Posts whose top-two class probability gap is below this go to the transformer
+        self.margin = margin
+        # Texts arrive cleaned, stopword-free and lemmatized from preprocess_series
+        self.vectorizer = TfidfVectorizer(lowercase=False, ngram_range=(1, 2), min_df=2,
+                                          max_features=50000)
+        self.classifier = MultinomialNB(alpha=0.5)
+        self.total_posts = 0
+        self.routed_posts = 0
+
+    def train(self, texts, labels):
+        """Fit the linear model on texts labelled by the transformer (or by hand)"""
+        features = self.vectorizer.fit_transform(preprocess_series(texts))
+        self.classifier.fit(features, labels)
+        return self
+
+    def linear_predict(self, texts):
+        """Labels, confidences and decision margins from the linear model alone"""
+        probs = self.classifier.predict_proba(self.vectorizer.transform(preprocess_series(texts)))
+        ranked = np.sort(probs, axis=1)
+        margins = ranked[:, -1] - ranked[:, -2]
+        labels = self.classifier.classes_[probs.argmax(axis=1)]
+        return labels, probs.max(axis=1), margins
+
+    def analyze(self, texts):
+        """Score texts, calling the transformer only for posts below the margin"""
+        texts = [text if isinstance(text, str) else "" for text in texts]
+        if not texts:
+            return [], []
+        labels, scores, margins = self.linear_predict(texts)
+        labels = labels.tolist()
+        scores = scores.tolist()
+
+        uncertain = np.flatnonzero(margins < self.margin)
+        if len(uncertain):
+            if self.engine is None:
+                raise ValueError("CascadeClassifier needs an engine to score uncertain posts")
+            routed_labels, routed_scores = self.engine.analyze([texts[i] for i in uncertain])
+            for i, label, score in zip(uncertain, routed_labels, routed_scores):
+                labels[i] = label
+                scores[i] = score
+
+        self.total_posts += len(texts)
+        self.routed_posts += len(uncertain)
+        return labels, scores
+
+    @property
+    def routing_rate(self):
+        """Share of posts sent to the transformer so far"""
+        return self.routed_posts / self.total_posts if self.total_posts else 0.0
+
+    def tune_margin(self, texts, reference_labels, target_agreement=0.97):
+        """Pick the smallest margin whose cascade output agrees with the reference often enough"""
+        labels, _, margins = self.linear_predict(texts)
+        reference_labels = np.asarray(reference_labels)
+        linear_correct = labels == reference_labels
+        for margin in np.linspace(0.0, 1.0, 101):
+            # Routed posts take the reference label, so only confident linear calls can disagree
+            agreement = np.where(margins < margin, True, linear_correct).mean()
+            if agreement >= target_agreement:
+                self.margin = float(margin)
+                break
+        else:
+            self.margin = 1.0
+        return self.margin
+
+    def evaluate(self, texts, reference_labels):
+        """Routing rate and agreement with transformer-only labels for a sample"""
+        labels, _, margins = self.linear_predict(texts)
+        routed = margins < self.margin
+        reference_labels = np.asarray(reference_labels)
+        # Routed posts get the transformer's label, which is the reference itself
+        labels = np.where(routed, reference_labels, labels)
+        return {
+            'posts': len(texts),
+            'margin': self.margin,
+            'routing_rate': float(routed.mean()) if len(texts) else 0.0,
+            'agreement': float((labels == reference_labels).mean()) if len(texts) else 0.0
+        }
+
+    def save(self, path=DEFAULT_CASCADE_PATH):
+        """Persist the fitted linear model and margin (not the transformer)"""
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        joblib.dump({'vectorizer': self.vectorizer, 'classifier': self.classifier,
+                     'margin': self.margin, 'preprocessing': preprocessing_signature()}, path)
+        print(f"Cascade saved to {path}")
+
+    @classmethod
+    def load(cls, path=DEFAULT_CASCADE_PATH, engine=None):
+        state = joblib.load(path)
+        # The vocabulary only fits text preprocessed the same way (models saved before
+        # the signature was recorded cannot be checked)
+        saved = state.get('preprocessing')
+        if saved is not None and saved != preprocessing_signature():
+            raise ValueError(f"Cascade {path} was trained with preprocessing {saved} but this environment "
+                             f"uses {preprocessing_signature()}; retrain it with cascade_classifier.py")
+        cascade = cls(engine, state['margin'])
+        cascade.vectorizer = state['vectorizer']
+        cascade.classifier = state['classifier']
+        return cascade
+
+def sample_corpus_texts(samples, seed=0):
+    """Draw a reproducible sample of post texts from the raw Reddit corpus"""
+    texts = pd.concat([post_text(chunk) for chunk in RedditCorpus().iter_chunks(chunksize=20000)],
+                      ignore_index=True)
+    texts = texts[texts.str.len() > 0]
+    return texts.sample(min(samples, len(texts)), random_state=seed).tolist()
+
+def train_cascade(samples=20000, target_agreement=0.97, engine=None, path=DEFAULT_CASCADE_PATH):
+    """Label a corpus sample with the transformer, train the linear model and tune its margin"""
+    engine = engine or SentimentEngine(DEFAULT_MODEL)
+    texts = sample_corpus_texts(samples)
+    print(f"Labelling {len(texts)} posts with the transformer...")
+    started = time.perf_counter()
+    labels, _ = engine.analyze(texts)
+    transformer_seconds = time.perf_counter() - started
+
+    train_texts, test_texts, train_labels, test_labels = train_test_split(
+        texts, labels, test_size=0.4, random_state=42)
+    # Tune on posts the linear model has not seen, report on a separate held-out half
+    tune_texts, test_texts, tune_labels, test_labels = train_test_split(
+        test_texts, test_labels, test_size=0.5, random_state=42)
+    cascade = CascadeClassifier(engine).train(train_texts, train_labels)
+    cascade.tune_margin(tune_texts, tune_labels, target_agreement)
+    results = cascade.evaluate(test_texts, test_labels)
+
+    print(f"\nTransformer-only: {len(texts) / transformer_seconds:.1f} posts/sec")
+    print(f"Margin: {results['margin']:.2f}")
+    print(f"Routing rate (held-out): {results['routing_rate'] * 100:.1f}% of posts sent to the transformer")
+    print(f"Agreement with transformer-only labels (held-out): {results['agreement'] * 100:.1f}%")
+    cascade.save(path)
+    return cascade, results
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the TF-IDF + DistilBERT sentiment cascade")
+    parser.add_argument('--samples', type=int, default=20000)
+    parser.add_argument('--target-agreement', type=float, default=0.97)
+    parser.add_argument('--output', default=DEFAULT_CASCADE_PATH)
+    parser.add_argument('--stand-in', action='store_true',
+                        help="label with a deterministic local model instead of downloading DistilBERT")
+    args = parser.parse_args()
+    engine = None
+    if args.stand_in:
+        engine = SentimentEngine('stand-in', analyzer=build_stand_in_analyzer())
+    train_cascade(args.samples, args.target_agreement, engine, args.output)
+
+if __name__ == "__main__":
+    main()
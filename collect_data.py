@@ -1,45 +1,122 @@
 import pandas as pd
 import json
+import os
 from datetime import datetime
+from post_columns import ColumnarPosts
+from post_log import PostLog, detect_compression
 
 class DataCollector:
-    def __init__(self):
-        self.posts = []
+    def __init__(self, log_file=None, compression='auto'):
+        self.posts = ColumnarPosts()
+        # Posts before this index have already been scored
+        self.scored_count = 0
+        # With a log file, earlier posts are reloaded from it and every new post is appended to it
+        self.log = None
+        if log_file is not None:
+            self.open_log(log_file, compression)
         
     def add_post(self, text, source="manual", timestamp=None):
         """Add a social media post to the collection"""
         if timestamp is None:
             timestamp = datetime.now().isoformat()
             
-        self.posts.append({
-            'text': text,
-            'source': source,
-            'timestamp': timestamp
-        })
+        self.posts.append(text, source, timestamp)
+        if self.log is not None:
+            self.log.append(self.posts[-1].to_dict())
+        
+    def unscored_posts(self):
+        """Return the posts added since the last analysis"""
+        return self.posts[self.scored_count:]
+        
+    def mark_scored(self, count=None):
+        """Move the watermark past the posts that were just scored"""
+        self.scored_count = len(self.posts) if count is None else count
+        if self.log is not None:
+            self._save_watermark(self.log.path)
         
     def save_to_csv(self, filename='social_media_posts.csv'):
         """Save collected posts to a CSV file"""
-        df = pd.DataFrame(self.posts)
+        df = self.posts.to_frame()
         df.to_csv(filename, index=False)
+        self._save_watermark(filename)
         print(f"Data saved to {filename}")
         
     def save_to_json(self, filename='social_media_posts.json'):
         """Save collected posts to a JSON file"""
         with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(self.posts, f, indent=2)
+            json.dump(self.posts.records(), f, indent=2)
+        self._save_watermark(filename)
+        print(f"Data saved to {filename}")
+        
+    def save_to_jsonl(self, filename='social_media_posts.jsonl', compression='auto'):
+        """Save collected posts as JSON Lines (gzip or zstd by .gz/.zst extension), one post per line"""
+        temp_file = filename + '.tmp'
+        with PostLog(temp_file, detect_compression(filename) if compression == 'auto' else compression,
+                     flush_every=10000) as log:
+            log.extend(record.to_dict() for record in self.posts)
+        os.replace(temp_file, filename)
+        self._save_watermark(filename)
         print(f"Data saved to {filename}")
         
-    def load_from_csv(self, filename='social_media_posts.csv'):
-        """Load posts from a CSV file"""
-        df = pd.read_csv(filename)
-        self.posts = df.to_dict('records')
+    def load_from_jsonl(self, filename='social_media_posts.jsonl', compression='auto', chunksize=100000):
+        """Load posts from a JSON Lines file, streaming it chunk by chunk and skipping a torn last line"""
+        log = PostLog(filename, compression)
+        self.posts = ColumnarPosts()
+        for chunk in log.iter_chunks(chunksize):
+            self.posts.extend_frame(pd.DataFrame(chunk, columns=['text', 'source', 'timestamp']))
+        self._load_watermark(filename)
+        if log.skipped:
+            print(f"Skipped {log.skipped} unreadable lines in {filename}")
+        print(f"Loaded {len(self.posts)} posts from {filename}")
+        
+    def open_log(self, filename='social_media_posts.jsonl', compression='auto'):
+        """Reload posts from a JSON Lines log (if it exists) and append every new post to it"""
+        self.close_log()
+        if os.path.exists(filename):
+            self.load_from_jsonl(filename, compression)
+        self.log = PostLog(filename, compression)
+        
+    def close_log(self):
+        if self.log is not None:
+            self.log.close()
+            self.log = None
+        
+    def load_from_csv(self, filename='social_media_posts.csv', chunksize=100000):
+        """Load posts from a CSV file (our own format or a raw Reddit dump) chunk by chunk"""
+        self.posts = ColumnarPosts()
+        for chunk in pd.read_csv(filename, chunksize=chunksize, encoding_errors='replace'):
+            self.posts.extend_frame(self._post_columns(chunk))
+        self._load_watermark(filename)
         print(f"Loaded {len(self.posts)} posts from {filename}")
         
     def load_from_json(self, filename='social_media_posts.json'):
         """Load posts from a JSON file"""
         with open(filename, 'r', encoding='utf-8') as f:
-            self.posts = json.load(f)
+            self.posts = ColumnarPosts()
+            self.posts.extend_frame(pd.DataFrame(json.load(f), columns=['text', 'source', 'timestamp']))
+        self._load_watermark(filename)
         print(f"Loaded {len(self.posts)} posts from {filename}")
+        
+    def _post_columns(self, chunk):
+        """Map a raw Reddit dump chunk (title, selftext, created_utc) onto text, source and timestamp"""
+        if 'text' in chunk:
+            return chunk
+        text = (chunk['title'].fillna("").astype(str) + "\n\n" + chunk['selftext'].fillna("").astype(str)).str.strip()
+        created = pd.to_datetime(pd.to_numeric(chunk['created_utc'], errors='coerce'), unit='s')
+        return pd.DataFrame({'text': text, 'source': 'Reddit', 'timestamp': created})
+        
+    def _save_watermark(self, filename):
+        """Record how many of the saved posts were already scored"""
+        with open(f'{filename}.watermark.json', 'w', encoding='utf-8') as f:
+            json.dump({'scored_count': self.scored_count}, f)
+        
+    def _load_watermark(self, filename):
+        """Restore the watermark saved next to a data file (none means nothing was scored)"""
+        watermark_file = f'{filename}.watermark.json'
+        self.scored_count = 0
+        if os.path.exists(watermark_file):
+            with open(watermark_file, 'r', encoding='utf-8') as f:
+                self.scored_count = min(json.load(f)['scored_count'], len(self.posts))
 
 def main():
     # Create a data collector
@@ -61,11 +138,13 @@ def main():
     # Save the data
     collector.save_to_csv()
     collector.save_to_json()
+    collector.save_to_jsonl()
     
     print("\nYou can now:")
     print("1. Add more posts using collector.add_post()")
-    print("2. Save data using collector.save_to_csv() or collector.save_to_json()")
-    print("3. Load data using collector.load_from_csv() or collector.load_from_json()")
+    print("2. Save data using collector.save_to_csv(), save_to_json() or save_to_jsonl()")
+    print("3. Load data using collector.load_from_csv(), load_from_json() or load_from_jsonl()")
+    print("   (or DataCollector(log_file='posts.jsonl') to append each post as it is added)")
     print("4. Use the data with test_mood_detection.py")
 
 if __name__ == "__main__":
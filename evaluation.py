@@ -0,0 +1,132 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+import pandas as pd
+from inference_backends import BACKENDS, DEFAULT_BACKEND
+from model_registry import DEFAULT_MODEL
+from reddit_corpus import load_labelled_posts, post_text
+from resource_usage import peak_rss_mb
+from result_cache import ResultCache
+from sentiment_engine import SentimentEngine
+from stand_in_model import build_stand_in_analyzer
+
+# The labelled posts carry stress categories, not sentiment labels. Every one was picked from
+# a stress subreddit, so the share scored as this sentiment is reported as a proxy for quality,
+# not as accuracy against ground truth
+PROXY_SENTIMENT = 'NEGATIVE'
+
+def load_evaluation_set(limit=None):
+    """Labelled posts with a stress category and their scored text"""
+    posts = load_labelled_posts()
+    posts = posts[posts['label'].notna()].reset_index(drop=True)
+    if limit:
+        posts = posts.head(limit)
+    posts['text'] = post_text(posts)
+    return posts
+
+def confusion_matrix(posts, predicted):
+    """Predicted sentiment counts per stress category, with a total row"""
+    matrix = pd.crosstab(posts['label'], pd.Series(predicted, name='predicted'), margins=True, margins_name='All')
+    matrix.index.name = 'label'
+    return matrix
+
+def evaluate_config(engine, posts, batch_size, max_length, cache_dir):
+    """Score the posts cold and then warm through a fresh result cache with one engine setting"""
+    engine.batch_size = batch_size
+    engine.max_length = min(max_length, engine.tokenizer.model_max_length)
+    # Cached results would be reused across batch sizes, so each setting starts cold
+    engine.cache = ResultCache(os.path.join(cache_dir, f"{engine.backend.name}-{batch_size}-{max_length}.db"))
+    texts = posts['text'].tolist()
+    try:
+        started = time.perf_counter()
+        labels, scores = engine.analyze(texts)
+        cold_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        engine.analyze(texts)
+        warm_seconds = time.perf_counter() - started
+    finally:
+        engine.cache.close()
+        engine.cache = None
+
+    negative = pd.Series(labels) == PROXY_SENTIMENT
+    result = {
+        'backend': engine.backend.name,
+        'batch_size': batch_size,
+        'max_length': engine.max_length,
+        'posts': len(texts),
+        'negative_rate': float(negative.mean()) if len(texts) else 0.0,
+        'seconds': cold_seconds,
+        'posts_per_sec': len(texts) / cold_seconds if cold_seconds else 0.0,
+        'cached_posts_per_sec': len(texts) / warm_seconds if warm_seconds else 0.0,
+        'mean_confidence': float(pd.Series(scores).mean()) if scores else 0.0,
+        'peak_rss_mb': peak_rss_mb(),
+        'label_negative_rate': {label: float(rate) for label, rate in negative.groupby(posts['label']).mean().items()}
+    }
+    return result, confusion_matrix(posts, labels)
+
+def run_evaluation(backends=(DEFAULT_BACKEND,), batch_sizes=(32,), max_lengths=(512,), model_name=DEFAULT_MODEL,
+                   analyzer=None, limit=None, output_dir='evaluation_results'):
+    """Evaluate every backend x batch size x max length setting and write the results as JSON"""
+    posts = load_evaluation_set(limit)
+    print(f"Evaluating on {len(posts)} labelled posts ({posts['label'].nunique()} stress categories), "
+          f"reporting the share scored {PROXY_SENTIMENT}")
+
+    results = []
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for backend in backends:
+            started = time.perf_counter()
+            engine = SentimentEngine(model_name, analyzer=analyzer, backend=backend)
+            load_seconds = time.perf_counter() - started
+            # One uncached call first so lazy initialisation is not timed as inference
+            engine.analyze(posts['text'].head(8).tolist())
+            for max_length in max_lengths:
+                for batch_size in batch_sizes:
+                    result, matrix = evaluate_config(engine, posts, batch_size, max_length, cache_dir)
+                    result['load_seconds'] = load_seconds
+                    result['confusion'] = matrix.to_dict(orient='index')
+                    results.append(result)
+                    print(f"\n{backend}, batch {batch_size}, max length {result['max_length']}: "
+                          f"negative-rate on stress posts {result['negative_rate'] * 100:.1f}%, "
+                          f"{result['posts_per_sec']:.1f} posts/sec ({result['cached_posts_per_sec']:.0f} cached), "
+                          f"peak RSS {result['peak_rss_mb']:.0f} MB")
+                    print(matrix.to_string())
+
+    table = pd.DataFrame([{key: value for key, value in result.items() if key not in ('label_negative_rate', 'confusion')}
+                          for result in results])
+    print("\nSpeed versus quality:")
+    print(table.to_string(index=False, float_format=lambda value: f"{value:.3f}"))
+
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    output_file = os.path.join(output_dir, f"evaluation_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump({'timestamp': datetime.now().isoformat(), 'model': model_name,
+                   'proxy_sentiment': PROXY_SENTIMENT, 'results': results}, f, indent=2)
+    print(f"\nEvaluation results saved to {output_file}")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate sentiment settings on the labelled stress posts")
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=[DEFAULT_BACKEND])
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[32])
+    parser.add_argument('--max-lengths', type=int, nargs='+', default=[512],
+                        help="token limits to truncate posts to")
+    parser.add_argument('--limit', type=int, default=None, help="only score the first N labelled posts")
+    parser.add_argument('--output-dir', default='evaluation_results')
+    parser.add_argument('--stand-in', action='store_true',
+                        help="use the deterministic offline model instead of downloading DistilBERT")
+    args = parser.parse_args()
+
+    if args.stand_in:
+        run_evaluation(args.backends, args.batch_sizes, args.max_lengths, 'stand-in', build_stand_in_analyzer(),
+                       args.limit, args.output_dir)
+    else:
+        run_evaluation(args.backends, args.batch_sizes, args.max_lengths, limit=args.limit,
+                       output_dir=args.output_dir)
+
+if __name__ == "__main__":
+    main()
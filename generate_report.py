@@ -1,95 +1,237 @@
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 from datetime import datetime
+import html
+import math
 import os
+import re
+from analysis_summary import AnalysisSummary
+from post_store import ScoredPostStore
+from mood_timeline import MoodTimeline
+from profiling import profiled, span
+from summary_charts import render_charts, render_trend_chart
+
+# Columns the report reads from the stored results
+REPORT_COLUMNS = ['text', 'source', 'sentiment', 'confidence']
+
+# Scored posts the report is built from when no file is given: the store written by the
+# interactive and GUI analyses, then the sample results committed with the repository
+DEFAULT_DATA_FILES = ['scored_posts', 'user_posts.csv']
+
+# Rows per page of the full per-sentiment post listings
+POSTS_PER_PAGE = 500
+
+STYLE = """
+            <style>
+                body { font-family: Arial, sans-serif; margin: 20px; }
+                .section { margin: 20px 0; padding: 20px; background-color: #f5f5f5; border-radius: 5px; }
+                .visualization { margin: 20px 0; text-align: center; }
+                table { border-collapse: collapse; width: 100%; margin: 20px 0; }
+                th, td { border: 1px solid #ddd; padding: 8px; text-align: left; }
+                th { background-color: #f2f2f2; }
+                .positive { color: green; }
+                .negative { color: red; }
+                .pages a { margin-right: 10px; }
+            </style>"""
+
+POST_TABLE_HEADER = """
+                <table>
+                    <tr>
+                        <th>Text</th>
+                        <th>Source</th>
+                        <th>Sentiment</th>
+                        <th>Confidence</th>
+                    </tr>"""
+
+def post_row(text, source, sentiment, confidence):
+    """One escaped table row for a post"""
+    sentiment = html.escape(str(sentiment))
+    return f"""
+                    <tr>
+                        <td>{html.escape(str(text))}</td>
+                        <td>{html.escape(str(source))}</td>
+                        <td class="{sentiment.lower()}">{sentiment}</td>
+                        <td>{confidence:.2f}</td>
+                    </tr>"""
+
+def find_data_file():
+    """The first of DEFAULT_DATA_FILES holding scored posts, or None"""
+    for data_file in DEFAULT_DATA_FILES:
+        if os.path.isdir(data_file):
+            if ScoredPostStore(data_file).segments():
+                return data_file
+        elif os.path.exists(data_file):
+            return data_file
+    return None
+
+class PostListing:
+    """Writes one sentiment's posts across numbered, linked pages, a page at a time"""
+
+    def __init__(self, report_dir, report_name, sentiment, total_posts, page_size=POSTS_PER_PAGE):
+        self.report_dir = report_dir
+        self.report_name = report_name
+        self.sentiment = sentiment
+        self.page_size = page_size
+        self.pages = max(1, math.ceil(total_posts / page_size))
+        self.slug = re.sub(r'[^a-z0-9]+', '_', str(sentiment).lower()).strip('_') or 'unknown'
+        self.file = None
+        self.page = 0
+        self.rows_on_page = 0
+
+    def page_name(self, page):
+        return f"{self.report_name}_{self.slug}_{page}.html"
+
+    def write(self, rows):
+        """Append pre-rendered rows, starting a new page whenever the current one is full"""
+        for row in rows:
+            if self.file is None or self.rows_on_page == self.page_size:
+                self._start_page()
+            self.file.write(row)
+            self.rows_on_page += 1
+
+    def close(self):
+        if self.file is None:
+            self._start_page()
+        self._end_page()
+
+    def _start_page(self):
+        if self.file is not None:
+            self._end_page()
+        self.page += 1
+        self.rows_on_page = 0
+        self.file = open(os.path.join(self.report_dir, self.page_name(self.page)), 'w', encoding='utf-8')
+        title = f"{html.escape(str(self.sentiment))} posts, page {self.page} of {self.pages}"
+        self.file.write(f"""
+        <html>
+        <head>
+            <title>{title}</title>{STYLE}
+        </head>
+        <body>
+            <h1>{title}</h1>
+            {self._navigation()}
+            <div class="section">{POST_TABLE_HEADER}""")
+
+    def _end_page(self):
+        self.file.write(f"""
+                </table>
+            </div>
+            {self._navigation()}
+        </body>
+        </html>
+        """)
+        self.file.close()
+        self.file = None
+
+    def _navigation(self):
+        links = [f'<a href="{self.report_name}.html">Back to report</a>']
+        if self.page > 1:
+            links.append(f'<a href="{self.page_name(self.page - 1)}">Previous</a>')
+        if self.page < self.pages:
+            links.append(f'<a href="{self.page_name(self.page + 1)}">Next</a>')
+        return f'<p class="pages">{" ".join(links)}</p>'
 
 class ReportGenerator:
-    def __init__(self):
+    def __init__(self, posts_per_page=POSTS_PER_PAGE, timeline_path='mood_timeline.db'):
         self.report_dir = 'reports'
+        self.posts_per_page = posts_per_page
+        self.timeline_path = timeline_path
         if not os.path.exists(self.report_dir):
             os.makedirs(self.report_dir)
             
-    def generate_analysis_report(self, data_file='user_posts.csv'):
-        """Generate a comprehensive analysis report"""
+    @profiled('generate_analysis_report')
+    def generate_analysis_report(self, data_file=None):
+        """Generate a comprehensive analysis report; returns None when there are no scored posts"""
         print("\nGenerating Analysis Report...")
+        if data_file is None:
+            data_file = find_data_file()
+        if data_file is None or not os.path.exists(data_file):
+            print(f"No scored posts found{f' at {data_file}' if data_file else ''}. "
+                  "Run an analysis first (interactive_analysis.py or mood_detector.py).")
+            return None
         
-        # Load analyzed data
-        df = pd.read_csv(data_file)
+        # Summarize analyzed data
+        with span('report_summary'):
+            summary = self._load_summary(data_file)
         
         # Create report
         report_time = datetime.now().strftime("%Y%m%d_%H%M%S")
-        report_file = f'{self.report_dir}/analysis_report_{report_time}.html'
+        report_name = f'analysis_report_{report_time}'
+        report_file = f'{self.report_dir}/{report_name}.html'
         
         # Generate visualizations
-        self._generate_visualizations(df)
+        with span('charts'):
+            self._generate_visualizations(summary)
+        
+        # Mood over time, answered from the precomputed timeline buckets
+        with span('report_trend'):
+            trend, subreddits = self._load_trend()
+            if trend is not None:
+                render_trend_chart(trend, self.report_dir)
+        
+        # Full post listings, streamed batch by batch into per-sentiment pages
+        with span('post_listings', posts=summary.total_posts):
+            listings = self._write_post_listings(data_file, summary, report_name)
         
-        # Create HTML report
-        with open(report_file, 'w', encoding='utf-8') as f:
-            f.write(self._generate_html_report(df, report_time))
+        # Write the HTML report section by section
+        with span('report_html'), open(report_file, 'w', encoding='utf-8') as f:
+            self._write_html_report(f, summary, listings, trend, subreddits)
         
         print(f"\nReport generated: {report_file}")
         return report_file
     
-    def _generate_visualizations(self, df):
-        """Generate and save visualizations"""
-        # 1. Sentiment Distribution
-        plt.figure(figsize=(10, 6))
-        sentiment_counts = df['sentiment'].value_counts()
-        plt.pie(sentiment_counts, labels=sentiment_counts.index, autopct='%1.1f%%',
-                colors=['lightgreen', 'lightcoral'])
-        plt.title('Sentiment Distribution')
-        plt.savefig(f'{self.report_dir}/sentiment_distribution.png')
-        plt.close()
-        
-        # 2. Post Length Distribution
-        plt.figure(figsize=(10, 6))
-        df['text_length'] = df['text'].str.len()
-        sns.histplot(data=df, x='text_length', bins=20)
-        plt.title('Post Length Distribution')
-        plt.savefig(f'{self.report_dir}/post_length_distribution.png')
-        plt.close()
-        
-        # 3. Source Distribution
-        plt.figure(figsize=(10, 6))
-        source_counts = df['source'].value_counts()
-        source_counts.plot(kind='bar')
-        plt.title('Posts by Source')
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        plt.savefig(f'{self.report_dir}/source_distribution.png')
-        plt.close()
-        
-        # 4. Confidence Analysis
-        plt.figure(figsize=(10, 6))
-        sns.boxplot(data=df, x='sentiment', y='confidence')
-        plt.title('Confidence by Sentiment')
-        plt.savefig(f'{self.report_dir}/confidence_analysis.png')
-        plt.close()
+    def _load_summary(self, data_file):
+        """Use the store's running summary, or summarize a CSV file chunk by chunk"""
+        if os.path.isdir(data_file):
+            return ScoredPostStore(data_file).summary()
+        return AnalysisSummary.from_chunks(pd.read_csv(data_file, usecols=REPORT_COLUMNS, chunksize=50000))
     
-    def _generate_html_report(self, df, report_time):
-        """Generate HTML report content"""
-        # Calculate statistics
-        total_posts = len(df)
-        sentiment_dist = df['sentiment'].value_counts()
-        source_dist = df['source'].value_counts()
-        avg_confidence = df['confidence'].mean()
-        avg_length = df['text'].str.len().mean()
-        
-        html_content = f"""
+    def _load_trend(self, max_buckets=36):
+        """Monthly buckets (weekly, then daily, for short spans) and per-subreddit totals, if a timeline exists"""
+        if not self.timeline_path or not os.path.exists(self.timeline_path):
+            return None, None
+        timeline = MoodTimeline(self.timeline_path)
+        try:
+            for granularity in ['month', 'week', 'day']:
+                trend = timeline.query(granularity=granularity)
+                if len(trend) >= 3:
+                    break
+            if trend.empty:
+                return None, None
+            return trend.tail(max_buckets), timeline.by_subreddit().head(10)
+        finally:
+            timeline.close()
+    
+    def _iter_posts(self, data_file, batch_size=50000):
+        """Stream the scored posts in bounded batches"""
+        if os.path.isdir(data_file):
+            return ScoredPostStore(data_file).iter_batches(REPORT_COLUMNS, batch_size)
+        return pd.read_csv(data_file, usecols=REPORT_COLUMNS, chunksize=batch_size)
+    
+    def _generate_visualizations(self, summary):
+        """Generate and save visualizations, reusing charts whose data has not changed"""
+        return render_charts(summary, self.report_dir, figsize=(10, 6))
+    
+    def _write_post_listings(self, data_file, summary, report_name):
+        """Write every post to paginated per-sentiment pages and return the listings"""
+        listings = {sentiment: PostListing(self.report_dir, report_name, sentiment, count, self.posts_per_page)
+                    for sentiment, count, _ in summary.sentiment_distribution()}
+        for batch in self._iter_posts(data_file):
+            batch = batch.assign(sentiment=batch['sentiment'].astype(str), text=batch['text'].fillna(""))
+            for sentiment, group in batch.groupby('sentiment', sort=False):
+                listing = listings.get(sentiment)
+                if listing is None:
+                    continue
+                listing.write(post_row(*values) for values in zip(
+                    group['text'], group['source'], group['sentiment'], group['confidence']))
+        for listing in listings.values():
+            listing.close()
+        return listings
+    
+    def _write_html_report(self, f, summary, listings, trend=None, subreddits=None):
+        """Write the main report page to an open file"""
+        f.write(f"""
         <html>
         <head>
-            <title>Mood Detection Analysis Report</title>
-            <style>
-                body {{ font-family: Arial, sans-serif; margin: 20px; }}
-                .section {{ margin: 20px 0; padding: 20px; background-color: #f5f5f5; border-radius: 5px; }}
-                .visualization {{ margin: 20px 0; text-align: center; }}
-                table {{ border-collapse: collapse; width: 100%; margin: 20px 0; }}
-                th, td {{ border: 1px solid #ddd; padding: 8px; text-align: left; }}
-                th {{ background-color: #f2f2f2; }}
-                .positive {{ color: green; }}
-                .negative {{ color: red; }}
-            </style>
+            <title>Mood Detection Analysis Report</title>{STYLE}
         </head>
         <body>
             <h1>Mood Detection Analysis Report</h1>
@@ -97,9 +239,9 @@ class ReportGenerator:
             
             <div class="section">
                 <h2>Summary Statistics</h2>
-                <p>Total Posts Analyzed: {total_posts}</p>
-                <p>Average Post Length: {avg_length:.1f} characters</p>
-                <p>Average Confidence: {avg_confidence:.2f}</p>
+                <p>Total Posts Analyzed: {summary.total_posts}</p>
+                <p>Average Post Length: {summary.avg_length:.1f} characters</p>
+                <p>Average Confidence: {summary.avg_confidence:.2f}</p>
             </div>
             
             <div class="section">
@@ -112,8 +254,10 @@ class ReportGenerator:
                         <th>Sentiment</th>
                         <th>Count</th>
                         <th>Percentage</th>
-                    </tr>
-                    {self._generate_sentiment_rows(sentiment_dist, total_posts)}
+                        <th>All Posts</th>
+                    </tr>""")
+        f.writelines(self._sentiment_rows(summary.sentiment_distribution(), listings))
+        f.write("""
                 </table>
             </div>
             
@@ -127,8 +271,9 @@ class ReportGenerator:
                         <th>Source</th>
                         <th>Count</th>
                         <th>Percentage</th>
-                    </tr>
-                    {self._generate_source_rows(source_dist, total_posts)}
+                    </tr>""")
+        f.writelines(self._source_rows(summary.source_distribution()))
+        f.write(f"""
                 </table>
             </div>
             
@@ -146,64 +291,143 @@ class ReportGenerator:
                 </div>
             </div>
             
+            """)
+        if trend is not None:
+            self._write_trend_section(f, trend, subreddits)
+        if summary.duplicate_counts:
+            self._write_duplicate_section(f, summary)
+        if summary.stress_counts:
+            self._write_stress_section(f, summary)
+        f.write(f"""
             <div class="section">
-                <h2>Sample Posts</h2>
-                <table>
-                    <tr>
-                        <th>Text</th>
-                        <th>Source</th>
-                        <th>Sentiment</th>
-                        <th>Confidence</th>
-                    </tr>
-                    {self._generate_post_rows(df.head())}
+                <h2>Sample Posts</h2>{POST_TABLE_HEADER}""")
+        f.writelines(post_row(row['text'], row['source'], row['sentiment'], row['confidence'])
+                     for row in summary.samples)
+        f.write("""
                 </table>
             </div>
         </body>
         </html>
-        """
-        return html_content
+        """)
+    
+    def _write_trend_section(self, f, trend, subreddits):
+        """Write the mood-over-time chart and tables"""
+        f.write("""
+            <div class="section">
+                <h2>Mood Over Time</h2>
+                <div class="visualization">
+                    <img src="mood_trend.png" alt="Mood Over Time">
+                </div>
+                <table>
+                    <tr>
+                        <th>Period Starting</th>
+                        <th>Posts</th>
+                        <th>Negative</th>
+                        <th>Average Confidence</th>
+                    </tr>""")
+        f.writelines(self._trend_rows(zip(trend['bucket'], trend['posts'], trend['negative_share'],
+                                          trend['avg_confidence'])))
+        f.write("""
+                </table>
+                <h3>By Subreddit</h3>
+                <table>
+                    <tr>
+                        <th>Subreddit</th>
+                        <th>Posts</th>
+                        <th>Negative</th>
+                        <th>Average Confidence</th>
+                    </tr>""")
+        f.writelines(self._trend_rows(zip(subreddits['subreddit'], subreddits['posts'],
+                                          subreddits['negative_share'], subreddits['avg_confidence'])))
+        f.write("""
+                </table>
+            </div>
+            """)
     
-    def _generate_sentiment_rows(self, sentiment_dist, total):
-        """Generate HTML rows for sentiment distribution"""
-        rows = ""
-        for sentiment, count in sentiment_dist.items():
-            percentage = (count / total) * 100
-            rows += f"""
-            <tr>
-                <td class="{sentiment.lower()}">{sentiment}</td>
-                <td>{count}</td>
-                <td>{percentage:.1f}%</td>
-            </tr>
-            """
-        return rows
+    def _write_duplicate_section(self, f, summary):
+        """Write how many posts reused the score of a duplicate and the largest clusters"""
+        scored = summary.total_posts - summary.duplicate_posts
+        f.write(f"""
+            <div class="section">
+                <h2>Duplicate Posts</h2>
+                <p>Posts Scored by the Model: {scored} of {summary.total_posts}
+                   ({summary.duplicate_posts / summary.total_posts * 100:.1f}% reused a duplicate's score)</p>
+                <p>Exact Duplicates: {summary.duplicate_counts.get('exact', 0)}</p>
+                <p>Near Duplicates: {summary.duplicate_counts.get('near', 0)}</p>
+                <p>Clusters With Duplicates: {len(summary.clusters)}</p>
+                <table>
+                    <tr>
+                        <th>Posts in Cluster</th>
+                        <th>Example Duplicate</th>
+                    </tr>""")
+        f.writelines(f"""
+                    <tr>
+                        <td>{size}</td>
+                        <td>{html.escape(sample)}</td>
+                    </tr>""" for size, sample in summary.largest_clusters())
+        f.write("""
+                </table>
+            </div>
+            """)
     
-    def _generate_source_rows(self, source_dist, total):
-        """Generate HTML rows for source distribution"""
-        rows = ""
-        for source, count in source_dist.items():
-            percentage = (count / total) * 100
-            rows += f"""
-            <tr>
-                <td>{source}</td>
-                <td>{count}</td>
-                <td>{percentage:.1f}%</td>
-            </tr>
-            """
-        return rows
+    def _write_stress_section(self, f, summary):
+        """Write the stress category distribution and mean per-category scores"""
+        f.write(f"""
+            <div class="section">
+                <h2>Stress Categories</h2>
+                <p>Posts Classified: {summary.stress_posts} of {summary.total_posts}</p>
+                <table>
+                    <tr>
+                        <th>Category</th>
+                        <th>Most Likely For</th>
+                        <th>Percentage</th>
+                        <th>Mean Score</th>
+                    </tr>""")
+        f.writelines(f"""
+                    <tr>
+                        <td>{html.escape(str(category))}</td>
+                        <td>{count}</td>
+                        <td>{percentage:.1f}%</td>
+                        <td>{mean_score:.2f}</td>
+                    </tr>""" for category, count, percentage, mean_score in summary.stress_distribution())
+        f.write("""
+                </table>
+            </div>
+            """)
     
-    def _generate_post_rows(self, df):
-        """Generate HTML rows for sample posts"""
-        rows = ""
-        for _, row in df.iterrows():
-            rows += f"""
-            <tr>
-                <td>{row['text']}</td>
-                <td>{row['source']}</td>
-                <td class="{row['sentiment'].lower()}">{row['sentiment']}</td>
-                <td>{row['confidence']:.2f}</td>
-            </tr>
-            """
-        return rows
+    def _trend_rows(self, rows):
+        """Yield HTML rows of (label, posts, negative share, average confidence)"""
+        for label, posts, negative_share, avg_confidence in rows:
+            yield f"""
+                    <tr>
+                        <td>{html.escape(str(label))}</td>
+                        <td>{posts}</td>
+                        <td>{negative_share * 100:.1f}%</td>
+                        <td>{avg_confidence:.2f}</td>
+                    </tr>"""
+    
+    def _sentiment_rows(self, sentiment_dist, listings):
+        """Yield HTML rows for sentiment distribution with links to the full listings"""
+        for sentiment, count, percentage in sentiment_dist:
+            listing = listings[sentiment]
+            label = html.escape(str(sentiment))
+            yield f"""
+                    <tr>
+                        <td class="{label.lower()}">{label}</td>
+                        <td>{count}</td>
+                        <td>{percentage:.1f}%</td>
+                        <td><a href="{listing.page_name(1)}">{listing.pages} page(s)</a></td>
+                    </tr>"""
+    
+    def _source_rows(self, source_dist):
+        """Yield HTML rows for source distribution"""
+        for source, count, percentage in source_dist:
+            yield f"""
+                    <tr>
+                        <td>{html.escape(str(source))}</td>
+                        <td>{count}</td>
+                        <td>{percentage:.1f}%</td>
+                    </tr>"""
 
 def main():
     print("Starting Report Generation...")
@@ -213,6 +437,8 @@ def main():
     
     # Generate report
     report_file = generator.generate_analysis_report()
+    if report_file is None:
+        return
     
     print("\nReport Generation Complete!")
     print(f"1. Report saved to: {report_file}")
@@ -222,7 +448,9 @@ def main():
     print("   - Source analysis")
     print("   - Post length analysis")
     print("   - Confidence analysis")
+    print("   - Mood over time (when mood_timeline.db exists)")
     print("   - Sample posts")
+    print("   - Full post listings by sentiment, paginated")
     print("3. Open the HTML file in your web browser to view the report")
 
 if __name__ == "__main__":
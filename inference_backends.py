@@ -0,0 +1,108 @@
+import copy
+import hashlib
+import os
+import re
+import torch
+
+BACKENDS = ['pytorch', 'quantized', 'onnx']
+
+# Backend used when callers do not pick one, e.g. MOOD_BACKEND=onnx
+DEFAULT_BACKEND = os.environ.get('MOOD_BACKEND', 'pytorch')
+
+class PyTorchBackend:
+    """Runs the float32 PyTorch model as loaded"""
+    name = 'pytorch'
+
+    def __init__(self, model):
+        self.model = model
+        self.model.eval()
+
+    def logits(self, input_ids, attention_mask):
+        with torch.inference_mode():
+            return self.model(input_ids=input_ids.to(self.model.device),
+                              attention_mask=attention_mask.to(self.model.device)).logits.cpu()
+
+class QuantizedBackend(PyTorchBackend):
+    """Runs a copy of the model with its Linear layers dynamically quantized to int8"""
+    name = 'quantized'
+
+    def __init__(self, model):
+        # The model may be shared through the registry, so quantize a CPU copy and leave it in place
+        quantized = torch.ao.quantization.quantize_dynamic(copy.deepcopy(model).cpu(), {torch.nn.Linear},
+                                                           dtype=torch.qint8)
+        super().__init__(quantized)
+
+class _LogitsOnly(torch.nn.Module):
+    """Export wrapper so the ONNX graph takes plain tensors and returns logits"""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask):
+        return self.model(input_ids=input_ids, attention_mask=attention_mask).logits
+
+class OnnxBackend:
+    """Runs the model as an exported ONNX graph under ONNX Runtime on CPU"""
+    name = 'onnx'
+
+    def __init__(self, model, model_name, export_dir='onnx_models'):
+        try:
+            import onnxruntime
+        except ImportError:
+            raise ImportError("The onnx backend needs onnxruntime, onnx and onnxscript "
+                              "(pip install onnxruntime onnx onnxscript)")
+
+        revision = getattr(model.config, '_commit_hash', None)
+        # Models without a hub revision may have changed since the last export, so key on their weights
+        if revision is None:
+            revision = f"local-{weights_digest(model)[:16]}"
+        safe_name = re.sub(r'[^A-Za-z0-9_.-]+', '_', f"{model_name}-{revision}")
+        self.path = os.path.join(export_dir, f"{safe_name}.onnx")
+        if not os.path.exists(self.path):
+            self._export(model, self.path)
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = torch.get_num_threads()
+        self.session = onnxruntime.InferenceSession(self.path, options, providers=['CPUExecutionProvider'])
+
+    def _export(self, model, path):
+        """Export once with dynamic batch and sequence axes; later runs reuse the file"""
+        print(f"Exporting ONNX model to {path}...")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Pad the sample so the traced graph keeps the attention-mask path
+        input_ids = torch.ones(2, 16, dtype=torch.long)
+        attention_mask = torch.ones(2, 16, dtype=torch.long)
+        attention_mask[1, 8:] = 0
+        batch = torch.export.Dim('batch')
+        sequence = torch.export.Dim('sequence', max=512)
+        torch.onnx.export(
+            _LogitsOnly(copy.deepcopy(model).cpu().eval()), (input_ids, attention_mask), path,
+            input_names=['input_ids', 'attention_mask'], output_names=['logits'],
+            dynamic_shapes={'input_ids': {0: batch, 1: sequence}, 'attention_mask': {0: batch, 1: sequence}},
+            dynamo=True
+        )
+
+    def logits(self, input_ids, attention_mask):
+        outputs = self.session.run(['logits'], {'input_ids': input_ids.numpy(),
+                                                'attention_mask': attention_mask.numpy()})
+        return torch.from_numpy(outputs[0])
+
+def weights_digest(model):
+    """SHA-256 over the parameter names and raw bytes of a model's state dict"""
+    digest = hashlib.sha256()
+    for name, tensor in sorted(model.state_dict().items()):
+        digest.update(name.encode('utf-8'))
+        digest.update(tensor.detach().cpu().contiguous().reshape(-1).view(torch.uint8).numpy().tobytes())
+    return digest.hexdigest()
+
+def create_backend(name, model, model_name):
+    """Build the named backend around a loaded Hugging Face model"""
+    if name == 'pytorch':
+        return PyTorchBackend(model)
+    if name == 'quantized':
+        return QuantizedBackend(model)
+    if name == 'onnx':
+        return OnnxBackend(model, model_name)
+    raise ValueError(f"Unknown backend '{name}', expected one of {', '.join(BACKENDS)}")
@@ -1,19 +1,51 @@
 import pandas as pd
 import matplotlib.pyplot as plt
-import seaborn as sns
 from datetime import datetime
 import os
-from transformers import pipeline
 from collect_data import DataCollector
 from generate_report import ReportGenerator
+from sentiment_engine import SentimentEngine
+from inference_backends import DEFAULT_BACKEND
+from result_cache import ResultCache
+from post_store import ScoredPostStore
+from mood_timeline import MoodTimeline
+from post_index import PostIndex
+from analysis_summary import AnalysisSummary
+from summary_charts import (plot_confidence, plot_length_distribution, plot_source_distribution,
+                            plot_sentiment_distribution)
+from cascade_classifier import DEFAULT_CASCADE_PATH, CascadeClassifier
+from scoring_server import SERVER_URL, ScoringClient
+from near_duplicates import DeduplicatingScorer
+from profiling import profiled, span
+from stress_classifier import load_default_classifier
 
 class InteractiveAnalyzer:
-    def __init__(self):
-        self.collector = DataCollector()
+    def __init__(self, backend=DEFAULT_BACKEND, log_file=None, server_url=SERVER_URL):
+        # With a log file, posts survive restarts and unscored ones are picked up again
+        self.collector = DataCollector(log_file)
         self.report_generator = ReportGenerator()
-        # Initialize sentiment analyzer
-        self.sentiment_analyzer = pipeline("sentiment-analysis", 
-                                         model="distilbert-base-uncased-finetuned-sst-2-english")
+        self.store = ScoredPostStore()
+        self.timeline = MoodTimeline()
+        self.index = PostIndex()
+        # Scored posts of this session and their running summary
+        self.results = None
+        self.summary = AnalysisSummary()
+        # Initialize sentiment analyzer, or share the warm model of a running scoring server
+        if server_url:
+            self.sentiment_engine = ScoringClient(server_url)
+        else:
+            self.sentiment_engine = SentimentEngine(cache=ResultCache(), backend=backend)
+        # A trained cascade answers confident posts itself and defers the rest to the engine
+        self.cascade = None
+        if os.path.exists(DEFAULT_CASCADE_PATH):
+            try:
+                self.cascade = CascadeClassifier.load(DEFAULT_CASCADE_PATH, self.sentiment_engine)
+            except ValueError as e:
+                print(f"Not using the cascade: {e}")
+        # Only one post per duplicate cluster is scored; the rest reuse its result
+        self.deduplicator = DeduplicatingScorer(self.cascade or self.sentiment_engine)
+        # A trained stress classifier adds per-category scores next to the sentiment
+        self.stress_classifier = load_default_classifier()
         
     def get_user_input(self):
         """Get social media posts from user input"""
@@ -29,67 +61,73 @@ class InteractiveAnalyzer:
             self.collector.add_post(post, source)
             print("Post added successfully!")
     
+    @profiled('analyze_data')
     def analyze_data(self):
         """Analyze the collected data"""
         if not self.collector.posts:
             print("No posts to analyze. Please add some posts first.")
             return
             
-        print("\nAnalyzing posts...")
-        
-        # Analyze sentiments
-        df = pd.DataFrame(self.collector.posts)
-        sentiments = []
-        confidence_scores = []
-        
-        for post in df['text']:
-            result = self.sentiment_analyzer(post)[0]
-            sentiments.append(result['label'])
-            confidence_scores.append(result['score'])
-        
-        df['sentiment'] = sentiments
-        df['confidence'] = confidence_scores
-        
-        # Save analyzed data
-        df.to_csv('user_posts.csv', index=False)
+        # Only posts added since the last run need scoring
+        new_posts = self.collector.unscored_posts()
+        print(f"\nAnalyzing {len(new_posts)} new posts...")
+        
+        if new_posts:
+            # Analyze sentiments in batches
+            with span('score', posts=len(new_posts)):
+                df_new = self.deduplicator.analyze_frame(new_posts.to_frame())
+            if self.stress_classifier is not None:
+                with span('stress', posts=len(df_new)):
+                    self.stress_classifier.score_frame(df_new)
+            duplicates = (df_new['duplicate'] != '').sum()
+            if duplicates:
+                print(f"Duplicates: {duplicates} posts reused the score of an earlier post")
+            if self.cascade is not None:
+                print(f"Cascade: {self.cascade.routing_rate * 100:.1f}% of posts sent to the transformer")
+            if self.sentiment_engine.cache is not None:
+                cache_stats = self.sentiment_engine.cache.stats()
+                print(f"Result cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses this session")
+            
+            # Append the delta to the store and merge it into this session's results
+            with span('store_append', posts=len(df_new)):
+                self.store.append(df_new)
+            with span('timeline_add'):
+                self.timeline.add(df_new)
+            with span('index_add'):
+                self.index.add(df_new)
+            self.collector.mark_scored()
+            self.summary = self.summary.merge(AnalysisSummary.from_frame(df_new))
+            if self.results is None:
+                self.results = df_new
+            else:
+                self.results = pd.concat([self.results, df_new], ignore_index=True)
         
         # Generate report
-        report_file = self.report_generator.generate_analysis_report('user_posts.csv')
+        report_file = self.report_generator.generate_analysis_report(self.store.root)
         
         # Show quick analysis
-        self._show_quick_analysis(df)
+        if self.summary.total_posts:
+            with span('quick_analysis'):
+                self._show_quick_analysis(self.summary)
         
         return report_file
     
-    def _show_quick_analysis(self, df):
+    def _show_quick_analysis(self, summary):
         """Show quick analysis of the data"""
         # Create a figure with multiple subplots
         plt.figure(figsize=(15, 10))
         
         # 1. Sentiment Distribution
-        plt.subplot(2, 2, 1)
-        sentiment_counts = df['sentiment'].value_counts()
-        plt.pie(sentiment_counts, labels=sentiment_counts.index, autopct='%1.1f%%',
-                colors=['lightgreen', 'lightcoral'])
-        plt.title('Sentiment Distribution')
+        plot_sentiment_distribution(plt.subplot(2, 2, 1), summary)
         
         # 2. Post Length Distribution
-        plt.subplot(2, 2, 2)
-        df['text_length'] = df['text'].str.len()
-        sns.histplot(data=df, x='text_length', bins=20)
-        plt.title('Post Length Distribution')
+        plot_length_distribution(plt.subplot(2, 2, 2), summary)
         
         # 3. Source Distribution
-        plt.subplot(2, 2, 3)
-        source_counts = df['source'].value_counts()
-        source_counts.plot(kind='bar')
-        plt.title('Posts by Source')
-        plt.xticks(rotation=45)
+        plot_source_distribution(plt.subplot(2, 2, 3), summary)
         
         # 4. Confidence Distribution
-        plt.subplot(2, 2, 4)
-        sns.boxplot(data=df, x='sentiment', y='confidence')
-        plt.title('Confidence by Sentiment')
+        plot_confidence(plt.subplot(2, 2, 4), summary)
         
         plt.tight_layout()
         plt.show()
@@ -97,24 +135,29 @@ class InteractiveAnalyzer:
         # Print detailed statistics
         print("\nDetailed Analysis:")
         print("\n1. Sentiment Analysis:")
-        print(f"Total Posts: {len(df)}")
+        print(f"Total Posts: {summary.total_posts}")
         print("\nSentiment Distribution:")
-        for sentiment, count in sentiment_counts.items():
-            print(f"{sentiment}: {count} posts ({count/len(df)*100:.1f}%)")
+        for sentiment, count, percentage in summary.sentiment_distribution():
+            print(f"{sentiment}: {count} posts ({percentage:.1f}%)")
         
         print("\n2. Source Analysis:")
-        for source, count in source_counts.items():
+        for source, count, _ in summary.source_distribution():
             print(f"{source}: {count} posts")
         
         print("\n3. Confidence Analysis:")
-        print(f"Average Confidence: {df['confidence'].mean():.2f}")
-        print(f"Highest Confidence: {df['confidence'].max():.2f}")
-        print(f"Lowest Confidence: {df['confidence'].min():.2f}")
+        print(f"Average Confidence: {summary.avg_confidence:.2f}")
+        print(f"Highest Confidence: {summary.confidence_max:.2f}")
+        print(f"Lowest Confidence: {summary.confidence_min:.2f}")
         
         print("\n4. Post Length Analysis:")
-        print(f"Average Length: {df['text_length'].mean():.1f} characters")
-        print(f"Shortest Post: {df['text_length'].min()} characters")
-        print(f"Longest Post: {df['text_length'].max()} characters")
+        print(f"Average Length: {summary.avg_length:.1f} characters")
+        print(f"Shortest Post: {summary.length_min} characters")
+        print(f"Longest Post: {summary.length_max} characters")
+        
+        if summary.stress_counts:
+            print("\n5. Stress Categories:")
+            for category, count, percentage, mean_score in summary.stress_distribution():
+                print(f"{category}: {count} posts ({percentage:.1f}%), mean score {mean_score:.2f}")
 
 def main():
     print("Welcome to the Social Media Post Analyzer!")
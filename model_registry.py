@@ -0,0 +1,74 @@
+import gc
+import threading
+from transformers import pipeline
+from inference_backends import DEFAULT_BACKEND, create_backend
+
+DEFAULT_MODEL = "distilbert-base-uncased-finetuned-sst-2-english"
+
+class ModelRegistry:
+    """Process-wide cache of loaded pipelines and inference backends, one instance per key"""
+
+    def __init__(self):
+        self._instances = {}
+        self._load_locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, model_name=DEFAULT_MODEL, task="sentiment-analysis"):
+        """Return the shared pipeline for a model, loading it on first use"""
+        def load():
+            print(f"Loading {task} model {model_name}...")
+            return pipeline(task, model=model_name)
+        return self._get_or_create(('pipeline', task, model_name), load)
+
+    def get_backend(self, model_name=DEFAULT_MODEL, backend=DEFAULT_BACKEND):
+        """Return the shared inference backend (pytorch, quantized, onnx) for a model"""
+        def build():
+            return create_backend(backend, self.get(model_name).model, model_name)
+        return self._get_or_create(('backend', backend, model_name), build)
+
+    def _get_or_create(self, key, factory):
+        loaded = self._instances.get(key)
+        if loaded is not None:
+            return loaded
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Only one thread loads a given model; the others wait and reuse it
+        with load_lock:
+            loaded = self._instances.get(key)
+            if loaded is None:
+                loaded = factory()
+                self._instances[key] = loaded
+        return loaded
+
+    def warm_up(self, model_names=(DEFAULT_MODEL,), task="sentiment-analysis", backend=None):
+        """Load models (and optionally a backend for each) ahead of the first request"""
+        for model_name in model_names:
+            self.get(model_name, task)
+            if backend is not None:
+                self.get_backend(model_name, backend)
+
+    def unload(self, model_name=None, task="sentiment-analysis"):
+        """Drop one model and its backends (or everything when model_name is None) and free memory"""
+        with self._lock:
+            if model_name is None:
+                self._instances.clear()
+            else:
+                for key in list(self._instances):
+                    if key[2] == model_name and (key[0] == 'backend' or key[1] == task):
+                        del self._instances[key]
+        gc.collect()
+
+    def is_loaded(self, model_name=DEFAULT_MODEL, task="sentiment-analysis"):
+        return ('pipeline', task, model_name) in self._instances
+
+registry = ModelRegistry()
+
+def get_pipeline(model_name=DEFAULT_MODEL, task="sentiment-analysis"):
+    """Return the process-wide shared pipeline for a model"""
+    return registry.get(model_name, task)
+
+def get_backend(model_name=DEFAULT_MODEL, backend=DEFAULT_BACKEND):
+    """Return the process-wide shared inference backend for a model"""
+    return registry.get_backend(model_name, backend)
@@ -1,26 +1,54 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox, Toplevel
 import pandas as pd
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from transformers import pipeline
 from datetime import datetime
 import os
+import queue
+import threading
 from fpdf import FPDF
-import seaborn as sns
+from sentiment_engine import SentimentEngine
+from inference_backends import DEFAULT_BACKEND
+from scoring_server import SERVER_URL, ScoringClient
+from result_cache import ResultCache
+from post_store import ScoredPostStore
+from mood_timeline import MoodTimeline
+from post_index import PostIndex
+from analysis_summary import AnalysisSummary
+from profiling import span
+from stress_classifier import load_default_classifier
+from summary_charts import (plot_confidence, plot_length_distribution, plot_source_distribution,
+                            plot_sentiment_distribution, render_charts)
 
 class MoodDetectorGUI:
-    def __init__(self, root):
+    def __init__(self, root, backend=DEFAULT_BACKEND, server_url=SERVER_URL):
         self.root = root
         self.root.title("Mood Detector")
-        self.root.geometry("800x600")
+        self.root.geometry("800x900")
         
-        # Initialize sentiment analyzer
-        self.sentiment_analyzer = pipeline("sentiment-analysis", 
-                                         model="distilbert-base-uncased-finetuned-sst-2-english")
+        # Initialize sentiment analyzer, or share the warm model of a running scoring server
+        if server_url:
+            self.sentiment_engine = ScoringClient(server_url)
+        else:
+            self.sentiment_engine = SentimentEngine(cache=ResultCache(), backend=backend)
+        # A trained stress classifier adds per-category scores next to the sentiment
+        self.stress_classifier = load_default_classifier()
         
         # Store posts
         self.posts = []
+        self.store = ScoredPostStore()
+        self.timeline = MoodTimeline()
+        self.index = PostIndex()
+        # Posts before this index have already been scored
+        self.scored_count = 0
+        self.results = None
+        self.summary = AnalysisSummary()
+        
+        # Background analysis worker and the queue it reports through
+        self.analysis_queue = queue.Queue()
+        self.worker = None
+        self.cancel_event = None
         
         self._create_widgets()
         
@@ -46,7 +74,8 @@ class MoodDetectorGUI:
         ttk.Button(main_frame, text="Add Post", command=self._add_post).grid(row=3, column=0, pady=10)
         
         # Analyze button
-        ttk.Button(main_frame, text="Analyze Posts", command=self._analyze_posts).grid(row=3, column=1, pady=10)
+        self.analyze_button = ttk.Button(main_frame, text="Analyze Posts", command=self._analyze_posts)
+        self.analyze_button.grid(row=3, column=1, pady=10)
         
         # Posts list
         ttk.Label(main_frame, text="Added Posts:").grid(row=4, column=0, sticky=tk.W)
@@ -58,6 +87,44 @@ class MoodDetectorGUI:
         self.status_var.set("Ready")
         ttk.Label(main_frame, textvariable=self.status_var).grid(row=6, column=0, columnspan=2, sticky=tk.W)
         
+        # Progress bar and cancel button
+        self.progress = ttk.Progressbar(main_frame, orient=tk.HORIZONTAL, length=400, mode='determinate')
+        self.progress.grid(row=7, column=0, sticky=tk.W, pady=5)
+        self.cancel_button = ttk.Button(main_frame, text="Cancel", command=self._cancel_analysis)
+        self.cancel_button.grid(row=7, column=1, pady=5)
+        self.cancel_button.state(['disabled'])
+        
+        # Results, filled in as batches finish
+        ttk.Label(main_frame, text="Results:").grid(row=8, column=0, sticky=tk.W)
+        self.results_tree = ttk.Treeview(main_frame, columns=('source', 'sentiment', 'confidence', 'stress', 'post'),
+                                         show='headings', height=8)
+        for column, heading, width in [('source', 'Source', 90), ('sentiment', 'Sentiment', 90),
+                                       ('confidence', 'Confidence', 80), ('stress', 'Stress', 130),
+                                       ('post', 'Post', 340)]:
+            self.results_tree.heading(column, text=heading)
+            self.results_tree.column(column, width=width)
+        self.results_tree.grid(row=9, column=0, columnspan=2, pady=5)
+        
+        # Search over every scored post in the index
+        search_frame = ttk.Frame(main_frame)
+        search_frame.grid(row=10, column=0, columnspan=2, sticky=tk.W, pady=5)
+        ttk.Label(search_frame, text="Search:").grid(row=0, column=0)
+        self.search_var = tk.StringVar()
+        search_entry = ttk.Entry(search_frame, textvariable=self.search_var, width=22)
+        search_entry.grid(row=0, column=1, padx=2)
+        search_entry.bind('<Return>', lambda event: self._search_posts())
+        self.search_sentiment = ttk.Combobox(search_frame, values=['Any', 'POSITIVE', 'NEGATIVE'],
+                                             width=10, state='readonly')
+        self.search_sentiment.grid(row=0, column=2, padx=2)
+        self.search_sentiment.set('Any')
+        self.search_filters = {}
+        for column, (name, width) in enumerate([('Subreddit', 10), ('From', 8), ('To', 8)], start=3):
+            ttk.Label(search_frame, text=f"{name}:").grid(row=0, column=2 * column - 3, padx=2)
+            self.search_filters[name] = tk.StringVar()
+            ttk.Entry(search_frame, textvariable=self.search_filters[name], width=width).grid(
+                row=0, column=2 * column - 2)
+        ttk.Button(search_frame, text="Search", command=self._search_posts).grid(row=0, column=9, padx=5)
+        
     def _add_post(self):
         post = self.post_text.get("1.0", tk.END).strip()
         source = self.source_var.get()
@@ -81,41 +148,174 @@ class MoodDetectorGUI:
         if not self.posts:
             messagebox.showwarning("Warning", "Please add some posts first!")
             return
+        if self.worker is not None and self.worker.is_alive():
+            messagebox.showinfo("Info", "An analysis is already running.")
+            return
             
+        # Only posts added since the last run are scored
+        new_posts = self.posts[self.scored_count:]
+        self.progress['maximum'] = max(len(new_posts), 1)
+        self.progress['value'] = 0
+        self.analyze_button.state(['disabled'])
+        self.cancel_button.state(['!disabled'])
+        self.status_var.set(f"Analyzing {len(new_posts)} new posts...")
+        
+        # Score on a background thread and poll its queue from the Tk event loop
+        self.cancel_event = threading.Event()
+        self.worker = threading.Thread(target=self._analysis_worker, name='analysis',
+                                       args=(new_posts, self.results, self.summary, self.cancel_event), daemon=True)
+        self.worker.start()
+        self.root.after(100, self._poll_analysis)
+        
+    def _cancel_analysis(self):
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+            self.cancel_button.state(['disabled'])
+            self.status_var.set("Cancelling after the current batch...")
+        
+    def _analysis_worker(self, new_posts, previous_results, summary, cancel_event):
+        """Score posts off the Tk thread and send progress, partial results and the outcome to the queue"""
+        with span('analyze_posts', posts=len(new_posts)):
+            self._run_analysis(new_posts, previous_results, summary, cancel_event)
+        
+    def _run_analysis(self, new_posts, previous_results, summary, cancel_event):
         try:
-            self.status_var.set("Analyzing posts...")
-            self.root.update()
-            
-            # Analyze sentiments
-            df = pd.DataFrame(self.posts)
-            sentiments = []
-            confidence_scores = []
-            
-            for post in df['text']:
-                result = self.sentiment_analyzer(post)[0]
-                sentiments.append(result['label'])
-                confidence_scores.append(result['score'])
-            
-            df['sentiment'] = sentiments
-            df['confidence'] = confidence_scores
+            scored = []
+            step = self.sentiment_engine.batch_size
+            for start in range(0, len(new_posts), step):
+                if cancel_event.is_set():
+                    break
+                chunk = pd.DataFrame(new_posts[start:start + step])
+                with span('score', posts=len(chunk)):
+                    chunk['sentiment'], chunk['confidence'] = self.sentiment_engine.analyze(chunk['text'])
+                if self.stress_classifier is not None:
+                    with span('stress', posts=len(chunk)):
+                        self.stress_classifier.score_frame(chunk)
+                scored.append(chunk)
+                summary = summary.merge(AnalysisSummary.from_frame(chunk))
+                self.analysis_queue.put(('partial', chunk))
             
-            # Save analyzed data
-            df.to_csv('user_posts.csv', index=False)
+            # Keep whatever was scored, even when the run was cancelled
+            df_new = pd.concat(scored, ignore_index=True) if scored else pd.DataFrame()
+            if previous_results is None:
+                df = df_new
+            else:
+                df = pd.concat([previous_results, df_new], ignore_index=True)
+            with span('store_append', posts=len(df_new)):
+                self.store.append(df_new)
+            # Stored posts count as scored even if a later step fails, so a retry never stores them twice
+            self.analysis_queue.put(('stored', df_new, df, summary))
+            if not df_new.empty:
+                with span('timeline_add'):
+                    self.timeline.add(df_new)
+                with span('index_add'):
+                    self.index.add(df_new)
             
-            # Generate PDF report
-            self._generate_pdf_report(df)
+            if cancel_event.is_set() or df.empty:
+                self.analysis_queue.put(('cancelled', df_new, summary))
+                return
             
+            # Generate PDF report and chart images; neither touches pyplot, so both run here
+            with span('pdf_report'):
+                self._generate_pdf_report(summary)
+            with span('charts'):
+                self._save_visualizations(summary)
+            self.analysis_queue.put(('done', df_new, summary))
+        except Exception as e:
+            self.analysis_queue.put(('error', str(e)))
+        
+    def _poll_analysis(self):
+        """Apply worker messages on the Tk thread until the worker reports its outcome"""
+        try:
+            while True:
+                message = self.analysis_queue.get_nowait()
+                if message[0] == 'partial':
+                    self._show_partial_results(message[1])
+                elif message[0] == 'stored':
+                    self._mark_stored(message[1], message[2], message[3])
+                elif message[0] == 'error':
+                    self._reset_analysis_controls()
+                    self.status_var.set("Error during analysis!")
+                    messagebox.showerror("Error", f"An error occurred: {message[1]}")
+                    return
+                else:
+                    self._finish_analysis(message[1], message[2], cancelled=message[0] == 'cancelled')
+                    return
+        except queue.Empty:
+            pass
+        self.root.after(100, self._poll_analysis)
+        
+    def _show_partial_results(self, chunk):
+        if 'stress' in chunk:
+            stress = [f"{category} ({score:.2f})" for category, score in zip(chunk['stress'], chunk['stress_confidence'])]
+        else:
+            stress = [""] * len(chunk)
+        for row, row_stress in zip(chunk.itertuples(index=False), stress):
+            self.results_tree.insert('', tk.END, values=(row.source, row.sentiment,
+                                                         f"{row.confidence:.2f}", row_stress, row.text))
+        self.progress['value'] += len(chunk)
+        self.status_var.set(f"Analyzed {int(self.progress['value'])} of {int(self.progress['maximum'])} new posts...")
+        
+    def _mark_stored(self, df_new, df, summary):
+        self.scored_count += len(df_new)
+        if not df.empty:
+            self.results = df
+            self.summary = summary
+        
+    def _finish_analysis(self, df_new, summary, cancelled):
+        self._reset_analysis_controls()
+        
+        if cancelled:
+            self.status_var.set(f"Analysis cancelled after {len(df_new)} posts.")
+            return
+        
+        try:
             self.status_var.set("Analysis complete! Report generated.")
             messagebox.showinfo("Success", "Analysis complete! Report generated.\nCharts and report will be shown in a new window.")
             
             # Show charts and report in GUI
-            self._show_charts_and_report(df)
+            self._show_charts_and_report(summary)
             
         except Exception as e:
             self.status_var.set("Error during analysis!")
             messagebox.showerror("Error", f"An error occurred: {str(e)}")
+        
+    def _reset_analysis_controls(self):
+        self.analyze_button.state(['!disabled'])
+        self.cancel_button.state(['disabled'])
+        self.cancel_event = None
+    
+    def _search_posts(self):
+        """Show indexed posts matching the search box and filters in a new window"""
+        sentiment = self.search_sentiment.get()
+        filters = {name: var.get().strip() or None for name, var in self.search_filters.items()}
+        try:
+            started = datetime.now()
+            results = self.index.search(self.search_var.get(), None if sentiment == 'Any' else sentiment,
+                                        filters['Subreddit'], filters['From'], filters['To'], limit=200)
+            elapsed = (datetime.now() - started).total_seconds() * 1000
+        except ValueError as e:
+            messagebox.showerror("Error", f"Invalid search: {e}")
+            return
+        
+        window = Toplevel(self.root)
+        window.title(f"Search: {self.search_var.get()}")
+        window.geometry("900x450")
+        shown = f"showing the first {len(results.posts)}" if results.total > len(results.posts) else "all shown"
+        ttk.Label(window, text=f"{results.total} matching posts in {elapsed:.0f} ms ({shown})").pack(anchor=tk.W, padx=10, pady=5)
+        tree = ttk.Treeview(window, columns=('month', 'subreddit', 'sentiment', 'confidence', 'post'),
+                            show='headings')
+        for column, heading, width in [('month', 'Month', 70), ('subreddit', 'Subreddit', 100),
+                                       ('sentiment', 'Sentiment', 90), ('confidence', 'Confidence', 80),
+                                       ('post', 'Post', 540)]:
+            tree.heading(column, text=heading)
+            tree.column(column, width=width)
+        for row in results.posts.itertuples(index=False):
+            tree.insert('', tk.END, values=(row.month, row.subreddit, row.sentiment,
+                                            f"{row.confidence:.2f}", row.snippet.replace("\n", " ")))
+        tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
     
-    def _generate_pdf_report(self, df):
+    def _generate_pdf_report(self, summary):
         # Create PDF
         pdf = FPDF()
         pdf.add_page()
@@ -129,18 +329,16 @@ class MoodDetectorGUI:
         pdf.set_font('Arial', 'B', 14)
         pdf.cell(0, 10, 'Summary Statistics', 0, 1)
         pdf.set_font('Arial', '', 12)
-        pdf.cell(0, 10, f'Total Posts Analyzed: {len(df)}', 0, 1)
-        pdf.cell(0, 10, f'Average Post Length: {df["text"].str.len().mean():.1f} characters', 0, 1)
-        pdf.cell(0, 10, f'Average Confidence: {df["confidence"].mean():.2f}', 0, 1)
+        pdf.cell(0, 10, f'Total Posts Analyzed: {summary.total_posts}', 0, 1)
+        pdf.cell(0, 10, f'Average Post Length: {summary.avg_length:.1f} characters', 0, 1)
+        pdf.cell(0, 10, f'Average Confidence: {summary.avg_confidence:.2f}', 0, 1)
         pdf.ln(10)
         
         # Sentiment Analysis
         pdf.set_font('Arial', 'B', 14)
         pdf.cell(0, 10, 'Sentiment Analysis', 0, 1)
         pdf.set_font('Arial', '', 12)
-        sentiment_counts = df['sentiment'].value_counts()
-        for sentiment, count in sentiment_counts.items():
-            percentage = (count / len(df)) * 100
+        for sentiment, count, percentage in summary.sentiment_distribution():
             pdf.cell(0, 10, f'{sentiment}: {count} posts ({percentage:.1f}%)', 0, 1)
         pdf.ln(10)
         
@@ -148,68 +346,38 @@ class MoodDetectorGUI:
         pdf.set_font('Arial', 'B', 14)
         pdf.cell(0, 10, 'Source Analysis', 0, 1)
         pdf.set_font('Arial', '', 12)
-        source_counts = df['source'].value_counts()
-        for source, count in source_counts.items():
-            percentage = (count / len(df)) * 100
+        for source, count, percentage in summary.source_distribution():
             pdf.cell(0, 10, f'{source}: {count} posts ({percentage:.1f}%)', 0, 1)
         pdf.ln(10)
         
+        # Stress Categories
+        if summary.stress_counts:
+            pdf.set_font('Arial', 'B', 14)
+            pdf.cell(0, 10, 'Stress Categories', 0, 1)
+            pdf.set_font('Arial', '', 12)
+            for category, count, percentage, mean_score in summary.stress_distribution():
+                pdf.cell(0, 10, f'{category}: {count} posts ({percentage:.1f}%), mean score {mean_score:.2f}', 0, 1)
+            pdf.ln(10)
+        
         # Sample Posts
         pdf.set_font('Arial', 'B', 14)
         pdf.cell(0, 10, 'Sample Posts', 0, 1)
         pdf.set_font('Arial', '', 12)
-        for _, row in df.head().iterrows():
+        for row in summary.samples:
             pdf.multi_cell(0, 10, f"Source: {row['source']}\nPost: {row['text']}\nSentiment: {row['sentiment']} (Confidence: {row['confidence']:.2f})\n")
             pdf.ln(5)
         
         # Save PDF
         report_time = datetime.now().strftime("%Y%m%d_%H%M%S")
         report_file = f'mood_analysis_report_{report_time}.pdf'
-        pdf.output(report_file)
-        
-        # Generate and save visualizations
-        self._save_visualizations(df)
+        with span('pdf_output'):
+            pdf.output(report_file)
         
-    def _save_visualizations(self, df):
-        # Create reports directory if it doesn't exist
-        if not os.path.exists('reports'):
-            os.makedirs('reports')
-            
-        # 1. Sentiment Distribution
-        plt.figure(figsize=(6, 4))
-        sentiment_counts = df['sentiment'].value_counts()
-        plt.pie(sentiment_counts, labels=sentiment_counts.index, autopct='%1.1f%%',
-                colors=['lightgreen', 'lightcoral'])
-        plt.title('Sentiment Distribution')
-        plt.savefig('reports/sentiment_distribution.png')
-        plt.close()
-        
-        # 2. Post Length Distribution
-        plt.figure(figsize=(6, 4))
-        df['text_length'] = df['text'].str.len()
-        sns.histplot(data=df, x='text_length', bins=20)
-        plt.title('Post Length Distribution')
-        plt.savefig('reports/post_length_distribution.png')
-        plt.close()
-        
-        # 3. Source Distribution
-        plt.figure(figsize=(6, 4))
-        source_counts = df['source'].value_counts()
-        source_counts.plot(kind='bar')
-        plt.title('Posts by Source')
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        plt.savefig('reports/source_distribution.png')
-        plt.close()
-        
-        # 4. Confidence Analysis
-        plt.figure(figsize=(6, 4))
-        sns.boxplot(data=df, x='sentiment', y='confidence')
-        plt.title('Confidence by Sentiment')
-        plt.savefig('reports/confidence_analysis.png')
-        plt.close()
+    def _save_visualizations(self, summary):
+        # Smaller than the HTML report's charts, so kept apart to keep both fingerprint caches warm
+        return render_charts(summary, os.path.join('reports', 'gui'), figsize=(6, 4))
 
-    def _show_charts_and_report(self, df):
+    def _show_charts_and_report(self, summary):
         # Create a new window
         win = Toplevel(self.root)
         win.title("Analysis Charts and Report")
@@ -224,37 +392,33 @@ class MoodDetectorGUI:
         notebook.add(charts_frame, text="Charts")
         
         # Sentiment Distribution
-        fig1, ax1 = plt.subplots(figsize=(5, 4))
-        sentiment_counts = df['sentiment'].value_counts()
-        ax1.pie(sentiment_counts, labels=sentiment_counts.index, autopct='%1.1f%%', colors=['lightgreen', 'lightcoral'])
-        ax1.set_title('Sentiment Distribution')
+        fig1 = Figure(figsize=(5, 4))
+        ax1 = fig1.add_subplot()
+        plot_sentiment_distribution(ax1, summary)
         canvas1 = FigureCanvasTkAgg(fig1, master=charts_frame)
         canvas1.draw()
         canvas1.get_tk_widget().grid(row=0, column=0, padx=10, pady=10)
         
         # Post Length Distribution
-        fig2, ax2 = plt.subplots(figsize=(5, 4))
-        df['text_length'] = df['text'].str.len()
-        sns.histplot(data=df, x='text_length', bins=20, ax=ax2)
-        ax2.set_title('Post Length Distribution')
+        fig2 = Figure(figsize=(5, 4))
+        ax2 = fig2.add_subplot()
+        plot_length_distribution(ax2, summary)
         canvas2 = FigureCanvasTkAgg(fig2, master=charts_frame)
         canvas2.draw()
         canvas2.get_tk_widget().grid(row=0, column=1, padx=10, pady=10)
         
         # Source Distribution
-        fig3, ax3 = plt.subplots(figsize=(5, 4))
-        source_counts = df['source'].value_counts()
-        source_counts.plot(kind='bar', ax=ax3)
-        ax3.set_title('Posts by Source')
-        ax3.set_xticklabels(ax3.get_xticklabels(), rotation=45)
+        fig3 = Figure(figsize=(5, 4))
+        ax3 = fig3.add_subplot()
+        plot_source_distribution(ax3, summary)
         canvas3 = FigureCanvasTkAgg(fig3, master=charts_frame)
         canvas3.draw()
         canvas3.get_tk_widget().grid(row=1, column=0, padx=10, pady=10)
         
         # Confidence Analysis
-        fig4, ax4 = plt.subplots(figsize=(5, 4))
-        sns.boxplot(data=df, x='sentiment', y='confidence', ax=ax4)
-        ax4.set_title('Confidence by Sentiment')
+        fig4 = Figure(figsize=(5, 4))
+        ax4 = fig4.add_subplot()
+        plot_confidence(ax4, summary)
         canvas4 = FigureCanvasTkAgg(fig4, master=charts_frame)
         canvas4.draw()
         canvas4.get_tk_widget().grid(row=1, column=1, padx=10, pady=10)
@@ -267,28 +431,24 @@ class MoodDetectorGUI:
         report_text.pack(fill='both', expand=True, padx=10, pady=10)
         
         # Fill report summary
-        total_posts = len(df)
-        avg_length = df['text'].str.len().mean()
-        avg_confidence = df['confidence'].mean()
-        sentiment_dist = df['sentiment'].value_counts()
-        source_dist = df['source'].value_counts()
-        
         report_text.insert(tk.END, f"Mood Detection Analysis Report\n")
         report_text.insert(tk.END, f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
         report_text.insert(tk.END, f"Summary Statistics\n-------------------\n")
-        report_text.insert(tk.END, f"Total Posts Analyzed: {total_posts}\n")
-        report_text.insert(tk.END, f"Average Post Length: {avg_length:.1f} characters\n")
-        report_text.insert(tk.END, f"Average Confidence: {avg_confidence:.2f}\n\n")
+        report_text.insert(tk.END, f"Total Posts Analyzed: {summary.total_posts}\n")
+        report_text.insert(tk.END, f"Average Post Length: {summary.avg_length:.1f} characters\n")
+        report_text.insert(tk.END, f"Average Confidence: {summary.avg_confidence:.2f}\n\n")
         report_text.insert(tk.END, f"Sentiment Analysis\n------------------\n")
-        for sentiment, count in sentiment_dist.items():
-            percentage = (count / total_posts) * 100
+        for sentiment, count, percentage in summary.sentiment_distribution():
             report_text.insert(tk.END, f"{sentiment}: {count} posts ({percentage:.1f}%)\n")
         report_text.insert(tk.END, "\nSource Analysis\n---------------\n")
-        for source, count in source_dist.items():
-            percentage = (count / total_posts) * 100
+        for source, count, percentage in summary.source_distribution():
             report_text.insert(tk.END, f"{source}: {count} posts ({percentage:.1f}%)\n")
+        if summary.stress_counts:
+            report_text.insert(tk.END, "\nStress Categories\n-----------------\n")
+            for category, count, percentage, mean_score in summary.stress_distribution():
+                report_text.insert(tk.END, f"{category}: {count} posts ({percentage:.1f}%), mean score {mean_score:.2f}\n")
         report_text.insert(tk.END, "\nSample Posts\n------------\n")
-        for _, row in df.head().iterrows():
+        for row in summary.samples:
             report_text.insert(tk.END, f"Source: {row['source']}\nPost: {row['text']}\nSentiment: {row['sentiment']} (Confidence: {row['confidence']:.2f})\n{'-'*40}\n")
         report_text.configure(state='disabled')
 
@@ -0,0 +1,193 @@
+import argparse
+import sqlite3
+import threading
+import time
+import pandas as pd
+
+GRANULARITIES = ['day', 'week', 'month']
+
+def post_times(df):
+    """UTC post times from created_utc (epoch seconds) or, failing that, the timestamp column"""
+    if 'created_utc' in df:
+        return pd.to_datetime(pd.to_numeric(df['created_utc'], errors='coerce'), unit='s', utc=True)
+    return pd.to_datetime(df['timestamp'], errors='coerce', utc=True, format='mixed')
+
+def communities(df):
+    """Lowercase subreddit for Reddit posts, the source platform for posts entered by hand
+
+    The timeline and the search index both key posts by this name, so filters match in either.
+    """
+    if 'subreddit' in df:
+        names = df['subreddit']
+    elif 'source' in df:
+        names = df['source']
+    else:
+        return pd.Series("", index=df.index)
+    return names.astype(object).fillna("").astype(str).str.lower()
+
+class MoodTimeline:
+    """Per-day, per-week and per-month sentiment counts by subreddit, kept up to date incrementally"""
+
+    def __init__(self, path='mood_timeline.db'):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        # Buckets are named by their first day (ISO date), so date ranges compare as strings
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS rollups (
+                granularity TEXT NOT NULL,
+                bucket TEXT NOT NULL,
+                subreddit TEXT NOT NULL,
+                sentiment TEXT NOT NULL,
+                posts INTEGER NOT NULL,
+                confidence_sum REAL NOT NULL,
+                PRIMARY KEY (granularity, bucket, subreddit, sentiment)
+            )
+        """)
+        # Batches already counted, so re-scoring a month does not count it twice
+        self._conn.execute("CREATE TABLE IF NOT EXISTS batches (batch_id TEXT PRIMARY KEY, posts INTEGER NOT NULL)")
+        self._conn.commit()
+
+    def add(self, df, batch_id=None):
+        """Fold scored posts into the rollups; returns False if batch_id was already added"""
+        times = post_times(df)
+        frame = pd.DataFrame({
+            'day': times.dt.floor('D'),
+            'subreddit': communities(df).to_numpy(),
+            'sentiment': df['sentiment'].astype(str).to_numpy(),
+            'confidence': df['confidence'].astype(float).to_numpy()
+        }).dropna(subset=['day'])
+
+        rows = []
+        buckets = {
+            'day': frame['day'],
+            'week': frame['day'] - pd.to_timedelta(frame['day'].dt.weekday, unit='D'),
+            'month': frame['day'] - pd.to_timedelta(frame['day'].dt.day - 1, unit='D')
+        }
+        for granularity, bucket in buckets.items():
+            grouped = frame.assign(bucket=bucket.dt.strftime('%Y-%m-%d')).groupby(
+                ['bucket', 'subreddit', 'sentiment'], sort=False)['confidence'].agg(['size', 'sum'])
+            rows.extend((granularity, bucket, subreddit, sentiment, int(posts), float(confidence_sum))
+                        for (bucket, subreddit, sentiment), (posts, confidence_sum) in zip(
+                            grouped.index, grouped.itertuples(index=False)))
+
+        with self._lock:
+            if batch_id is not None:
+                try:
+                    self._conn.execute("INSERT INTO batches (batch_id, posts) VALUES (?, ?)", (batch_id, len(frame)))
+                except sqlite3.IntegrityError:
+                    return False
+            self._conn.executemany("""
+                INSERT INTO rollups (granularity, bucket, subreddit, sentiment, posts, confidence_sum)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (granularity, bucket, subreddit, sentiment) DO UPDATE SET
+                    posts = posts + excluded.posts,
+                    confidence_sum = confidence_sum + excluded.confidence_sum
+            """, rows)
+            self._conn.commit()
+        return True
+
+    def query(self, start=None, end=None, granularity='day', subreddit=None):
+        """Sentiment counts per bucket for buckets starting within [start, end] (ISO dates)"""
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity '{granularity}', expected one of {', '.join(GRANULARITIES)}")
+        conditions = ["granularity = ?"]
+        params = [granularity]
+        if start is not None:
+            conditions.append("bucket >= ?")
+            params.append(str(pd.Timestamp(start).date()))
+        if end is not None:
+            conditions.append("bucket <= ?")
+            params.append(str(pd.Timestamp(end).date()))
+        if subreddit is not None:
+            conditions.append("subreddit = ?")
+            params.append(subreddit.lower())
+
+        with self._lock:
+            rows = self._conn.execute(f"""
+                SELECT bucket, sentiment, SUM(posts), SUM(confidence_sum) FROM rollups
+                WHERE {' AND '.join(conditions)}
+                GROUP BY bucket, sentiment ORDER BY bucket
+            """, params).fetchall()
+        return self._to_frame(rows)
+
+    def by_subreddit(self, start=None, end=None):
+        """Sentiment counts per subreddit over a date range, largest first"""
+        conditions = ["granularity = 'month'"]
+        params = []
+        if start is not None:
+            conditions.append("bucket >= ?")
+            params.append(str(pd.Timestamp(start).to_period('M').start_time.date()))
+        if end is not None:
+            conditions.append("bucket <= ?")
+            params.append(str(pd.Timestamp(end).date()))
+        with self._lock:
+            rows = self._conn.execute(f"""
+                SELECT subreddit, sentiment, SUM(posts), SUM(confidence_sum) FROM rollups
+                WHERE {' AND '.join(conditions)}
+                GROUP BY subreddit, sentiment
+            """, params).fetchall()
+        frame = self._to_frame(rows).rename(columns={'bucket': 'subreddit'})
+        return frame.sort_values('posts', ascending=False, ignore_index=True)
+
+    def subreddits(self):
+        with self._lock:
+            return [row[0] for row in self._conn.execute(
+                "SELECT DISTINCT subreddit FROM rollups ORDER BY subreddit")]
+
+    def __len__(self):
+        """Number of posts counted"""
+        with self._lock:
+            total = self._conn.execute(
+                "SELECT SUM(posts) FROM rollups WHERE granularity = 'month'").fetchone()[0]
+        return total or 0
+
+    def close(self):
+        self._conn.close()
+
+    def _to_frame(self, rows):
+        """One row per bucket: a count column per sentiment plus totals, shares and mean confidence"""
+        if not rows:
+            return pd.DataFrame(columns=['bucket', 'posts', 'negative_share', 'avg_confidence'])
+        long = pd.DataFrame(rows, columns=['bucket', 'sentiment', 'posts', 'confidence_sum'])
+        frame = long.pivot(index='bucket', columns='sentiment', values='posts').fillna(0).astype(int)
+        frame.columns.name = None
+        frame['posts'] = long.groupby('bucket')['posts'].sum()
+        frame['negative_share'] = frame.get('NEGATIVE', 0) / frame['posts']
+        frame['avg_confidence'] = long.groupby('bucket')['confidence_sum'].sum() / frame['posts']
+        return frame.reset_index()
+
+def backfill(scores_file, path='mood_timeline.db', chunksize=50000):
+    """Load an existing parallel_scoring CSV into the timeline, skipping chunks already added"""
+    timeline = MoodTimeline(path)
+    added = 0
+    reader = pd.read_csv(scores_file, usecols=lambda column: column in
+                         ['created_utc', 'timestamp', 'subreddit', 'source', 'sentiment', 'confidence'],
+                         chunksize=chunksize)
+    for i, chunk in enumerate(reader):
+        if timeline.add(chunk, batch_id=f"{scores_file}:{i * chunksize}:{len(chunk)}"):
+            added += len(chunk)
+    print(f"Added {added} posts; the timeline now covers {len(timeline)} posts")
+    return timeline
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the mood timeline")
+    parser.add_argument('--backfill', metavar='SCORES_CSV', help="add a parallel_scoring output file")
+    parser.add_argument('--timeline', default='mood_timeline.db')
+    parser.add_argument('--granularity', choices=GRANULARITIES, default='month')
+    parser.add_argument('--start', default=None)
+    parser.add_argument('--end', default=None)
+    parser.add_argument('--subreddit', default=None)
+    args = parser.parse_args()
+
+    if args.backfill:
+        backfill(args.backfill, args.timeline)
+    timeline = MoodTimeline(args.timeline)
+    started = time.perf_counter()
+    trend = timeline.query(args.start, args.end, args.granularity, args.subreddit)
+    elapsed = (time.perf_counter() - started) * 1000
+    print(trend.to_string(index=False))
+    print(f"\n{len(trend)} buckets in {elapsed:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+import argparse
+import hashlib
+import re
+import time
+import zlib
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from reddit_corpus import RedditCorpus, post_text
+
+
+# Shingles permuted together, bounding the temporary (num_perm x shingles) matrix
+SIGNATURE_BLOCK = 50000
+
+WORD_PATTERN = re.compile(r"\w+")
+
+def exact_key(text):
+    """Hex digest of the text with case and whitespace collapsed, the id of its exact-duplicate cluster"""
+    normalized = " ".join(text.lower().split())
+    return hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).hexdigest()
+
+def choose_bands(threshold, num_perm):
+    """Bands x rows splitting the signature so LSH catches pairs down to roughly threshold
+
+    Candidates are verified against the threshold afterwards, so the banding errs towards recall.
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if (1 / bands) ** (1 / rows) <= threshold:
+            best = (bands, rows)
+    return best
+
+class DuplicateIndex:
+    """Exact and near-duplicate clusters over a stream of posts, via MinHash signatures and LSH banding
+
+    The first post of each cluster is its representative; later posts join the first
+    representative whose estimated Jaccard similarity reaches threshold. Posts with fewer
+    than shingle_size words (emoticons, punctuation, one-word replies) get no signature
+    and only cluster with exact repeats, since a single shingle says little about sentiment.
+
+    With max_clusters set, the least recently seen clusters are forgotten past that many,
+    together with their exact keys, signature and band entries, and on_evict (when set) is
+    called with each forgotten cluster key. Unbounded, every distinct post keeps an exact
+    key and every representative a num_perm x 4 byte signature plus one entry per band.
+    """
+
+    def __init__(self, threshold=0.8, num_perm=128, shingle_size=3, seed=1, max_clusters=None):
+        self.threshold = threshold
+        self.max_clusters = max_clusters
+        self.on_evict = None
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = choose_bands(threshold, num_perm)
+        # Multiply-add-shift hash functions ((a * h + b) mod 2**64) >> 32 over 32-bit shingle
+        # hashes; cheaper than reducing modulo a prime and just as universal
+        generator = np.random.RandomState(seed)
+        self._a = generator.randint(0, 1 << 64, size=num_perm, dtype=np.uint64)[:, None] | np.uint64(1)
+        self._b = generator.randint(0, 1 << 64, size=num_perm, dtype=np.uint64)[:, None]
+        self._exact = {}
+        self._tables = [{} for _ in range(self.bands)]
+        self._signatures = {}
+        # Cluster key -> exact keys of its members, least recently seen first
+        self._clusters = OrderedDict()
+        self.posts = 0
+        self.exact_duplicates = 0
+        self.near_duplicates = 0
+
+    def assign(self, texts):
+        """Cluster key and duplicate kind ('', 'exact' or 'near') for each text, in order"""
+        texts = [text if isinstance(text, str) else "" for text in texts]
+        keys = [exact_key(text) for text in texts]
+        clusters = [None] * len(texts)
+        kinds = [''] * len(texts)
+
+        # Exact repeats never need a signature
+        fresh = []
+        first_in_batch = {}
+        for i, key in enumerate(keys):
+            if key in self._exact:
+                clusters[i], kinds[i] = self._exact[key], 'exact'
+            elif key in first_in_batch:
+                clusters[i], kinds[i] = first_in_batch[key], 'exact'
+            else:
+                first_in_batch[key] = None
+                fresh.append(i)
+
+        # Too few words for a meaningful signature: these only ever match exact repeats
+        words = {i: self._words(texts[i]) for i in fresh}
+        signed = [i for i in fresh if len(words[i]) >= self.shingle_size]
+        signatures = dict(zip(signed, self._minhash([self._shingles(words[i]) for i in signed])))
+        for i in fresh:
+            signature = signatures.get(i)
+            cluster = None if signature is None else self._match(signature)
+            if cluster is not None:
+                kinds[i] = 'near'
+            else:
+                cluster = keys[i]
+                if signature is not None:
+                    self._insert(cluster, signature)
+            clusters[i] = cluster
+            self._exact[keys[i]] = cluster
+            self._clusters.setdefault(cluster, []).append(keys[i])
+            first_in_batch[keys[i]] = cluster
+        for i, key in enumerate(keys):
+            if clusters[i] is None:
+                clusters[i] = first_in_batch[key]
+        for cluster in clusters:
+            self._clusters.move_to_end(cluster)
+        if self.max_clusters is not None:
+            while len(self._clusters) > self.max_clusters:
+                self._evict(*self._clusters.popitem(last=False))
+
+        self.posts += len(texts)
+        self.exact_duplicates += kinds.count('exact')
+        self.near_duplicates += kinds.count('near')
+        return clusters, kinds
+
+    def signatures(self, texts):
+        """MinHash signatures (uint32, one row per text) over word shingles"""
+        return self._minhash([self._shingles(self._words(text)) for text in texts])
+
+    def _minhash(self, shingles):
+        """MinHash signatures for lists of shingle hashes, permuted in bounded blocks"""
+        signatures = np.empty((len(shingles), self.num_perm), dtype=np.uint32)
+        start = 0
+        while start < len(shingles):
+            # Group texts until the block holds SIGNATURE_BLOCK shingles
+            stop, size = start, 0
+            while stop < len(shingles) and (stop == start or size + len(shingles[stop]) <= SIGNATURE_BLOCK):
+                size += len(shingles[stop])
+                stop += 1
+            hashes = np.concatenate(shingles[start:stop])
+            permuted = self._a * hashes[None, :]
+            permuted += self._b
+            permuted >>= np.uint64(32)
+            offsets = np.cumsum([0] + [len(s) for s in shingles[start:stop - 1]])
+            signatures[start:stop] = np.minimum.reduceat(permuted, offsets, axis=1).T
+            start = stop
+        return signatures
+
+    def stats(self):
+        duplicates = self.exact_duplicates + self.near_duplicates
+        return {
+            'posts': self.posts,
+            'representatives': self.posts - duplicates,
+            'exact_duplicates': self.exact_duplicates,
+            'near_duplicates': self.near_duplicates,
+            'saved_share': duplicates / self.posts if self.posts else 0.0
+        }
+
+    def _words(self, text):
+        return WORD_PATTERN.findall(text.lower())
+
+    def _shingles(self, words):
+        size = self.shingle_size
+        grams = [" ".join(words[i:i + size]) for i in range(max(len(words) - size + 1, 1))]
+        return np.unique(np.fromiter((zlib.crc32(gram.encode('utf-8')) for gram in grams),
+                                     dtype=np.uint64, count=len(grams)))
+
+    def _band_keys(self, signature):
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def _match(self, signature):
+        candidates = []
+        for table, key in zip(self._tables, self._band_keys(signature)):
+            cluster = table.get(key)
+            if cluster is not None and cluster not in candidates:
+                candidates.append(cluster)
+        for cluster in candidates:
+            if np.mean(self._signatures[cluster] == signature) >= self.threshold:
+                return cluster
+        return None
+
+    def _evict(self, cluster, members):
+        """Forget one cluster: its members' exact keys, its signature and the band entries it owns"""
+        for key in members:
+            self._exact.pop(key, None)
+        signature = self._signatures.pop(cluster, None)
+        if signature is not None:
+            for table, key in zip(self._tables, self._band_keys(signature)):
+                if table.get(key) == cluster:
+                    del table[key]
+        if self.on_evict is not None:
+            self.on_evict(cluster)
+
+    def _insert(self, cluster, signature):
+        self._signatures[cluster] = signature
+        for table, key in zip(self._tables, self._band_keys(signature)):
+            table.setdefault(key, cluster)
+
+class DeduplicatingScorer:
+    """Scores one representative per duplicate cluster and fans its result out to the other members"""
+
+    def __init__(self, engine, index=None, max_results=100000):
+        self.engine = engine
+        self.max_results = max_results
+        # Results of representatives, reused for later members of their cluster. Least recently
+        # used clusters are dropped past max_results and rescored from the next member seen
+        self._results = OrderedDict()
+        if index is None:
+            # The index forgets clusters on the same budget and drops their results with them
+            index = DuplicateIndex(max_clusters=max_results)
+            index.on_evict = self._forget
+        self.index = index
+
+    @property
+    def cache(self):
+        return getattr(self.engine, 'cache', None)
+
+    def analyze(self, texts):
+        """Score an iterable of texts and return (labels, scores) in input order"""
+        labels, scores, _, _ = self.analyze_clusters(texts)
+        return labels, scores
+
+    def analyze_clusters(self, texts):
+        """(labels, scores, cluster keys, duplicate kinds) in input order"""
+        texts = [text if isinstance(text, str) else "" for text in texts]
+        clusters, kinds = self.index.assign(texts)
+        pending = {}
+        for i, cluster in enumerate(clusters):
+            if cluster in self._results:
+                self._results.move_to_end(cluster)
+            else:
+                pending.setdefault(cluster, i)
+        batch_results = {cluster: self._results[cluster] for cluster in clusters if cluster not in pending}
+        if pending:
+            labels, scores = self.engine.analyze([texts[i] for i in pending.values()])
+            batch_results.update(zip(pending, zip(labels, scores)))
+            self._results.update((cluster, batch_results[cluster]) for cluster in pending)
+            while len(self._results) > self.max_results:
+                self._results.popitem(last=False)
+        results = [batch_results[cluster] for cluster in clusters]
+        return [label for label, _ in results], [score for _, score in results], clusters, kinds
+
+    def _forget(self, cluster):
+        self._results.pop(cluster, None)
+
+    def analyze_frame(self, df, text_column='text'):
+        """Add sentiment, confidence, cluster and duplicate columns to a DataFrame of posts"""
+        df['sentiment'], df['confidence'], df['cluster'], df['duplicate'] = self.analyze_clusters(df[text_column])
+        return df
+
+def main():
+    parser = argparse.ArgumentParser(description="Count exact and near-duplicate posts in the Reddit corpus")
+    parser.add_argument('--threshold', type=float, default=0.8)
+    parser.add_argument('--num-perm', type=int, default=128)
+    parser.add_argument('--examples', type=int, default=5)
+    args = parser.parse_args()
+
+    index = DuplicateIndex(args.threshold, args.num_perm)
+    print(f"Banding {index.num_perm} hashes as {index.bands} bands of {index.rows} rows")
+    started = time.perf_counter()
+    examples = []
+    representatives = {}
+    for chunk in RedditCorpus().iter_chunks(50000):
+        texts = post_text(chunk).tolist()
+        clusters, kinds = index.assign(texts)
+        for text, cluster, kind in zip(texts, clusters, kinds):
+            if kind == '':
+                representatives[cluster] = text
+            elif kind == 'near' and len(examples) < args.examples:
+                examples.append((representatives.get(cluster, ""), text))
+    elapsed = time.perf_counter() - started
+
+    stats = index.stats()
+    print(f"{stats['posts']} posts, {stats['representatives']} to score: {stats['exact_duplicates']} exact "
+          f"and {stats['near_duplicates']} near duplicates ({stats['saved_share'] * 100:.1f}% of model calls saved)")
+    print(f"Clustered in {elapsed:.1f}s")
+    for representative, duplicate in examples:
+        print(f"\n- {representative[:150]!r}\n+ {duplicate[:150]!r}")
+
+if __name__ == "__main__":
+    main()
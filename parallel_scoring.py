@@ -0,0 +1,207 @@
+import argparse
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+import torch
+from model_registry import DEFAULT_MODEL
+from mood_timeline import MoodTimeline
+from near_duplicates import DuplicateIndex
+from post_index import PostIndex
+from reddit_corpus import RedditCorpus, post_text
+from result_cache import ResultCache
+from sentiment_engine import REDUCERS, SentimentEngine
+from stand_in_model import build_stand_in_analyzer
+from stress_classifier import DEFAULT_STRESS_MODEL_PATH, load_default_classifier
+
+Shard = namedtuple('Shard', ['index', 'corpus_file', 'start', 'nrows'])
+
+# Per-process engine, created once by the pool initializer
+_engine = None
+
+def count_rows(corpus_file):
+    """Count data rows in one file (multi-line selftext rules out counting lines)"""
+    return sum(len(chunk) for chunk in pd.read_csv(
+        corpus_file.path, usecols=['author'], chunksize=50000, encoding_errors='replace'))
+
+def make_shards(files, rows_per_shard=5000):
+    """Split files into row ranges so large months spread across workers"""
+    shards = []
+    for corpus_file in files:
+        rows = count_rows(corpus_file)
+        for start in range(0, max(rows, 1), rows_per_shard):
+            shards.append(Shard(len(shards), corpus_file, start, min(rows_per_shard, rows - start)))
+    return shards
+
+def _init_worker(model_name, num_threads, cache_path=None, stand_in=False):
+    """Give each worker its own engine, result cache connection and a fixed share of the CPU cores"""
+    global _engine
+    torch.set_num_threads(num_threads)
+    analyzer = build_stand_in_analyzer() if stand_in else None
+    _engine = SentimentEngine(model_name, analyzer=analyzer, cache=ResultCache(cache_path) if cache_path else None)
+
+def plan_duplicates(files, rows_per_shard=5000, threshold=0.8):
+    """Cluster the corpus in shard order; returns (cluster keys, duplicate kinds) per shard
+
+    Representatives are always the first post of their cluster in corpus order, so they are
+    scored in the same or an earlier shard than their duplicates.
+    """
+    index = DuplicateIndex(threshold)
+    plans = []
+    for corpus_file in files:
+        # Chunks of rows_per_shard rows line up with the shards make_shards cut from this file
+        chunks = list(RedditCorpus().read_file(corpus_file, chunksize=rows_per_shard)) or [None]
+        for chunk in chunks:
+            plans.append(index.assign(post_text(chunk).tolist()) if chunk is not None else ([], []))
+    stats = index.stats()
+    print(f"Deduplication: {stats['exact_duplicates']} exact and {stats['near_duplicates']} near duplicates; "
+          f"{stats['representatives']} of {stats['posts']} posts need the model")
+    return plans
+
+def _score_shard(shard, reducer=None, skip=None):
+    """Score one row range, except rows flagged in skip, and return it with its timing"""
+    started = time.perf_counter()
+    chunk = next(RedditCorpus().read_file(
+        shard.corpus_file, chunksize=max(shard.nrows, 1), skiprows=shard.start, nrows=shard.nrows), None)
+    if chunk is None:
+        return shard.index, None, 0, 0.0
+    texts = post_text(chunk)
+    scored = slice(None) if skip is None else ~skip
+    if reducer is None:
+        labels, scores = _engine.analyze(texts[scored])
+    else:
+        # Long-document mode scores every window of long selftext instead of truncating
+        labels, scores = _engine.analyze_long(texts[scored], reducer)
+    chunk['sentiment'] = None
+    chunk['confidence'] = float('nan')
+    chunk.loc[scored, 'sentiment'] = labels
+    chunk.loc[scored, 'confidence'] = scores
+    return shard.index, chunk, len(chunk), time.perf_counter() - started
+
+def _fan_out(chunk, plan, results, needed):
+    """Fill the skipped duplicate rows of a shard from their representatives' results"""
+    clusters, kinds = plan
+    chunk['cluster'] = clusters
+    chunk['duplicate'] = kinds
+    is_duplicate = chunk['duplicate'] != ''
+    representatives = chunk[~is_duplicate]
+    results.update((cluster, result) for cluster, result in zip(
+        representatives['cluster'], zip(representatives['sentiment'], representatives['confidence']))
+        if cluster in needed)
+    filled = [results[cluster] for cluster in chunk.loc[is_duplicate, 'cluster']]
+    chunk.loc[is_duplicate, 'sentiment'] = [label for label, _ in filled]
+    chunk.loc[is_duplicate, 'confidence'] = [score for _, score in filled]
+
+def score_corpus(output='reddit_scores.csv', workers=None, rows_per_shard=5000,
+                 model_name=DEFAULT_MODEL, files=None, reducer=None, timeline='mood_timeline.db',
+                 dedup_threshold=None, post_index='post_index.db', stress_model=DEFAULT_STRESS_MODEL_PATH,
+                 cache='sentiment_cache.db', stand_in=False):
+    """Score the raw Reddit corpus on a process pool and write results in corpus order
+
+    With dedup_threshold, exact and near-duplicate posts are not scored but take the
+    result of the first post of their cluster. With a trained stress_model, every post
+    also gets its stress category scores. Workers share the result cache at cache, so
+    posts scored by any earlier run are not scored again.
+    """
+    workers = workers or os.cpu_count() or 1
+    # Split the cores between workers instead of letting every process use all of them
+    num_threads = max(1, (os.cpu_count() or 1) // workers)
+    files = RedditCorpus().discover() if files is None else files
+
+    shards = make_shards(files, rows_per_shard)
+    print(f"Scoring {len(files)} files as {len(shards)} shards on {workers} workers "
+          f"({num_threads} threads each)...")
+
+    plans = plan_duplicates(files, rows_per_shard, dedup_threshold) if dedup_threshold else None
+    # Results are kept only for representatives that have duplicates
+    results = {}
+    needed = set() if plans is None else {cluster for clusters, kinds in plans
+                                          for cluster, kind in zip(clusters, kinds) if kind}
+
+    # Rollups are keyed by shard, so re-scoring a month does not count its posts twice
+    mood_timeline = MoodTimeline(timeline) if timeline else None
+    search_index = PostIndex(post_index) if post_index else None
+    # The linear stress model is cheap enough to run here as shards are written
+    stress_classifier = load_default_classifier(stress_model) if stress_model else None
+    started = time.perf_counter()
+    total_rows = 0
+    finished = {}
+    next_index = 0
+    header = True
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(model_name, num_threads, cache, stand_in)) as executor:
+            futures = [executor.submit(_score_shard, shard, reducer,
+                                       None if plans is None else np.array(plans[shard.index][1]) != '')
+                       for shard in shards]
+            for future in as_completed(futures):
+                index, chunk, rows, elapsed = future.result()
+                shard = shards[index]
+                rate = rows / elapsed if elapsed else 0.0
+                print(f"Shard {index} ({os.path.basename(shard.corpus_file.path)} rows "
+                      f"{shard.start}-{shard.start + rows}): {rows} posts in {elapsed:.1f}s "
+                      f"({rate:.1f} posts/sec)")
+                finished[index] = chunk
+
+                # Write completed shards strictly in shard order so output is deterministic
+                # (and every duplicate's representative has been scored by the time it is written)
+                while next_index in finished:
+                    ready = finished.pop(next_index)
+                    if ready is not None:
+                        if plans is not None:
+                            _fan_out(ready, plans[next_index], results, needed)
+                        ready_shard = shards[next_index]
+                        batch_id = f"{ready_shard.corpus_file.path}:{ready_shard.start}:{len(ready)}"
+                        if stress_classifier is not None:
+                            ready['text'] = post_text(ready)
+                            stress_classifier.score_frame(ready)
+                            del ready['text']
+                        if mood_timeline is not None:
+                            mood_timeline.add(ready, batch_id=batch_id)
+                        if search_index is not None:
+                            search_index.add(ready, batch_id=batch_id)
+                        ready.to_csv(output, mode='w' if header else 'a', header=header, index=False)
+                        header = False
+                        total_rows += len(ready)
+                    next_index += 1
+    finally:
+        if mood_timeline is not None:
+            mood_timeline.close()
+        if search_index is not None:
+            search_index.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"\nScored {total_rows} posts in {elapsed:.1f}s "
+          f"({total_rows / elapsed if elapsed else 0.0:.1f} posts/sec)")
+    print(f"Results saved to {output}")
+    return output
+
+def main():
+    parser = argparse.ArgumentParser(description="Score the raw Reddit corpus on all CPU cores")
+    parser.add_argument('--output', default='reddit_scores.csv')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--rows-per-shard', type=int, default=5000)
+    parser.add_argument('--model', default=DEFAULT_MODEL)
+    parser.add_argument('--timeline', default='mood_timeline.db',
+                        help="timeline database to update (empty string to skip)")
+    parser.add_argument('--index', default='post_index.db',
+                        help="search index to update (empty string to skip)")
+    parser.add_argument('--long-reducer', choices=sorted(REDUCERS), default=None,
+                        help="score long posts over overlapping windows reduced this way")
+    parser.add_argument('--dedup', type=float, nargs='?', const=0.8, default=None, metavar='THRESHOLD',
+                        help="score one post per cluster of duplicates (MinHash Jaccard threshold, default 0.8)")
+    parser.add_argument('--stress-model', default=DEFAULT_STRESS_MODEL_PATH,
+                        help="trained stress classifier to add category scores with (empty string to skip)")
+    parser.add_argument('--cache', default='sentiment_cache.db',
+                        help="result cache shared by the workers (empty string to skip)")
+    parser.add_argument('--stand-in', action='store_true',
+                        help="score with a deterministic local model instead of downloading DistilBERT")
+    args = parser.parse_args()
+    score_corpus(args.output, args.workers, args.rows_per_shard, 'stand-in' if args.stand_in else args.model,
+                 reducer=args.long_reducer, timeline=args.timeline, dedup_threshold=args.dedup, post_index=args.index,
+                 stress_model=args.stress_model, cache=args.cache, stand_in=args.stand_in)
+
+if __name__ == "__main__":
+    main()
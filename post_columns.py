@@ -0,0 +1,239 @@
+from bisect import bisect_right
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+POST_FIELDS = ('text', 'source', 'timestamp')
+
+# Stored in the timestamp column for posts without a usable time
+MISSING_TIME = np.iinfo(np.int64).min
+
+# Appended texts are packed into an Arrow chunk once this many accumulate
+TEXT_CHUNK_ROWS = 4096
+
+def to_epoch_us(timestamp):
+    """Microseconds since the epoch for a datetime, ISO string or epoch seconds (naive times kept as given)"""
+    if timestamp is None or (isinstance(timestamp, float) and np.isnan(timestamp)):
+        return MISSING_TIME
+    if isinstance(timestamp, (int, float, np.integer, np.floating)):
+        return int(timestamp * 1_000_000)
+    if not isinstance(timestamp, datetime):
+        try:
+            timestamp = datetime.fromisoformat(str(timestamp))
+        except ValueError:
+            return MISSING_TIME
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    delta = timestamp - datetime(1970, 1, 1)
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+class PostRecord:
+    """Read-only dict-like view of one post in a ColumnarPosts store"""
+    __slots__ = ('_posts', '_index')
+
+    def __init__(self, posts, index):
+        self._posts = posts
+        self._index = index
+
+    def __getitem__(self, key):
+        posts = self._posts
+        if key == 'text':
+            return posts._text(self._index)
+        if key == 'source':
+            return posts._categories[posts._source_codes[self._index]]
+        if key == 'timestamp':
+            value = int(posts._timestamps[self._index])
+            if value == MISSING_TIME:
+                return None
+            return pd.Timestamp(value, unit='us').to_pydatetime().isoformat()
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        return self[key] if key in POST_FIELDS else default
+
+    def keys(self):
+        return POST_FIELDS
+
+    def to_dict(self):
+        return {field: self[field] for field in POST_FIELDS}
+
+    def __repr__(self):
+        return f"PostRecord({self.to_dict()!r})"
+
+class ColumnarPosts:
+    """Posts held column by column: UTF-8 Arrow text chunks, interned source codes and int64 epoch-microsecond times"""
+
+    def __init__(self, capacity=1024):
+        # Packed text chunks, the row each starts at, and recent appends not yet packed
+        self._text_chunks = []
+        self._chunk_starts = []
+        self._pending_texts = []
+        # Source names are interned: each distinct name is stored once and posts hold a small code
+        self._categories = []
+        self._codes = {}
+        self._source_codes = np.empty(capacity, dtype=np.int32)
+        self._timestamps = np.empty(capacity, dtype=np.int64)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._slice(*index.indices(self._size))
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("post index out of range")
+        return PostRecord(self, index)
+
+    def __iter__(self):
+        for index in range(self._size):
+            yield PostRecord(self, index)
+
+    def append(self, text, source, timestamp):
+        """Add one post; timestamp may be a datetime, ISO string or epoch seconds"""
+        self._reserve(self._size + 1)
+        self._pending_texts.append(text)
+        self._source_codes[self._size] = self._code(source)
+        self._timestamps[self._size] = to_epoch_us(timestamp)
+        # The row must be counted before packing, which locates pending texts from the size
+        self._size += 1
+        if len(self._pending_texts) >= TEXT_CHUNK_ROWS:
+            self._pack_texts()
+
+    def extend_frame(self, df):
+        """Append every row of a DataFrame in bulk
+
+        Only the text, source and timestamp columns are kept; a missing source column
+        means "manual" and a missing timestamp column means no usable times.
+        """
+        if df.empty:
+            return
+        source = df['source'] if 'source' in df else pd.Series(None, index=df.index, dtype=object)
+        sources = pd.Categorical(source.fillna("manual").astype(str))
+        remap = np.array([self._code(source) for source in sources.categories], dtype=np.int32)
+        timestamp = df['timestamp'] if 'timestamp' in df else pd.Series(None, index=df.index, dtype=object)
+        epoch_us = self._epoch_us(timestamp)
+
+        start, end = self._size, self._size + len(df)
+        self._reserve(end)
+        self._pack_texts()
+        self._chunk_starts.append(start)
+        self._text_chunks.append(pa.array(df['text'], type=pa.large_string(), from_pandas=True))
+        self._source_codes[start:end] = remap[sources.codes]
+        # NaT is already the int64 minimum, the same sentinel as MISSING_TIME
+        self._timestamps[start:end] = epoch_us
+        self._size = end
+
+    @staticmethod
+    def _epoch_us(timestamp):
+        """Bulk to_epoch_us(): numbers are epoch seconds, anything else is parsed as a date"""
+        if pd.api.types.is_numeric_dtype(timestamp) and not pd.api.types.is_bool_dtype(timestamp):
+            numeric = timestamp.notna()
+        elif timestamp.dtype == object:
+            numeric = timestamp.map(lambda value: isinstance(value, (int, float, np.integer, np.floating))
+                                    and not isinstance(value, (bool, np.bool_)) and value == value)
+        else:
+            numeric = pd.Series(False, index=timestamp.index)
+        times = pd.to_datetime(timestamp.where(~numeric), errors='coerce', format='mixed')
+        if getattr(times.dt, 'tz', None) is not None:
+            times = times.dt.tz_convert('UTC').dt.tz_localize(None)
+        epoch_us = times.to_numpy(dtype='datetime64[us]').view(np.int64)
+        if numeric.any():
+            epoch_us = epoch_us.copy()
+            seconds = pd.to_numeric(timestamp[numeric]).to_numpy(dtype=np.float64)
+            epoch_us[numeric.to_numpy()] = (seconds * 1_000_000).astype(np.int64)
+        return epoch_us
+
+    def to_frame(self):
+        """DataFrame whose text and source columns view the stored buffers instead of copying
+
+        Timestamps come back as ISO strings (None when missing), as the list of dicts held them.
+        """
+        self._pack_texts()
+        texts = pa.chunked_array(self._text_chunks, type=pa.large_string())
+        return pd.DataFrame({
+            'text': pd.Series(pd.arrays.ArrowStringArray(texts)),
+            'source': pd.Categorical.from_codes(self._source_codes[:self._size], categories=self._categories_index()),
+            'timestamp': self._iso_timestamps()
+        }, copy=False)
+
+    def _iso_timestamps(self):
+        """Stored times formatted like datetime.isoformat(), in bulk"""
+        values = self._timestamps[:self._size]
+        times = values.view('datetime64[us]')
+        # isoformat() only shows microseconds when there are some
+        whole = values % 1_000_000 == 0
+        iso = np.where(whole, np.datetime_as_string(times, unit='s'),
+                       np.datetime_as_string(times, unit='us')).astype(object)
+        iso[values == MISSING_TIME] = None
+        return iso
+
+    def records(self):
+        """Plain dicts, as DataCollector.posts used to hold"""
+        return [record.to_dict() for record in self]
+
+    def memory_usage(self):
+        """Bytes held by the packed columns"""
+        return (sum(chunk.nbytes for chunk in self._text_chunks) + self._source_codes.nbytes
+                + self._timestamps.nbytes)
+
+    def _slice(self, start, stop, step):
+        """Snapshot of a range of posts with its own copy of the interned sources"""
+        self._pack_texts()
+        part = ColumnarPosts(capacity=0)
+        # Appending to the slice may intern new sources, which must not leak into this store
+        part._categories = list(self._categories)
+        part._codes = dict(self._codes)
+        # Explicit row numbers, since a negative step's stop of -1 would mean the last row to numpy
+        rows = np.arange(start, stop, step, dtype=np.int64)
+        part._source_codes = self._source_codes[rows]
+        part._timestamps = self._timestamps[rows]
+        part._size = len(rows)
+        if part._size:
+            texts = pa.chunked_array(self._text_chunks, type=pa.large_string())
+            if step == 1:
+                part._text_chunks = texts.slice(start, stop - start).chunks
+            else:
+                part._text_chunks = texts.take(pa.array(rows)).chunks
+            part._chunk_starts = np.cumsum([0] + [len(chunk) for chunk in part._text_chunks[:-1]]).tolist()
+        return part
+
+    def _text(self, index):
+        """Text of one post, from the pending list or its packed chunk"""
+        packed = self._size - len(self._pending_texts)
+        if index >= packed:
+            return self._pending_texts[index - packed]
+        chunk = bisect_right(self._chunk_starts, index) - 1
+        return self._text_chunks[chunk][index - self._chunk_starts[chunk]].as_py()
+
+    def _pack_texts(self):
+        """Move pending appended texts into a UTF-8 Arrow chunk"""
+        if self._pending_texts:
+            self._chunk_starts.append(self._size - len(self._pending_texts))
+            self._text_chunks.append(pa.array(self._pending_texts, type=pa.large_string(), from_pandas=True))
+            self._pending_texts = []
+
+    def _categories_index(self):
+        return pd.Index(self._categories, dtype=object)
+
+    def _code(self, source):
+        code = self._codes.get(source)
+        if code is None:
+            code = len(self._categories)
+            self._codes[source] = code
+            self._categories.append(source)
+        return code
+
+    def _reserve(self, size):
+        """Grow the arrays geometrically so appends stay amortized O(1)"""
+        capacity = len(self._source_codes)
+        if size <= capacity:
+            return
+        capacity = max(size, capacity * 2, 1024)
+        for name in ['_source_codes', '_timestamps']:
+            grown = np.empty(capacity, dtype=getattr(self, name).dtype)
+            grown[:self._size] = getattr(self, name)[:self._size]
+            setattr(self, name, grown)
@@ -0,0 +1,236 @@
+import argparse
+import re
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+from mood_timeline import communities, post_times
+
+WORD_PATTERN = re.compile(r"\w+")
+
+# Characters of each post kept for result listings
+SNIPPET_CHARS = 200
+
+# Posting segments per term before they are merged into one
+MAX_SEGMENTS = 32
+
+# Pinned rather than stopword_set(), which switches to NLTK's list where its corpus is
+# installed; an index built in one environment must tokenize queries the same way in another
+STOPWORDS = frozenset(ENGLISH_STOP_WORDS)
+
+SearchResults = namedtuple('SearchResults', ['total', 'posts'])
+
+def index_terms(text):
+    """Distinct lowercase words of a text, without stopwords"""
+    return {word for word in WORD_PATTERN.findall(text.lower()) if word not in STOPWORDS}
+
+def _month_number(month, end=False):
+    """'2020' or '2020-03' as 202001 / 202003 (a bare year ends in December when end is set)"""
+    text = str(month)
+    if re.fullmatch(r'\d{4}', text):
+        return int(text) * 100 + (12 if end else 1)
+    period = pd.Period(text, freq='M')
+    return period.year * 100 + period.month
+
+class PostIndex:
+    """On-disk inverted index over post text with sentiment, confidence, subreddit and month filters
+
+    Each add() writes one posting segment per term; segments are merged every MAX_SEGMENTS adds.
+    """
+
+    def __init__(self, path='post_index.db'):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS posts (
+                doc_id INTEGER PRIMARY KEY,
+                subreddit TEXT NOT NULL,
+                month INTEGER NOT NULL,
+                sentiment TEXT NOT NULL,
+                confidence REAL NOT NULL,
+                title TEXT NOT NULL,
+                snippet TEXT NOT NULL
+            );
+            -- Sorted int32 doc ids; a term has one row per segment until they are merged
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL,
+                segment INTEGER NOT NULL,
+                docs BLOB NOT NULL,
+                PRIMARY KEY (term, segment)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS batches (batch_id TEXT PRIMARY KEY, posts INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS segments (segment INTEGER PRIMARY KEY);
+        """)
+        self._conn.commit()
+        # Filter columns of every post, loaded on the first query after a change
+        self._fields = None
+
+    def add(self, df, batch_id=None):
+        """Index scored posts (title/selftext or text columns); returns False if batch_id was already added"""
+        if 'title' in df:
+            titles = df['title'].fillna("").astype(str)
+            texts = titles + "\n\n" + df['selftext'].fillna("").astype(str) if 'selftext' in df else titles
+        else:
+            texts = df['text'].astype(object).fillna("").astype(str)
+            titles = texts.str.split("\n", n=1).str[0]
+        times = post_times(df)
+        months = (times.dt.year * 100 + times.dt.month).fillna(0).astype(int).to_numpy()
+        # Lowercased so subreddit filters ignore case, as in the timeline
+        subreddits = communities(df).to_numpy()
+        sentiments = df['sentiment'].astype(str).to_numpy()
+        confidences = df['confidence'].astype(float).to_numpy()
+
+        with self._lock:
+            if batch_id is not None:
+                try:
+                    self._conn.execute("INSERT INTO batches (batch_id, posts) VALUES (?, ?)", (batch_id, len(df)))
+                except sqlite3.IntegrityError:
+                    return False
+            first = (self._conn.execute("SELECT MAX(doc_id) FROM posts").fetchone()[0] or 0) + 1
+            doc_ids = range(first, first + len(df))
+            self._conn.executemany(
+                "INSERT INTO posts (doc_id, subreddit, month, sentiment, confidence, title, snippet) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                zip(doc_ids, subreddits, months.tolist(), sentiments, confidences.tolist(),
+                    titles.str.slice(0, SNIPPET_CHARS), texts.str.slice(0, SNIPPET_CHARS)))
+
+            postings = {}
+            for doc_id, text in zip(doc_ids, texts):
+                for term in index_terms(text):
+                    postings.setdefault(term, []).append(doc_id)
+            segment = self._conn.execute("INSERT INTO segments DEFAULT VALUES").lastrowid
+            self._conn.executemany("INSERT INTO postings (term, segment, docs) VALUES (?, ?, ?)",
+                                   ((term, segment, np.array(docs, dtype=np.int32).tobytes())
+                                    for term, docs in postings.items()))
+            if self._conn.execute("SELECT COUNT(*) FROM segments").fetchone()[0] >= MAX_SEGMENTS:
+                self._merge_segments()
+            self._conn.commit()
+            self._fields = None
+        return True
+
+    def search(self, query="", sentiment=None, subreddit=None, start=None, end=None,
+               min_confidence=None, limit=50):
+        """Posts containing every word of query that pass the filters, in indexing order
+
+        A blank query matches every post; one made only of stopwords matches none.
+        start and end are months ('2020-03') or years ('2020'), both inclusive.
+        """
+        with self._lock:
+            fields = self._load_fields()
+            terms = index_terms(query)
+            if terms or not query.strip():
+                doc_ids = self._matching_docs(terms, fields['doc_id'])
+            else:
+                doc_ids = np.empty(0, dtype=np.int32)
+            mask = np.ones(len(doc_ids), dtype=bool)
+            rows = np.searchsorted(fields['doc_id'], doc_ids)
+            if sentiment is not None:
+                mask &= fields['sentiment'][rows] == sentiment.upper()
+            if subreddit is not None:
+                mask &= fields['subreddit'][rows] == subreddit.lower()
+            if start is not None:
+                mask &= fields['month'][rows] >= _month_number(start)
+            if end is not None:
+                mask &= fields['month'][rows] <= _month_number(end, end=True)
+            if min_confidence is not None:
+                mask &= fields['confidence'][rows] >= min_confidence
+            matches = doc_ids[mask]
+
+            shown = matches[:limit].tolist()
+            posts = pd.read_sql_query(
+                f"SELECT doc_id, subreddit, month, sentiment, confidence, title, snippet FROM posts "
+                f"WHERE doc_id IN ({','.join('?' * len(shown))}) ORDER BY doc_id", self._conn, params=shown)
+        posts['month'] = [f"{month // 100}-{month % 100:02d}" if month else "" for month in posts['month']]
+        return SearchResults(len(matches), posts)
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+    def _matching_docs(self, terms, all_docs):
+        """Sorted doc ids containing every term (every post when there are none)"""
+        if not terms:
+            return all_docs
+        lists = []
+        for term in terms:
+            blobs = self._conn.execute(
+                "SELECT docs FROM postings WHERE term = ? ORDER BY segment", (term,)).fetchall()
+            if not blobs:
+                return np.empty(0, dtype=np.int32)
+            lists.append(np.concatenate([np.frombuffer(blob, dtype=np.int32) for blob, in blobs]))
+        # Intersect the rarest terms first so the candidate set shrinks quickly
+        lists.sort(key=len)
+        docs = lists[0]
+        for other in lists[1:]:
+            docs = np.intersect1d(docs, other, assume_unique=True)
+        return docs
+
+    def _load_fields(self):
+        if self._fields is None:
+            rows = self._conn.execute(
+                "SELECT doc_id, sentiment, subreddit, month, confidence FROM posts ORDER BY doc_id").fetchall()
+            columns = list(zip(*rows)) or [[], [], [], [], []]
+            self._fields = {
+                'doc_id': np.array(columns[0], dtype=np.int32),
+                'sentiment': np.array(columns[1], dtype=object),
+                'subreddit': np.array(columns[2], dtype=object),
+                'month': np.array(columns[3], dtype=np.int32),
+                'confidence': np.array(columns[4], dtype=np.float32)
+            }
+        return self._fields
+
+    def _merge_segments(self):
+        """Rewrite every term's postings as a single segment"""
+        merged = {}
+        for term, blob in self._conn.execute("SELECT term, docs FROM postings ORDER BY term, segment"):
+            merged.setdefault(term, []).append(blob)
+        self._conn.execute("DELETE FROM postings")
+        self._conn.execute("DELETE FROM segments")
+        segment = self._conn.execute("INSERT INTO segments DEFAULT VALUES").lastrowid
+        self._conn.executemany("INSERT INTO postings (term, segment, docs) VALUES (?, ?, ?)",
+                               ((term, segment, b"".join(blobs)) for term, blobs in merged.items()))
+
+def backfill(scores_file, path='post_index.db', chunksize=50000):
+    """Index an existing parallel_scoring CSV, skipping chunks already added"""
+    index = PostIndex(path)
+    added = 0
+    for i, chunk in enumerate(pd.read_csv(scores_file, chunksize=chunksize, keep_default_na=False,
+                                          na_values={'created_utc': [''], 'confidence': ['']})):
+        if index.add(chunk, batch_id=f"{scores_file}:{i * chunksize}:{len(chunk)}"):
+            added += len(chunk)
+    print(f"Indexed {added} posts; the index now holds {len(index)} posts")
+    return index
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or search the post index")
+    parser.add_argument('query', nargs='?', default="", help="words every matching post contains")
+    parser.add_argument('--backfill', metavar='SCORES_CSV', help="add a parallel_scoring output file")
+    parser.add_argument('--index', default='post_index.db')
+    parser.add_argument('--sentiment', default=None)
+    parser.add_argument('--subreddit', default=None)
+    parser.add_argument('--start', default=None, help="first month (2020-03) or year (2020)")
+    parser.add_argument('--end', default=None, help="last month or year")
+    parser.add_argument('--min-confidence', type=float, default=None)
+    parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    if args.backfill:
+        backfill(args.backfill, args.index)
+    index = PostIndex(args.index)
+    started = time.perf_counter()
+    results = index.search(args.query, args.sentiment, args.subreddit, args.start, args.end,
+                           args.min_confidence, args.limit)
+    elapsed = (time.perf_counter() - started) * 1000
+    if len(results.posts):
+        print(results.posts[['month', 'subreddit', 'sentiment', 'confidence', 'title']].to_string(index=False))
+    print(f"\n{results.total} matching posts in {elapsed:.1f} ms")
+
+if __name__ == "__main__":
+    main()
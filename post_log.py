@@ -0,0 +1,172 @@
+import gzip
+import io
+import json
+import os
+import zlib
+
+# Compression picked from the file extension when none is given
+EXTENSIONS = {'.gz': 'gzip', '.zst': 'zstd'}
+COMPRESSIONS = [None, 'gzip', 'zstd']
+
+def detect_compression(path):
+    return EXTENSIONS.get(os.path.splitext(path)[1])
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstd compressed post logs need zstandard (pip install zstandard)")
+    return zstandard
+
+class PostLog:
+    """Append-only JSON Lines file of posts, optionally gzip or zstd compressed"""
+
+    def __init__(self, path, compression='auto', flush_every=1):
+        if compression == 'auto':
+            compression = detect_compression(path)
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression '{compression}', expected gzip, zstd or None")
+        self.path = path
+        self.compression = compression
+        # Lines written since the last flush; 1 means every post reaches the OS before append returns
+        self.flush_every = flush_every
+        self.skipped = 0
+        self._writer = None
+        self._raw = None
+        self._pending = 0
+
+    def append(self, record):
+        """Write one post as a single line; cost does not depend on the size of the log"""
+        if self._writer is None:
+            self._open_writer()
+        self._writer.write(json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n')
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def flush(self):
+        if self._writer is None:
+            return
+        if self.compression == 'zstd':
+            self._writer.flush(_zstandard().FLUSH_BLOCK)
+        else:
+            self._writer.flush()
+        if self._raw is not None:
+            self._raw.flush()
+        self._pending = 0
+
+    def close(self):
+        """Flush and finish the compressed stream; the log can be reopened for more appends"""
+        if self._writer is None:
+            return
+        self._writer.close()
+        if self._raw is not None:
+            self._raw.close()
+        self._writer = self._raw = None
+        self._pending = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __iter__(self):
+        """Yield posts lazily, skipping a torn final line and any line that is not valid JSON"""
+        self.skipped = 0
+        if not os.path.exists(self.path):
+            return
+        for line, complete in self._lines():
+            if not complete:
+                self.skipped += 1
+                break
+            try:
+                yield json.loads(line)
+            except ValueError:
+                self.skipped += 1
+
+    def iter_chunks(self, size=100000):
+        """Yield lists of at most size posts"""
+        chunk = []
+        for record in self:
+            chunk.append(record)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def recover(self):
+        """Drop a partial last line left by a crash so new appends start on a clean line
+
+        Plain logs only read their tail; compressed logs are scanned once and rewritten if torn
+        """
+        if not os.path.exists(self.path):
+            return 0
+        if self.compression is None:
+            return self._truncate_partial_line()
+        truncated = False
+        for _, complete in self._lines():
+            truncated = not complete
+        if not truncated:
+            return 0
+        # A compressed stream cannot be cut in place, so rewrite the readable posts
+        temp_path = self.path + '.tmp'
+        recovered = PostLog(temp_path, self.compression, flush_every=10000)
+        with recovered:
+            recovered.extend(record for record in PostLog(self.path, self.compression))
+        os.replace(temp_path, self.path)
+        return 1
+
+    def _open_writer(self):
+        self.recover()
+        if self.compression == 'gzip':
+            # Each session adds a gzip member; readers see the members as one stream
+            self._writer = gzip.open(self.path, 'ab')
+        elif self.compression == 'zstd':
+            self._raw = open(self.path, 'ab')
+            self._writer = _zstandard().ZstdCompressor().stream_writer(self._raw, closefd=False)
+        else:
+            self._writer = open(self.path, 'ab')
+
+    def _truncate_partial_line(self):
+        """Cut a plain log back to its last newline; only the tail is read"""
+        with open(self.path, 'rb+') as f:
+            end = f.seek(0, os.SEEK_END)
+            position = end
+            while position > 0:
+                start = max(0, position - 65536)
+                f.seek(start)
+                block = f.read(position - start)
+                newline = block.rfind(b'\n')
+                if newline >= 0:
+                    position = start + newline + 1
+                    break
+                position = start
+            if position == end:
+                return 0
+            f.truncate(position)
+            return 1
+
+    def _lines(self):
+        """(line, complete) pairs; a truncated compressed stream ends like a torn line"""
+        truncation_errors = (EOFError, zlib.error, gzip.BadGzipFile)
+        if self.compression == 'gzip':
+            stream = gzip.open(self.path, 'rb')
+        elif self.compression == 'zstd':
+            zstandard = _zstandard()
+            truncation_errors += (zstandard.ZstdError,)
+            stream = io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(
+                open(self.path, 'rb'), read_across_frames=True))
+        else:
+            stream = open(self.path, 'rb')
+        with stream:
+            try:
+                for line in stream:
+                    yield line, line.endswith(b'\n')
+            except truncation_errors:
+                yield b'', False
@@ -0,0 +1,88 @@
+import json
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from analysis_summary import AnalysisSummary
+
+# Low-cardinality text columns stored dictionary-encoded
+CATEGORICAL_COLUMNS = ['source', 'sentiment', 'subreddit', 'duplicate', 'stress']
+
+class ScoredPostStore:
+    """Append-only directory of compressed Parquet segments holding scored posts"""
+
+    def __init__(self, root='scored_posts'):
+        self.root = root
+        if not os.path.exists(self.root):
+            os.makedirs(self.root)
+
+    def segments(self):
+        """Segment files in the order they were appended"""
+        return sorted(os.path.join(self.root, name) for name in os.listdir(self.root)
+                      if name.startswith('segment_') and name.endswith('.parquet'))
+
+    def append(self, df):
+        """Write a DataFrame of scored posts as a new segment"""
+        if df.empty:
+            return None
+        table = self._to_table(df)
+        existing = self.segments()
+        next_id = int(os.path.basename(existing[-1])[8:-8]) + 1 if existing else 0
+        path = os.path.join(self.root, f'segment_{next_id:06d}.parquet')
+
+        # Readers never see a half-written segment
+        temp_path = path + '.tmp'
+        pq.write_table(table, temp_path, compression='zstd')
+        os.replace(temp_path, path)
+        self._save_summary(self.summary(exclude=path).merge(AnalysisSummary.from_frame(df)), self.segments())
+        return path
+
+    def summary(self, exclude=None):
+        """Report statistics for every stored post, rebuilt from the segments if missing or stale"""
+        segments = [path for path in self.segments() if path != exclude]
+        summary_file = os.path.join(self.root, 'summary.json')
+        if os.path.exists(summary_file):
+            with open(summary_file, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            if saved['segments'] == len(segments):
+                return AnalysisSummary.from_dict(saved['summary'])
+
+        return AnalysisSummary.from_chunks(pq.read_table(path, memory_map=True).to_pandas() for path in segments)
+
+    def read(self, columns=None):
+        """Read the selected columns from every segment as one DataFrame"""
+        tables = [pq.read_table(path, columns=columns, memory_map=True) for path in self.segments()]
+        if not tables:
+            return pd.DataFrame(columns=columns or [])
+        return pa.concat_tables(tables, promote_options='default').to_pandas()
+
+    def iter_batches(self, columns=None, batch_size=50000):
+        """Stream the selected columns as DataFrames of at most batch_size rows"""
+        for path in self.segments():
+            for batch in pq.ParquetFile(path, memory_map=True).iter_batches(batch_size, columns=columns):
+                yield batch.to_pandas()
+
+    def __len__(self):
+        return sum(pq.ParquetFile(path).metadata.num_rows for path in self.segments())
+
+    def _save_summary(self, summary, segments):
+        summary_file = os.path.join(self.root, 'summary.json')
+        with open(summary_file + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'segments': len(segments), 'summary': summary.to_dict()}, f)
+        os.replace(summary_file + '.tmp', summary_file)
+
+    def _to_table(self, df):
+        """Convert to Arrow with categorical labels and float32 confidence"""
+        df = df.copy()
+        for column in CATEGORICAL_COLUMNS:
+            if column in df:
+                df[column] = df[column].astype(str)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        for column in CATEGORICAL_COLUMNS:
+            if column in table.column_names:
+                index = table.column_names.index(column)
+                table = table.set_column(index, column, table[column].dictionary_encode())
+        if 'confidence' in table.column_names:
+            index = table.column_names.index('confidence')
+            table = table.set_column(index, 'confidence', table['confidence'].cast(pa.float32()))
+        return table
@@ -0,0 +1,250 @@
+import argparse
+import atexit
+import cProfile
+import functools
+import json
+import os
+import pstats
+import threading
+import time
+
+# Set MOOD_PROFILE=<prefix> to profile a whole run and write <prefix>.json and <prefix>.trace.json
+# at exit; MOOD_PROFILE_CPROFILE=1 also writes <prefix>.prof
+PROFILE_PREFIX = os.environ.get('MOOD_PROFILE') or None
+
+class _NullSpan:
+    """Shared do-nothing span handed out while profiling is disabled"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ('profiler', 'name', 'args', 'start', 'state')
+
+    def __init__(self, profiler, name, args):
+        self.profiler = profiler
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.state = self.profiler._thread_state()
+        if self.state.depth == 0 and self.profiler.cprofile:
+            self.profiler._start_cprofile(self.state)
+        self.state.depth += 1
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        state = self.state
+        state.depth -= 1
+        self.profiler._record(self.name, self.start, end, state, self.args)
+        if state.depth == 0 and state.cprofile is not None:
+            state.cprofile.disable()
+        return False
+
+class Profiler:
+    """Collects nested timing spans and counters from every thread of the pipeline
+
+    Spans are only recorded between enable() and disable(); the module-level span(),
+    count() and profiled() helpers return immediately otherwise.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.cprofile = False
+        self.spans = []
+        self.counters = {}
+        self._origin = time.perf_counter_ns()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._profiles = []
+
+    def enable(self, cprofile=False):
+        """Start recording; with cprofile, each thread's outermost span also runs under cProfile"""
+        self.cprofile = cprofile
+        self.enabled = True
+        return self
+
+    def disable(self):
+        self.enabled = False
+        return self
+
+    def reset(self):
+        with self._lock:
+            self.spans = []
+            self.counters = {}
+            self._profiles = []
+            self._origin = time.perf_counter_ns()
+            self._local = threading.local()
+
+    def span(self, name, **args):
+        return _Span(self, name, args) if self.enabled else _NULL_SPAN
+
+    def count(self, name, value=1):
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def summary(self):
+        """Calls, total, mean and max milliseconds per span name, slowest total first"""
+        stages = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            stage = stages.setdefault(span['name'], {'name': span['name'], 'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            stage['calls'] += 1
+            stage['total_ms'] += span['duration_ms']
+            stage['max_ms'] = max(stage['max_ms'], span['duration_ms'])
+        for stage in stages.values():
+            stage['mean_ms'] = stage['total_ms'] / stage['calls']
+        return sorted(stages.values(), key=lambda stage: stage['total_ms'], reverse=True)
+
+    def print_summary(self):
+        print(format_summary(self.summary(), self.counters))
+
+    def export_json(self, path):
+        """Write spans (in start order), counters and the per-stage summary as JSON"""
+        with self._lock:
+            payload = {'spans': sorted(self.spans, key=lambda span: span['start_ms']),
+                       'counters': dict(self.counters)}
+        payload['summary'] = self.summary()
+        _write_json(path, payload)
+        return path
+
+    def export_chrome_trace(self, path):
+        """Write spans as complete events for chrome://tracing or Perfetto, counters as final values"""
+        pid = os.getpid()
+        events = []
+        threads = {}
+        with self._lock:
+            spans = list(self.spans)
+            counters = dict(self.counters)
+        for span in spans:
+            threads[span['thread_id']] = span['thread']
+            events.append({'name': span['name'], 'ph': 'X', 'pid': pid, 'tid': span['thread_id'],
+                           'ts': span['start_ms'] * 1000, 'dur': span['duration_ms'] * 1000,
+                           'args': span['args']})
+        events.extend({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+                      for tid, name in threads.items())
+        end = max((span['start_ms'] + span['duration_ms'] for span in spans), default=0.0)
+        events.extend({'name': name, 'ph': 'C', 'pid': pid, 'tid': 0, 'ts': end * 1000, 'args': {name: value}}
+                      for name, value in counters.items())
+        _write_json(path, {'traceEvents': events, 'displayTimeUnit': 'ms'})
+        return path
+
+    def save_cprofile(self, path):
+        """Merge the cProfile runs of every thread into one pstats file; returns None without any"""
+        with self._lock:
+            profiles = list(self._profiles)
+        if not profiles:
+            return None
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        stats.dump_stats(path)
+        return path
+
+    def export(self, prefix):
+        """Write <prefix>.json, <prefix>.trace.json and, with cProfile data, <prefix>.prof"""
+        files = [self.export_json(f'{prefix}.json'), self.export_chrome_trace(f'{prefix}.trace.json')]
+        profile_file = self.save_cprofile(f'{prefix}.prof')
+        if profile_file:
+            files.append(profile_file)
+        print(f"Profile written to {', '.join(files)}")
+        return files
+
+    def _thread_state(self):
+        state = self._local
+        if not hasattr(state, 'depth'):
+            state.depth = 0
+            state.cprofile = None
+        return state
+
+    def _start_cprofile(self, state):
+        if state.cprofile is None:
+            state.cprofile = cProfile.Profile()
+            with self._lock:
+                self._profiles.append(state.cprofile)
+        try:
+            state.cprofile.enable()
+        except ValueError:
+            # Another profiler is already active (newer Pythons allow one at a time)
+            pass
+
+    def _record(self, name, start, end, state, args):
+        thread = threading.current_thread()
+        span = {'name': name, 'start_ms': (start - self._origin) / 1e6, 'duration_ms': (end - start) / 1e6,
+                'depth': state.depth, 'thread_id': thread.ident, 'thread': thread.name, 'args': args}
+        with self._lock:
+            self.spans.append(span)
+
+# The profiler every instrumented stage reports to
+PROFILER = Profiler()
+
+def span(name, **args):
+    """Context manager timing one pipeline stage; keyword arguments are stored with the span"""
+    if not PROFILER.enabled:
+        return _NULL_SPAN
+    return _Span(PROFILER, name, args)
+
+def count(name, value=1):
+    """Add value to a named counter"""
+    if PROFILER.enabled:
+        PROFILER.count(name, value)
+
+def profiled(name):
+    """Decorator recording each call of a function as a span"""
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return function(*args, **kwargs)
+            with _Span(PROFILER, name, {}):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def format_summary(stages, counters=None):
+    """Per-stage timing table with counters underneath"""
+    lines = [f"{'Stage':<28}{'Calls':>8}{'Total ms':>12}{'Mean ms':>12}{'Max ms':>12}"]
+    for stage in stages:
+        lines.append(f"{stage['name']:<28}{stage['calls']:>8}{stage['total_ms']:>12.1f}"
+                     f"{stage['mean_ms']:>12.2f}{stage['max_ms']:>12.1f}")
+    for name, value in sorted((counters or {}).items()):
+        lines.append(f"{name}: {value}")
+    return "\n".join(lines)
+
+def _write_json(path, payload):
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f)
+    os.replace(temp_path, path)
+
+if PROFILE_PREFIX:
+    PROFILER.enable(cprofile=os.environ.get('MOOD_PROFILE_CPROFILE') == '1')
+    atexit.register(PROFILER.export, PROFILE_PREFIX)
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize a profile written with MOOD_PROFILE")
+    parser.add_argument('profile', help="the <prefix>.json file of a profiled run")
+    parser.add_argument('--cprofile', type=int, default=0, metavar='N',
+                        help="also print the N slowest functions from <prefix>.prof")
+    args = parser.parse_args()
+
+    with open(args.profile, 'r', encoding='utf-8') as f:
+        profile = json.load(f)
+    print(format_summary(profile['summary'], profile['counters']))
+    profile_file = args.profile[:-len('.json')] + '.prof' if args.profile.endswith('.json') else None
+    if args.cprofile and profile_file and os.path.exists(profile_file):
+        print()
+        pstats.Stats(profile_file).sort_stats('cumulative').print_stats(args.cprofile)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import os
+import re
+from collections import namedtuple
+import pandas as pd
+
+RAW_DATA_DIR = os.path.join('Original Reddit Data', 'raw data')
+LABELLED_DATA_DIR = os.path.join('Original Reddit Data', 'Labelled Data')
+
+# Stable schema for every chunk, whatever the source file carried
+SCHEMA = ['author', 'created_utc', 'subreddit', 'title', 'selftext']
+COLUMNS = SCHEMA + ['year', 'month', 'source_file']
+
+MONTHS = {name: number for number, name in enumerate(
+    ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'], start=1)}
+
+CorpusFile = namedtuple('CorpusFile', ['path', 'year', 'month'])
+
+def parse_month(dir_name):
+    """Map folder names like 'JAN', 'MAy', 'Feb20' or 'Dec 21' to a month number"""
+    match = re.match(r'[A-Za-z]{3}', dir_name.strip())
+    if match is None or match.group(0).lower() not in MONTHS:
+        raise ValueError(f"Cannot read a month from folder name '{dir_name}'")
+    return MONTHS[match.group(0).lower()]
+
+def post_text(chunk):
+    """Combine title and selftext into the text that gets scored"""
+    return (chunk['title'] + "\n\n" + chunk['selftext']).str.strip()
+
+def load_labelled_posts(root=LABELLED_DATA_DIR):
+    """Load the hand-labelled CSVs with their Label column normalized ('early life' -> 'Early life')"""
+    frames = []
+    for name in sorted(os.listdir(root)):
+        if not name.lower().endswith('.csv'):
+            continue
+        df = pd.read_csv(os.path.join(root, name), encoding_errors='replace',
+                         usecols=['selftext', 'subreddit', 'title', 'Label'])
+        df['source_file'] = name
+        frames.append(df)
+    posts = pd.concat(frames, ignore_index=True)
+    for column in ['selftext', 'subreddit', 'title']:
+        posts[column] = posts[column].fillna("").astype(str)
+    posts['label'] = posts.pop('Label').astype(str).str.strip().str.lower().str.capitalize()
+    return posts
+
+class RedditCorpus:
+    """Discover and stream the monthly Reddit dumps under the raw data tree"""
+
+    def __init__(self, root=RAW_DATA_DIR):
+        self.root = root
+
+    def discover(self):
+        """List every CSV file with the year and month taken from its path"""
+        files = []
+        for year_dir in sorted(os.listdir(self.root)):
+            year_path = os.path.join(self.root, year_dir)
+            if not (os.path.isdir(year_path) and re.fullmatch(r'\d{4}', year_dir)):
+                continue
+            for month_dir in os.listdir(year_path):
+                month_path = os.path.join(year_path, month_dir)
+                if not os.path.isdir(month_path):
+                    continue
+                month = parse_month(month_dir)
+                for name in sorted(os.listdir(month_path)):
+                    if name.lower().endswith('.csv'):
+                        files.append(CorpusFile(os.path.join(month_path, name), int(year_dir), month))
+        return sorted(files, key=lambda f: (f.year, f.month, f.path))
+
+    def iter_chunks(self, chunksize=10000, files=None):
+        """Yield DataFrames of at most chunksize rows with the COLUMNS schema"""
+        for corpus_file in (self.discover() if files is None else files):
+            for chunk in self.read_file(corpus_file, chunksize):
+                yield chunk
+
+    def read_file(self, corpus_file, chunksize=10000, skiprows=None, nrows=None):
+        """Stream one file in chunks, optionally restricted to a range of data rows"""
+        reader = pd.read_csv(
+            corpus_file.path,
+            usecols=lambda column: column in SCHEMA,
+            dtype={'author': str, 'subreddit': str, 'title': str, 'selftext': str},
+            # The dumps store missing selftext as the literal string 'nan'
+            keep_default_na=False,
+            na_values={'selftext': ['nan', 'NaN'], 'title': ['nan', 'NaN']},
+            skiprows=range(1, skiprows + 1) if skiprows else None,
+            nrows=nrows,
+            chunksize=chunksize,
+            encoding_errors='replace'
+        )
+        for chunk in reader:
+            chunk = chunk.reindex(columns=SCHEMA)
+            for column in ['author', 'subreddit', 'title', 'selftext']:
+                chunk[column] = chunk[column].fillna("")
+            chunk['created_utc'] = pd.to_numeric(chunk['created_utc'], errors='coerce').astype('Int64')
+            chunk['year'] = corpus_file.year
+            chunk['month'] = corpus_file.month
+            chunk['source_file'] = corpus_file.path
+            yield chunk
+
+def main():
+    corpus = RedditCorpus()
+    files = corpus.discover()
+    print(f"Found {len(files)} files under {corpus.root}")
+
+    total = 0
+    for corpus_file in files:
+        rows = sum(len(chunk) for chunk in corpus.read_file(corpus_file))
+        total += rows
+        print(f"{corpus_file.year}-{corpus_file.month:02d}: {rows} posts ({corpus_file.path})")
+    print(f"\nTotal posts: {total}")
+
+if __name__ == "__main__":
+    main()
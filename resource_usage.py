@@ -0,0 +1,23 @@
+import sys
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, or NaN where it cannot be measured"""
+    if resource is not None:
+        # ru_maxrss is in bytes on macOS and in KB on Linux
+        divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / divisor
+    if psutil is not None:
+        memory = psutil.Process().memory_info()
+        # Windows reports the peak working set; elsewhere fall back to the current RSS
+        return getattr(memory, 'peak_wset', memory.rss) / (1024 * 1024)
+    return float('nan')
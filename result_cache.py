@@ -0,0 +1,147 @@
+import hashlib
+import sqlite3
+import threading
+import time
+
+# Recency updates from lookups are written in batches of this many keys
+TOUCH_BATCH = 1000
+
+class ResultCache:
+    """On-disk cache of sentiment results keyed by normalized text, model and revision
+
+    Several processes can share one file: it is opened in WAL mode so lookups do not
+    block on writers, and lookups only take the write lock once enough hits have
+    piled up to be worth recording for LRU eviction.
+    """
+
+    def __init__(self, path='sentiment_cache.db', max_entries=500000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._touched = {}
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                label TEXT NOT NULL,
+                score REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+        self._conn.commit()
+        # Running estimate of the row count, so puts do not scan the table. Other processes'
+        # inserts are not seen, so it is resynced after every resync_rows of our own inserts
+        self._entries = len(self)
+        self._added_since_sync = 0
+        self._resync_rows = max(max_entries // 100, 1)
+
+    @staticmethod
+    def normalize(text, lowercase=False):
+        """Collapse whitespace, and case too when the model's tokenizer ignores it"""
+        text = " ".join(text.split())
+        return text.lower() if lowercase else text
+
+    def make_key(self, text, model_id, revision, lowercase=False):
+        """Content address for one text scored by one model revision
+
+        Pass lowercase=True only for models with an uncased tokenizer; the mode is part
+        of the key so cased and uncased lookups never share an entry.
+        """
+        mode = 'uncased' if lowercase else 'cased'
+        payload = f"{model_id}\0{revision}\0{mode}\0{self.normalize(text, lowercase)}"
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get_many(self, keys):
+        """Look up many keys at once and return a dict of key -> (label, score)"""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        now = time.time()
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, label, score FROM results WHERE key IN ({placeholders})", chunk)
+                for key, label, score in rows:
+                    found[key] = (label, score)
+            # Hits are touched later in one batch so they survive LRU eviction
+            self._touched.update(dict.fromkeys(found, now))
+            if len(self._touched) >= TOUCH_BATCH:
+                self._flush_touches()
+                self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items):
+        """Store an iterable of (key, label, score) and evict the least recently used overflow"""
+        now = time.time()
+        rows = {key: (key, label, float(score), now) for key, label, score in items}
+        with self._lock:
+            self._flush_touches()
+            existing = self._count_existing(list(rows))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO results (key, label, score, last_used) VALUES (?, ?, ?, ?)",
+                rows.values())
+            added = len(rows) - existing
+            self._entries += added
+            self._added_since_sync += added
+            if self._entries > self.max_entries or self._added_since_sync >= self._resync_rows:
+                self._entries = len(self)
+                self._added_since_sync = 0
+            overflow = self._entries - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM results WHERE key IN "
+                    "(SELECT key FROM results ORDER BY last_used, rowid LIMIT ?)", (overflow,))
+                self._entries -= overflow
+            self._conn.commit()
+
+    def _count_existing(self, keys):
+        """How many of keys already have a row, looked up through the primary key index"""
+        existing = 0
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            existing += self._conn.execute(
+                f"SELECT COUNT(*) FROM results WHERE key IN ({placeholders})", chunk).fetchone()[0]
+        return existing
+
+    def _flush_touches(self):
+        """Write pending last_used updates from lookups; the caller holds the lock and commits"""
+        if self._touched:
+            self._conn.executemany("UPDATE results SET last_used = ? WHERE key = ?",
+                                   [(now, key) for key, now in self._touched.items()])
+            self._touched = {}
+
+    def stats(self):
+        """Hit/miss counters for this session plus the current entry count"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self)
+        }
+
+    def clear(self):
+        with self._lock:
+            self._touched = {}
+            self._conn.execute("DELETE FROM results")
+            self._conn.commit()
+            self._entries = 0
+            self._added_since_sync = 0
+
+    def close(self):
+        with self._lock:
+            self._flush_touches()
+            self._conn.commit()
+        self._conn.close()
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
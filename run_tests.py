@@ -1,11 +1,43 @@
 import unittest
+import json
 from test_mood_detection import test_mood_detection
 from collect_data import DataCollector
 import pandas as pd
+import numpy as np
+import torch
 import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime
 import os
+import tempfile
+import joblib
+import importlib.util
+import time
+from unittest import mock
+from result_cache import ResultCache
+from post_store import ScoredPostStore
+from reddit_corpus import RedditCorpus, SCHEMA, parse_month
+from sentiment_engine import SentimentEngine
+from model_registry import ModelRegistry
+from inference_backends import OnnxBackend, PyTorchBackend, QuantizedBackend, create_backend
+from stand_in_model import build_stand_in_analyzer
+from cascade_classifier import CascadeClassifier
+from analysis_summary import AnalysisSummary
+from summary_charts import render_charts
+from generate_report import ReportGenerator
+from mood_timeline import MoodTimeline
+from post_columns import TEXT_CHUNK_ROWS, ColumnarPosts
+from post_log import PostLog
+from scoring_server import ScoringClient, ScoringServer
+from near_duplicates import DeduplicatingScorer, DuplicateIndex
+import parallel_scoring
+from post_index import PostIndex
+from profiling import PROFILER, span
+import evaluation
+from stress_classifier import StressClassifier, score_column
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from text_preprocessing import clean_series, clean_text, preprocess_series, preprocess_text
 
 class TestMoodDetection(unittest.TestCase):
     def setUp(self):
@@ -40,6 +72,26 @@ class TestMoodDetection(unittest.TestCase):
         self.assertTrue(os.path.exists('test_posts.json'))
         print("✓ Data saving test passed")
         
+    def test_scoring_watermark(self):
+        """Test that only posts added after the watermark are returned for scoring"""
+        print("\nTesting scoring watermark...")
+        for post in self.test_posts[:3]:
+            self.collector.add_post(post)
+        self.collector.mark_scored()
+        for post in self.test_posts[3:]:
+            self.collector.add_post(post)
+        self.assertEqual([p['text'] for p in self.collector.unscored_posts()], self.test_posts[3:])
+        
+        # The watermark is saved next to the data and restored on load
+        with tempfile.TemporaryDirectory() as temp_dir:
+            filename = os.path.join(temp_dir, 'posts.json')
+            self.collector.save_to_json(filename)
+            restored = DataCollector()
+            restored.load_from_json(filename)
+            self.assertEqual(restored.scored_count, 3)
+            self.assertEqual(len(restored.unscored_posts()), 2)
+        print("✓ Scoring watermark test passed")
+        
     def test_sentiment_analysis(self):
         """Test sentiment analysis functionality"""
         print("\nTesting sentiment analysis...")
@@ -49,6 +101,969 @@ class TestMoodDetection(unittest.TestCase):
         except Exception as e:
             self.fail(f"Sentiment analysis failed: {str(e)}")
 
+class TestSentimentEngine(unittest.TestCase):
+    def setUp(self):
+        """Build an engine on the small offline stand-in model"""
+        self.engine = SentimentEngine('stand-in', analyzer=build_stand_in_analyzer(full_size=False),
+                                      batch_size=2)
+        self.posts = [
+            "Feeling down and disappointed.",
+            "ok",
+            "I'm extremely happy with my new job! " * 20,
+            None
+        ]
+
+    def test_batched_matches_single(self):
+        """Test that batched results line up with scoring posts one at a time"""
+        print("\nTesting batched sentiment engine...")
+        labels, scores = self.engine.analyze(self.posts)
+        for i, post in enumerate(self.posts):
+            label, score = self.engine.analyze([post])
+            self.assertEqual(labels[i], label[0])
+            self.assertAlmostEqual(scores[i], score[0], places=5)
+        print("✓ Batched sentiment engine test passed")
+
+    def test_batch_hook(self):
+        """Test that on_batch reports every model batch with its size and duration"""
+        print("\nTesting batch timing hook...")
+        batches = []
+        self.engine.on_batch = lambda posts, seconds: batches.append((posts, seconds))
+        self.engine.analyze(self.posts)
+        self.assertEqual(sum(posts for posts, _ in batches), len(self.posts))
+        self.assertTrue(all(posts <= 2 and seconds >= 0 for posts, seconds in batches))
+        print("✓ Batch timing hook test passed")
+
+    def test_long_posts(self):
+        """Test that long posts are split into bounded windows and reduced per post"""
+        print("\nTesting long-post scoring...")
+        long_post = "i feel lonely and tired every night " * 300
+        for reducer in ['mean', 'weighted', 'max', 'vote']:
+            labels, scores = self.engine.analyze_long(["ok", long_post], reducer=reducer)
+            self.assertEqual(len(labels), 2)
+            self.assertTrue(all(0.0 <= score <= 1.0 for score in scores))
+        # Short posts fit in one window, so they score exactly as in the normal mode
+        self.assertAlmostEqual(self.engine.analyze_long(["ok"])[1][0], self.engine.analyze(["ok"])[1][0], places=5)
+        print("✓ Long-post scoring test passed")
+
+class TestInferenceBackends(unittest.TestCase):
+    def setUp(self):
+        self.analyzer = build_stand_in_analyzer(full_size=False)
+        self.encoded = self.analyzer.tokenizer(["i feel lonely and tired", "ok", "happy with my new job"],
+                                               padding=True, return_tensors='pt')
+        self.expected = PyTorchBackend(self.analyzer.model).logits(self.encoded['input_ids'],
+                                                                   self.encoded['attention_mask'])
+
+    def test_backend_selection(self):
+        """Test that backends are chosen by name and unknown names are rejected"""
+        print("\nTesting backend selection...")
+        self.assertIsInstance(create_backend('pytorch', self.analyzer.model, 'stand-in'), PyTorchBackend)
+        self.assertIsInstance(create_backend('quantized', self.analyzer.model, 'stand-in'), QuantizedBackend)
+        with self.assertRaisesRegex(ValueError, "Unknown backend 'tensorrt'"):
+            create_backend('tensorrt', self.analyzer.model, 'stand-in')
+        with self.assertRaises(ValueError):
+            SentimentEngine('stand-in', analyzer=self.analyzer, backend='tensorrt')
+        engine = SentimentEngine('stand-in', analyzer=self.analyzer, backend='quantized')
+        self.assertTrue(engine.revision.endswith('+quantized'))
+        print("✓ Backend selection test passed")
+
+    def test_quantized_parity(self):
+        """Test that the int8 model stays close to the float32 logits"""
+        print("\nTesting quantized backend parity...")
+        backend = create_backend('quantized', self.analyzer.model, 'stand-in')
+        logits = backend.logits(self.encoded['input_ids'], self.encoded['attention_mask'])
+        self.assertEqual(logits.shape, self.expected.shape)
+        self.assertLess((logits - self.expected).abs().max().item(), 0.05)
+        # The shared float model is left as it was
+        self.assertTrue(all(type(module) is not torch.ao.nn.quantized.dynamic.Linear
+                            for module in self.analyzer.model.modules()))
+        print("✓ Quantized backend parity test passed")
+
+    @unittest.skipUnless(importlib.util.find_spec('onnxruntime'), "onnxruntime is not installed")
+    def test_onnx_parity(self):
+        """Test that the exported ONNX graph matches the PyTorch logits, padding included"""
+        print("\nTesting ONNX backend parity...")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            backend = OnnxBackend(self.analyzer.model, 'stand-in', export_dir=temp_dir)
+            self.assertTrue(os.path.exists(backend.path))
+            logits = backend.logits(self.encoded['input_ids'], self.encoded['attention_mask'])
+        self.assertLess((logits - self.expected).abs().max().item(), 1e-4)
+        print("✓ ONNX backend parity test passed")
+
+    @unittest.skipUnless(importlib.util.find_spec('onnxruntime'), "onnxruntime is not installed")
+    def test_onnx_export_reused(self):
+        """Test that local models are exported once per set of weights"""
+        print("\nTesting ONNX export reuse...")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            first = OnnxBackend(self.analyzer.model, 'stand-in', export_dir=temp_dir)
+            with mock.patch.object(OnnxBackend, '_export') as export:
+                self.assertEqual(OnnxBackend(self.analyzer.model, 'stand-in', export_dir=temp_dir).path, first.path)
+                export.assert_not_called()
+            other = build_stand_in_analyzer(full_size=False).model
+            with torch.no_grad():
+                next(other.parameters()).add_(1.0)
+            self.assertNotEqual(OnnxBackend(other, 'stand-in', export_dir=temp_dir).path, first.path)
+        print("✓ ONNX export reuse test passed")
+
+class TestModelRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = ModelRegistry()
+        self.loads = []
+
+        def load_pipeline(task, model):
+            # Slow enough that concurrent callers overlap while the first one loads
+            self.loads.append(model)
+            time.sleep(0.2)
+            return build_stand_in_analyzer(full_size=False)
+
+        patcher = mock.patch('model_registry.pipeline', side_effect=load_pipeline)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_concurrent_loads(self):
+        """Test that threads asking for the same model at once share a single load"""
+        print("\nTesting concurrent model loads...")
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            loaded = list(executor.map(lambda _: self.registry.get('stand-in'), range(8)))
+        self.assertEqual(self.loads, ['stand-in'])
+        self.assertTrue(all(pipeline is loaded[0] for pipeline in loaded))
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            backends = list(executor.map(lambda _: self.registry.get_backend('stand-in', 'pytorch'), range(4)))
+        self.assertTrue(all(backend is backends[0] for backend in backends))
+        self.assertEqual(self.loads, ['stand-in'])
+        print("✓ Concurrent model loads test passed")
+
+    def test_unload_and_reload(self):
+        """Test that an unloaded model and its backends are loaded again on next use"""
+        print("\nTesting model unload...")
+        first = self.registry.get('stand-in')
+        backend = self.registry.get_backend('stand-in', 'pytorch')
+        self.registry.get('other')
+        self.registry.unload('stand-in')
+        self.assertFalse(self.registry.is_loaded('stand-in'))
+        self.assertTrue(self.registry.is_loaded('other'))
+
+        self.assertIsNot(self.registry.get('stand-in'), first)
+        self.assertIsNot(self.registry.get_backend('stand-in', 'pytorch'), backend)
+        self.assertEqual(self.loads, ['stand-in', 'other', 'stand-in'])
+        self.registry.unload()
+        self.assertFalse(self.registry.is_loaded('other'))
+        print("✓ Model unload test passed")
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        """Create a small cache in a temporary directory"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = ResultCache(os.path.join(self.temp_dir.name, 'cache.db'), max_entries=3)
+
+    def tearDown(self):
+        self.cache.close()
+        self.temp_dir.cleanup()
+
+    def test_bulk_lookup_and_insert(self):
+        """Test that stored results are found and counted as hits"""
+        print("\nTesting result cache lookups...")
+        key = self.cache.make_key("Feeling  GREAT today", "model", "rev1", lowercase=True)
+        self.assertEqual(key, self.cache.make_key("feeling great today", "model", "rev1", lowercase=True))
+        self.assertNotEqual(key, self.cache.make_key("feeling great today", "model", "rev2", lowercase=True))
+        # Cased models only share results for texts differing in whitespace
+        cased = self.cache.make_key("Feeling  GREAT today", "model", "rev1")
+        self.assertEqual(cased, self.cache.make_key("Feeling GREAT today", "model", "rev1"))
+        self.assertNotEqual(cased, self.cache.make_key("feeling great today", "model", "rev1"))
+        self.assertNotEqual(cased, self.cache.make_key("feeling great today", "model", "rev1", lowercase=True))
+
+        self.assertEqual(self.cache.get_many([key]), {})
+        self.cache.put_many([(key, 'POSITIVE', 0.99)])
+        self.assertEqual(self.cache.get_many([key]), {key: ('POSITIVE', 0.99)})
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        print("✓ Result cache lookup test passed")
+
+    def test_keyed_on_engine_settings(self):
+        """Test that results cached under one max_length or reducer are not served for another"""
+        print("\nTesting result cache keys across engine settings...")
+        analyzer = build_stand_in_analyzer(full_size=False)
+        cache = ResultCache(os.path.join(self.temp_dir.name, 'settings.db'))
+        self.addCleanup(cache.close)
+        engine = SentimentEngine('stand-in', analyzer=analyzer, cache=cache)
+        uncached = SentimentEngine('stand-in', analyzer=analyzer)
+        post = ["i feel lonely and tired every night but happy with my new job " * 12]
+
+        for max_length in (512, 16):
+            engine.max_length = uncached.max_length = max_length
+            self.assertEqual(engine.analyze(post), uncached.analyze(post))
+            for reducer in ('mean', 'max'):
+                self.assertEqual(engine.analyze_long(post, reducer, overlap=4),
+                                 uncached.analyze_long(post, reducer, overlap=4))
+        self.assertEqual(cache.hits, 0)
+        print("✓ Result cache settings test passed")
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entries are evicted past the size cap"""
+        print("\nTesting result cache eviction...")
+        keys = [self.cache.make_key(f"post {i}", "model", "rev") for i in range(4)]
+        self.cache.put_many([(key, 'NEGATIVE', 0.5) for key in keys[:3]])
+        self.cache.get_many([keys[0]])
+        self.cache.put_many([(keys[3], 'NEGATIVE', 0.5)])
+
+        self.assertEqual(len(self.cache), 3)
+        self.assertEqual(set(self.cache.get_many(keys)), {keys[0], keys[2], keys[3]})
+        print("✓ Result cache eviction test passed")
+
+    def test_shared_file(self):
+        """Test that two connections share one WAL-mode file and hits are touched in batches"""
+        print("\nTesting result cache shared between connections...")
+        other = ResultCache(self.cache.path, max_entries=3)
+        self.addCleanup(other.close)
+        self.assertEqual(other._conn.execute("PRAGMA journal_mode").fetchone()[0], 'wal')
+        key = self.cache.make_key("shared post", "model", "rev")
+        self.cache.put_many([(key, 'POSITIVE', 0.9)])
+        self.assertEqual(other.get_many([key]), {key: ('POSITIVE', 0.9)})
+        # The hit is only recorded in memory until the next write
+        self.assertFalse(other._conn.in_transaction)
+        self.assertIn(key, other._touched)
+        other.put_many([(key, 'POSITIVE', 0.9)])
+        self.assertEqual((len(other), other._touched), (1, {}))
+        print("✓ Result cache sharing test passed")
+
+class TestRedditCorpus(unittest.TestCase):
+    def setUp(self):
+        """Create a small raw data tree with inconsistent folder names"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        raw = pd.DataFrame({
+            'Unnamed: 0': [0, 1, 2],
+            'author': ['a', 'b', 'c'],
+            'created_utc': [1548939293, 1548939527, 1548939600],
+            'score': [1, 1, 1],
+            'selftext': ['line one\nline two', 'nan', 'body'],
+            'subreddit': ['lonely'] * 3,
+            'title': ['t1', 't2', 't3'],
+            'timestamp': ['2019-01-31'] * 3
+        })
+        for folder in [os.path.join('2019', 'MAy'), os.path.join('2021', 'Dec 21')]:
+            os.makedirs(os.path.join(self.temp_dir.name, folder))
+            raw.to_csv(os.path.join(self.temp_dir.name, folder, 'posts.csv'), index=False)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_month_parsing(self):
+        """Test that folder names map to month numbers"""
+        print("\nTesting corpus month parsing...")
+        for name, month in [('JAN', 1), ('MAy', 5), ('Feb20', 2), ('Dec 21', 12), ('june', 6)]:
+            self.assertEqual(parse_month(name), month)
+        print("✓ Corpus month parsing test passed")
+
+    def test_streaming_chunks(self):
+        """Test that files are discovered and streamed with the stable schema"""
+        print("\nTesting corpus streaming...")
+        corpus = RedditCorpus(self.temp_dir.name)
+        self.assertEqual([(f.year, f.month) for f in corpus.discover()], [(2019, 5), (2021, 12)])
+
+        chunks = list(corpus.iter_chunks(chunksize=2))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 1, 2, 1])
+        self.assertEqual(list(chunks[0].columns[:len(SCHEMA)]), SCHEMA)
+        self.assertEqual(chunks[0]['selftext'].tolist(), ['line one\nline two', ''])
+        print("✓ Corpus streaming test passed")
+
+class TestScoredPostStore(unittest.TestCase):
+    def setUp(self):
+        """Create an empty store in a temporary directory"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.store = ScoredPostStore(os.path.join(self.temp_dir.name, 'scored_posts'))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_append_and_project(self):
+        """Test that appended segments read back with typed, projected columns"""
+        print("\nTesting scored post store...")
+        batch = pd.DataFrame({
+            'text': ['good day', 'bad day'],
+            'source': ['Twitter', 'Facebook'],
+            'timestamp': ['2024-01-01T10:00:00', '2024-01-01T11:00:00'],
+            'sentiment': ['POSITIVE', 'NEGATIVE'],
+            'confidence': [0.9, 0.8]
+        })
+        self.store.append(batch)
+        self.store.append(batch.head(1))
+        self.store.append(batch.iloc[0:0])
+
+        self.assertEqual(len(self.store.segments()), 2)
+        self.assertEqual(len(self.store), 3)
+        df = self.store.read(['sentiment', 'confidence'])
+        self.assertEqual(list(df.columns), ['sentiment', 'confidence'])
+        self.assertEqual(str(df['sentiment'].dtype), 'category')
+        self.assertEqual(str(df['confidence'].dtype), 'float32')
+        self.assertEqual(df['sentiment'].tolist(), ['POSITIVE', 'NEGATIVE', 'POSITIVE'])
+        
+        # Running summary matches a full recount, including after losing the summary file
+        summary = self.store.summary()
+        self.assertEqual(summary.total_posts, 3)
+        self.assertEqual(summary.sentiment_counts, {'POSITIVE': 2, 'NEGATIVE': 1})
+        self.assertEqual(summary.length_sum, 23)
+        os.remove(os.path.join(self.store.root, 'summary.json'))
+        self.assertEqual(self.store.summary().source_counts, {'Twitter': 2, 'Facebook': 1})
+        print("✓ Scored post store test passed")
+
+class TestCascadeClassifier(unittest.TestCase):
+    def setUp(self):
+        """Train a cascade on a few labelled posts with the stand-in model behind it"""
+        engine = SentimentEngine('stand-in', analyzer=build_stand_in_analyzer(full_size=False))
+        self.cascade = CascadeClassifier(engine, margin=0.5)
+        positive = ["so happy today", "happy and grateful", "great happy day", "feeling great"]
+        negative = ["so sad today", "sad and lonely", "lonely sad night", "feeling lonely"]
+        self.cascade.train(positive + negative, ['POSITIVE'] * 4 + ['NEGATIVE'] * 4)
+
+    def test_routing(self):
+        """Test that only posts below the margin reach the transformer"""
+        print("\nTesting cascade routing...")
+        posts = ["happy happy great", "sad lonely sad", "the weather"]
+        _, _, margins = self.cascade.linear_predict(posts)
+        labels, scores = self.cascade.analyze(posts)
+        self.assertEqual(labels[:2], ['POSITIVE', 'NEGATIVE'])
+        self.assertEqual(self.cascade.routed_posts, int((margins < 0.5).sum()))
+        self.assertTrue(all(0.0 <= score <= 1.0 for score in scores))
+
+        # A margin of zero never routes, a margin above one always does
+        self.cascade.margin = 1.01
+        self.assertEqual(self.cascade.evaluate(posts, labels)['routing_rate'], 1.0)
+        self.assertEqual(self.cascade.evaluate(posts, labels)['agreement'], 1.0)
+        self.cascade.margin = 0.0
+        self.assertEqual(self.cascade.evaluate(posts, labels)['routing_rate'], 0.0)
+        print("✓ Cascade routing test passed")
+
+    def test_save_and_load(self):
+        """Test that a saved cascade predicts the same as the original"""
+        print("\nTesting cascade persistence...")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'cascade.joblib')
+            self.cascade.save(path)
+            loaded = CascadeClassifier.load(path)
+        posts = ["happy day", "lonely night"]
+        self.assertEqual(list(loaded.linear_predict(posts)[0]), list(self.cascade.linear_predict(posts)[0]))
+        self.assertEqual(loaded.margin, self.cascade.margin)
+
+        # A model saved where preprocessing differed (e.g. NLTK's corpora installed) is refused
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'cascade.joblib')
+            self.cascade.save(path)
+            state = joblib.load(path)
+            state['preprocessing'] = dict(state['preprocessing'], lemmatizer='other')
+            joblib.dump(state, path)
+            with self.assertRaises(ValueError):
+                CascadeClassifier.load(path)
+        print("✓ Cascade persistence test passed")
+
+class TestTextPreprocessing(unittest.TestCase):
+    def test_series_matches_single(self):
+        """Test that the vectorized path matches cleaning posts one at a time"""
+        print("\nTesting text preprocessing...")
+        posts = [
+            "Check https://example.com NOW!!! 123 times",
+            "I'm feeling great today! 😊",
+            "  tabs\tand\nnewlines  ",
+            None
+        ]
+        self.assertEqual(clean_text(posts[0]), "check now times")
+        self.assertEqual(clean_series(posts).tolist(), [clean_text(post or "") for post in posts])
+        self.assertEqual(preprocess_series(posts).tolist(),
+                         [preprocess_text(clean_text(post or "")) for post in posts])
+        self.assertNotIn("the", preprocess_text("the sad day").split())
+        print("✓ Text preprocessing test passed")
+
+class TestAnalysisSummary(unittest.TestCase):
+    def test_merge_matches_single_pass(self):
+        """Test that merging chunk summaries gives the same result as one summary"""
+        print("\nTesting analysis summary...")
+        df = pd.DataFrame({
+            'text': ['good day', 'bad day', 'ok', 'really great news', None],
+            'source': ['Twitter', 'Facebook', 'Twitter', 'Reddit', 'Twitter'],
+            'sentiment': ['POSITIVE', 'NEGATIVE', 'POSITIVE', 'POSITIVE', 'NEGATIVE'],
+            'confidence': [0.9, 0.8, 0.6, 0.99, 0.7]
+        })
+        whole = AnalysisSummary.from_frame(df, sample_size=3)
+        merged = AnalysisSummary.from_chunks([df.iloc[:2], df.iloc[2:3], df.iloc[3:]], sample_size=3)
+        round_trip = AnalysisSummary.from_dict(json.loads(json.dumps(merged.to_dict())))
+        for summary in [merged, round_trip]:
+            self.assertEqual(summary.to_dict(), whole.to_dict())
+
+        self.assertEqual(whole.total_posts, 5)
+        self.assertEqual(whole.sentiment_distribution()[0], ('POSITIVE', 3, 60.0))
+        self.assertEqual(whole.source_counts, {'Twitter': 3, 'Facebook': 1, 'Reddit': 1})
+        self.assertEqual((whole.length_min, whole.length_max, whole.length_sum), (0, 17, 34))
+        self.assertAlmostEqual(whole.avg_confidence, 0.798)
+        self.assertEqual([row['text'] for row in whole.samples], ['good day', 'bad day', 'ok'])
+        stats = {box['label']: box for box in whole.confidence_box_stats()}
+        self.assertEqual(stats['POSITIVE']['med'], 0.9)
+        self.assertEqual(AnalysisSummary(sample_size=3).merge(whole).to_dict(), whole.to_dict())
+        print("✓ Analysis summary test passed")
+
+class TestSummaryCharts(unittest.TestCase):
+    def test_unchanged_charts_are_reused(self):
+        """Test that only charts whose inputs changed are redrawn"""
+        print("\nTesting chart cache...")
+        df = pd.DataFrame({'text': ['good day', 'bad day'], 'source': ['Twitter', 'Facebook'],
+                           'sentiment': ['POSITIVE', 'NEGATIVE'], 'confidence': [0.9, 0.8]})
+        with tempfile.TemporaryDirectory() as temp_dir:
+            paths = render_charts(AnalysisSummary.from_frame(df), temp_dir, figsize=(4, 3))
+            self.assertTrue(all(os.path.exists(path) for path in paths))
+            modified = {path: os.path.getmtime(path) for path in paths}
+            os.utime(paths[0], (0, 0))
+
+            # Same sentiments, new source: only the source chart changes
+            df['source'] = ['Twitter', 'Reddit']
+            render_charts(AnalysisSummary.from_frame(df), temp_dir, figsize=(4, 3))
+            source_chart = os.path.join(temp_dir, 'source_distribution.png')
+            self.assertEqual(os.path.getmtime(paths[0]), 0)
+            self.assertNotEqual(os.path.getmtime(source_chart), modified[source_chart])
+        print("✓ Chart cache test passed")
+
+class TestReportGenerator(unittest.TestCase):
+    def test_paginated_listings(self):
+        """Test that every post lands on a linked, escaped per-sentiment page"""
+        print("\nTesting paginated report listings...")
+        working_dir = os.getcwd()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            os.chdir(temp_dir)
+            try:
+                store = ScoredPostStore()
+                store.append(pd.DataFrame({
+                    'text': ['<b>bold</b>', 'sad', 'fine', 'happy', 'glad'],
+                    'source': ['Twitter'] * 5,
+                    'sentiment': ['POSITIVE', 'NEGATIVE', 'POSITIVE', 'POSITIVE', 'POSITIVE'],
+                    'confidence': [0.9, 0.8, 0.7, 0.6, 0.5]
+                }))
+                report_file = ReportGenerator(posts_per_page=3).generate_analysis_report(store.root)
+                base = report_file[:-len('.html')]
+                with open(report_file, encoding='utf-8') as f:
+                    report = f.read()
+                with open(base + '_positive_1.html', encoding='utf-8') as f:
+                    first_page = f.read()
+                with open(base + '_positive_2.html', encoding='utf-8') as f:
+                    second_page = f.read()
+                self.assertIn(os.path.basename(base) + '_negative_1.html', report)
+                self.assertNotIn('<b>bold</b>', report + first_page)
+                self.assertIn('&lt;b&gt;bold&lt;/b&gt;', first_page)
+                self.assertEqual(first_page.count('<td class="positive">'), 3)
+                self.assertEqual(second_page.count('<td class="positive">'), 1)
+                self.assertIn('_positive_2.html">Next', first_page)
+                self.assertNotIn('Next', second_page)
+            finally:
+                os.chdir(working_dir)
+        print("✓ Paginated report listings test passed")
+
+    def test_default_data_file(self):
+        """Test that a report without a data file falls back to user_posts.csv, or explains what is missing"""
+        print("\nTesting report data fallback...")
+        working_dir = os.getcwd()
+        sample_file = os.path.join(working_dir, 'user_posts.csv')
+        with tempfile.TemporaryDirectory() as temp_dir:
+            os.chdir(temp_dir)
+            try:
+                self.assertIsNone(ReportGenerator().generate_analysis_report())
+                self.assertIsNone(ReportGenerator().generate_analysis_report('missing.csv'))
+                pd.read_csv(sample_file).to_csv('user_posts.csv', index=False)
+                self.assertTrue(os.path.exists(ReportGenerator().generate_analysis_report()))
+            finally:
+                os.chdir(working_dir)
+        print("✓ Report data fallback test passed")
+
+class TestMoodTimeline(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.timeline = MoodTimeline(os.path.join(self.temp_dir.name, 'timeline.db'))
+
+    def tearDown(self):
+        self.timeline.close()
+        self.temp_dir.cleanup()
+
+    def test_incremental_rollups(self):
+        """Test that day, week and month buckets add up across batches and skip repeats"""
+        print("\nTesting mood timeline...")
+        # 2021-03-01 was a Monday; 1614556800 is its midnight UTC
+        day = 86400
+        first = pd.DataFrame({
+            'created_utc': [1614556800, 1614556800 + day, 1614556800 + 7 * day],
+            'subreddit': ['lonely', 'Anxiety', 'lonely'],
+            'sentiment': ['NEGATIVE', 'POSITIVE', 'NEGATIVE'],
+            'confidence': [0.9, 0.8, 0.7]
+        })
+        second = pd.DataFrame({'created_utc': [1614556800 + 31 * day], 'subreddit': ['lonely'],
+                               'sentiment': ['POSITIVE'], 'confidence': [0.6]})
+        self.assertTrue(self.timeline.add(first, batch_id='march'))
+        self.assertFalse(self.timeline.add(first, batch_id='march'))
+        self.timeline.add(second, batch_id='april')
+
+        self.assertEqual(len(self.timeline), 4)
+        weeks = self.timeline.query(granularity='week')
+        self.assertEqual(weeks['bucket'].tolist(), ['2021-03-01', '2021-03-08', '2021-03-29'])
+        self.assertEqual(weeks['posts'].tolist(), [2, 1, 1])
+        months = self.timeline.query('2021-03-01', '2021-03-31', granularity='month')
+        self.assertEqual(months['posts'].tolist(), [3])
+        self.assertAlmostEqual(months['negative_share'][0], 2 / 3)
+        self.assertEqual(self.timeline.query(granularity='day', subreddit='anxiety')['posts'].tolist(), [1])
+        self.assertEqual(self.timeline.by_subreddit()['subreddit'].tolist(), ['lonely', 'anxiety'])
+
+        # Posts entered by hand are grouped by source, named the same way as in the search index
+        manual = pd.DataFrame({'text': ["My job is great"], 'source': ['Twitter'], 'timestamp': [datetime(2021, 5, 1)],
+                               'sentiment': ['POSITIVE'], 'confidence': [0.8]})
+        self.timeline.add(manual)
+        self.assertIn('twitter', self.timeline.subreddits())
+        self.assertEqual(self.timeline.query(granularity='month', subreddit='Twitter')['posts'].tolist(), [1])
+        print("✓ Mood timeline test passed")
+
+class TestColumnarPosts(unittest.TestCase):
+    def test_columnar_store(self):
+        """Test appends, bulk loads, record views and DataFrame conversion"""
+        print("\nTesting columnar post store...")
+        posts = ColumnarPosts(capacity=2)
+        posts.append("first post", "manual", datetime(2024, 1, 2, 3, 4, 5))
+        posts.append(None, "Twitter", None)
+        posts.extend_frame(pd.DataFrame({
+            'text': ["bulk one", "bulk two"],
+            'source': ["Reddit", "manual"],
+            'timestamp': ["2024-02-01T00:00:00", "not a time"]
+        }))
+        posts.append("after bulk", "Reddit", 1704164645)
+
+        self.assertEqual(len(posts), 5)
+        self.assertEqual(posts[0].to_dict(), {'text': "first post", 'source': "manual",
+                                              'timestamp': "2024-01-02T03:04:05"})
+        self.assertIsNone(posts[1]['text'])
+        self.assertIsNone(posts[3]['timestamp'])
+        self.assertEqual(posts[-1]['timestamp'], "2024-01-02T03:04:05")
+        self.assertEqual([post['text'] for post in posts[2:4]], ["bulk one", "bulk two"])
+        self.assertEqual(posts[::2][1]['text'], "bulk one")
+
+        frame = posts.to_frame()
+        self.assertEqual(frame['text'].tolist()[2:], ["bulk one", "bulk two", "after bulk"])
+        self.assertEqual(frame['source'].dtype, 'category')
+        self.assertEqual(sorted(frame['source'].cat.categories), ["Reddit", "Twitter", "manual"])
+        self.assertEqual(frame['timestamp'].tolist(), [post['timestamp'] for post in posts])
+        self.assertEqual(frame['timestamp'].isna().tolist(), [False, True, False, True, False])
+
+        # Numbers are epoch seconds whether appended one at a time or in bulk
+        bulk = ColumnarPosts()
+        bulk.extend_frame(pd.DataFrame({'text': ["a", "b", "c"], 'source': "manual",
+                                        'timestamp': [1700000000, 1700000000.5, None]}))
+        bulk.extend_frame(pd.DataFrame({'text': ["d", "e"], 'source': "manual",
+                                        'timestamp': [1700000000, "2024-02-01T00:00:00"]}, dtype=object))
+        single = ColumnarPosts()
+        for timestamp in [1700000000, 1700000000.5, None, 1700000000, "2024-02-01T00:00:00"]:
+            single.append("post", "manual", timestamp)
+        self.assertEqual([post['timestamp'] for post in bulk], [post['timestamp'] for post in single])
+        self.assertEqual(bulk[0]['timestamp'], "2023-11-14T22:13:20")
+
+        # Slices intern new sources without changing the store they came from
+        part = posts[1:3]
+        part.append("slice post", "Instagram", None)
+        self.assertEqual(part[-1]['source'], "Instagram")
+        self.assertEqual(sorted(posts.to_frame()['source'].cat.categories), ["Reddit", "Twitter", "manual"])
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            collector = DataCollector()
+            collector.posts = posts
+            path = os.path.join(temp_dir, 'posts.csv')
+            collector.save_to_csv(path)
+            loaded = DataCollector()
+            loaded.load_from_csv(path, chunksize=2)
+            self.assertEqual(loaded.posts.records(), posts.records())
+
+            # CSVs with only a text column still load
+            text_only = os.path.join(temp_dir, 'text_only.csv')
+            pd.DataFrame({'text': ["just text"], 'likes': [3]}).to_csv(text_only, index=False)
+            loaded.load_from_csv(text_only)
+            self.assertEqual(loaded.posts.records(), [{'text': "just text", 'source': "manual", 'timestamp': None}])
+        print("✓ Columnar post store test passed")
+
+    def test_appends_across_packed_chunks(self):
+        """Test record access and slicing once single appends fill more than one text chunk"""
+        print("\nTesting columnar appends past a text chunk...")
+        rows = TEXT_CHUNK_ROWS + 10
+        posts = ColumnarPosts()
+        for i in range(rows):
+            posts.append(f"post {i}", "manual", None)
+            # DataCollector.add_post reads the newest post straight after appending it
+            self.assertEqual(posts[-1]['text'], f"post {i}")
+        self.assertEqual(posts[0]['text'], "post 0")
+        self.assertEqual(posts[TEXT_CHUNK_ROWS - 1]['text'], f"post {TEXT_CHUNK_ROWS - 1}")
+        self.assertEqual(posts[rows - 1]['text'], f"post {rows - 1}")
+        self.assertEqual(posts.to_frame()['text'].tolist(), [f"post {i}" for i in range(rows)])
+        self.assertEqual([post['text'] for post in posts[::-1][:3]], [f"post {i}" for i in range(rows - 1, rows - 4, -1)])
+        self.assertEqual([post['text'] for post in posts[5:0:-2]], ["post 5", "post 3", "post 1"])
+        self.assertEqual(len(posts[0:5:-1]), 0)
+        print("✓ Columnar appends past a text chunk test passed")
+
+class TestPostLog(unittest.TestCase):
+    def test_append_and_recover(self):
+        """Test JSON Lines appends, lazy reads and recovery from torn writes"""
+        print("\nTesting JSON Lines post log...")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for name in ['posts.jsonl', 'posts.jsonl.gz']:
+                path = os.path.join(temp_dir, name)
+                with PostLog(path) as log:
+                    log.extend({'text': f"post {i}", 'source': "manual", 'timestamp': None} for i in range(3))
+                # A crash part way through a line
+                with open(path, 'ab') as f:
+                    f.write(b'{"text": "torn')
+                self.assertEqual([record['text'] for record in PostLog(path)], ["post 0", "post 1", "post 2"])
+
+                with PostLog(path) as log:
+                    log.append({'text': "after crash", 'source': "manual", 'timestamp': None})
+                records = PostLog(path)
+                self.assertEqual([record['text'] for record in records][-2:], ["post 2", "after crash"])
+                self.assertEqual(records.skipped, 0)
+
+            path = os.path.join(temp_dir, 'session.jsonl')
+            collector = DataCollector(log_file=path)
+            collector.add_post("first", "Twitter")
+            collector.add_post("second")
+            collector.mark_scored(1)
+            collector.close_log()
+            reopened = DataCollector(log_file=path)
+            self.assertEqual([post['text'] for post in reopened.unscored_posts()], ["second"])
+            reopened.add_post("third")
+            reopened.close_log()
+            self.assertEqual(len(list(PostLog(path))), 3)
+        print("✓ JSON Lines post log test passed")
+
+class TestScoringServer(unittest.TestCase):
+    def test_micro_batched_scoring(self):
+        """Test that concurrent clients share batches and get the same results as the engine"""
+        print("\nTesting scoring server...")
+        engine = SentimentEngine('stand-in', analyzer=build_stand_in_analyzer(full_size=False))
+        server = ScoringServer(engine, port=0, max_batch=64, max_wait_ms=50).start()
+        try:
+            client = ScoringClient(server.url)
+            self.assertEqual(client.health()['status'], 'ok')
+            requests = [[f"post {i} from analyst {analyst}" for i in range(3)] + [None] for analyst in range(8)]
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                results = list(pool.map(client.analyze, requests))
+            for texts, (labels, scores) in zip(requests, results):
+                expected_labels, expected_scores = engine.analyze(texts)
+                self.assertEqual(labels, list(expected_labels))
+                for score, expected in zip(scores, expected_scores):
+                    self.assertAlmostEqual(score, float(expected), places=5)
+
+            metrics = client.metrics()
+            self.assertEqual(metrics['requests'], 8)
+            self.assertEqual(metrics['posts'], 32)
+            self.assertLess(metrics['batches'], 8)
+            with self.assertRaises(RuntimeError):
+                client._request('/missing')
+        finally:
+            server.stop()
+        print("✓ Scoring server test passed")
+
+class TestNearDuplicates(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.story = ("I moved to a new city last spring and I still have not made a single friend here. "
+                      "Work is fine but evenings are empty and weekends feel endless. I tried meetup groups "
+                      "and a climbing gym but nobody ever talks to me twice.")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_clusters_and_fan_out(self):
+        """Test that exact and near duplicates join the first post's cluster and reuse its score"""
+        print("\nTesting duplicate clustering...")
+        texts = [self.story, "  " + self.story.upper(), self.story.replace("climbing gym", "bouldering gym"),
+                 "A completely different post about my exams", self.story]
+        clusters, kinds = DuplicateIndex().assign(texts)
+        self.assertEqual(kinds, ['', 'exact', 'near', '', 'exact'])
+        self.assertEqual(len(set(clusters)), 2)
+
+        cache = ResultCache(os.path.join(self.temp_dir.name, 'cache.db'))
+        engine = SentimentEngine('stand-in', analyzer=build_stand_in_analyzer(full_size=False), cache=cache)
+        df = DeduplicatingScorer(engine).analyze_frame(pd.DataFrame({'text': texts, 'source': ['manual'] * 5}))
+        self.assertEqual(cache.misses, 2)
+        self.assertTrue((df.groupby('cluster')['confidence'].nunique() == 1).all())
+
+        summary = AnalysisSummary.from_frame(df)
+        self.assertEqual(summary.duplicate_counts, {'exact': 2, 'near': 1})
+        self.assertEqual(summary.largest_clusters()[0][0], 4)
+        merged = AnalysisSummary.from_dict(summary.merge(summary).to_dict())
+        self.assertEqual(merged.largest_clusters()[0][0], 7)
+        cache.close()
+        print("✓ Duplicate clustering test passed")
+
+    def test_wordless_posts(self):
+        """Test that emoticon and punctuation posts only cluster with exact repeats"""
+        print("\nTesting duplicate clustering of wordless posts...")
+        texts = [':)', ':(', '<3', '!!!', '...', ':)']
+        clusters, kinds = DuplicateIndex().assign(texts)
+        self.assertEqual(kinds, ['', '', '', '', '', 'exact'])
+        self.assertEqual(len(set(clusters)), 5)
+
+        engine = SentimentEngine('stand-in', analyzer=build_stand_in_analyzer(full_size=False))
+        with mock.patch.object(engine, 'analyze', wraps=engine.analyze) as analyze:
+            labels, scores = DeduplicatingScorer(engine).analyze([':)', ':('])
+        # Both are scored by the model, not fanned out from one another
+        self.assertEqual(analyze.call_args.args[0], [':)', ':('])
+        self.assertEqual((labels, scores), engine.analyze([':)', ':(']))
+        print("✓ Wordless post clustering test passed")
+
+    def test_index_cap(self):
+        """Test that a bounded index forgets the least recently seen clusters with their band entries"""
+        print("\nTesting duplicate index cap...")
+        index = DuplicateIndex(max_clusters=2)
+        evicted = []
+        index.on_evict = evicted.append
+        texts = [self.story, "A completely different post about my exams", "Nothing much happened today at all"]
+        clusters, _ = index.assign(texts)
+        self.assertEqual(evicted, [clusters[0]])
+        self.assertEqual((len(index._exact), len(index._signatures)), (2, 2))
+        self.assertTrue(all(len(table) <= 2 for table in index._tables))
+        self.assertTrue(all(clusters[0] not in table.values() for table in index._tables))
+        # The forgotten story and its near duplicates start a new cluster; remembered posts still match
+        _, kinds = index.assign([self.story.replace("climbing gym", "bouldering gym"), texts[2]])
+        self.assertEqual(kinds, ['', 'exact'])
+        print("✓ Duplicate index cap test passed")
+
+    def test_result_cap(self):
+        """Test that representative results are capped and evicted clusters are rescored"""
+        print("\nTesting duplicate result cap...")
+        engine = SentimentEngine('stand-in', analyzer=build_stand_in_analyzer(full_size=False))
+        scorer = DeduplicatingScorer(engine, max_results=2)
+        texts = [self.story, "A completely different post about my exams", "Nothing much happened today"]
+        expected = scorer.analyze(texts)
+        self.assertEqual(len(scorer._results), 2)
+        # The story's cluster was dropped, so it is scored again and still matches
+        with mock.patch.object(engine, 'analyze', wraps=engine.analyze) as analyze:
+            labels, scores = scorer.analyze(texts)
+        self.assertEqual(labels, expected[0])
+        for score, expected_score in zip(scores, expected[1]):
+            self.assertAlmostEqual(score, expected_score, places=5)
+        self.assertEqual(analyze.call_args_list[0].args[0], [self.story])
+        self.assertEqual(len(scorer._results), 2)
+        print("✓ Duplicate result cap test passed")
+
+    def test_corpus_shards(self):
+        """Test that corpus duplicates are skipped by the workers and filled in shard order"""
+        print("\nTesting deduplicated corpus scoring...")
+        raw = pd.DataFrame({
+            'author': ['a', 'b', 'c'],
+            'created_utc': [1548939293, 1548939527, 1548939600],
+            'subreddit': ['lonely'] * 3,
+            'title': ['Alone again', 'Exams', 'Alone again'],
+            'selftext': [self.story, 'nan', self.story]
+        })
+        for folder in [os.path.join('2019', 'JAN'), os.path.join('2019', 'FEB')]:
+            os.makedirs(os.path.join(self.temp_dir.name, folder))
+            raw.to_csv(os.path.join(self.temp_dir.name, folder, 'posts.csv'), index=False)
+        files = RedditCorpus(self.temp_dir.name).discover()
+        shards = parallel_scoring.make_shards(files, rows_per_shard=2)
+        plans = parallel_scoring.plan_duplicates(files, rows_per_shard=2)
+        self.assertEqual([kinds for _, kinds in plans], [['', ''], ['exact'], ['exact', 'exact'], ['exact']])
+
+        parallel_scoring._engine = SentimentEngine('stand-in', analyzer=build_stand_in_analyzer(full_size=False))
+        results = {}
+        needed = {cluster for clusters, kinds in plans for cluster, kind in zip(clusters, kinds) if kind}
+        chunks = []
+        for shard in shards:
+            skip = np.array(plans[shard.index][1]) != ''
+            _, chunk, _, _ = parallel_scoring._score_shard(shard, skip=skip)
+            parallel_scoring._fan_out(chunk, plans[shard.index], results, needed)
+            chunks.append(chunk)
+        scored = pd.concat(chunks, ignore_index=True)
+        self.assertFalse(scored['sentiment'].isna().any())
+        by_cluster = scored.groupby('cluster')['confidence'].nunique()
+        self.assertTrue((by_cluster == 1).all())
+        print("✓ Deduplicated corpus scoring test passed")
+
+    def test_process_pool_scoring(self):
+        """Test that pool workers score the corpus with the stand-in model through the shared result cache"""
+        print("\nTesting process pool corpus scoring...")
+        raw = pd.DataFrame({
+            'author': ['a', 'b', 'c'],
+            'created_utc': [1548939293, 1548939527, 1548939600],
+            'subreddit': ['Lonely'] * 3,
+            'title': ['Alone again', 'Exams', 'New job'],
+            'selftext': [self.story, 'nan', 'finally some good news']
+        })
+        os.makedirs(os.path.join(self.temp_dir.name, '2019', 'JAN'))
+        raw.to_csv(os.path.join(self.temp_dir.name, '2019', 'JAN', 'posts.csv'), index=False)
+        files = RedditCorpus(self.temp_dir.name).discover()
+        paths = {name: os.path.join(self.temp_dir.name, name)
+                 for name in ['scores.csv', 'cache.db', 'timeline.db', 'index.db']}
+
+        outputs = []
+        for _ in range(2):
+            parallel_scoring.score_corpus(paths['scores.csv'], workers=2, rows_per_shard=2, model_name='stand-in',
+                                          files=files, timeline=paths['timeline.db'], post_index=paths['index.db'],
+                                          stress_model='', cache=paths['cache.db'], stand_in=True)
+            outputs.append(pd.read_csv(paths['scores.csv']))
+        self.assertEqual(len(outputs[0]), 3)
+        self.assertFalse(outputs[0]['sentiment'].isna().any())
+        pd.testing.assert_frame_equal(outputs[0], outputs[1])
+
+        cache = ResultCache(paths['cache.db'])
+        self.assertEqual(len(cache), 3)
+        cache.close()
+        timeline = MoodTimeline(paths['timeline.db'])
+        self.assertEqual(timeline.subreddits(), ['lonely'])
+        timeline.close()
+        index = PostIndex(paths['index.db'])
+        self.assertEqual(index.search("exams", subreddit='Lonely').total, 1)
+        index.close()
+        print("✓ Process pool corpus scoring test passed")
+
+class TestPostIndex(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.index = PostIndex(os.path.join(self.temp_dir.name, 'index.db'))
+
+    def tearDown(self):
+        self.index.close()
+        self.temp_dir.cleanup()
+
+    def test_filtered_search(self):
+        """Test word queries with sentiment, subreddit and month filters across incremental batches"""
+        print("\nTesting post index...")
+        # 1583020800 is 2020-03-01 and 1614556800 is 2021-03-01 (UTC)
+        reddit = pd.DataFrame({
+            'created_utc': [1583020800, 1583020800, 1614556800],
+            'subreddit': ['lonely', 'Anxiety', 'lonely'],
+            'title': ['Lost my job', 'Job interview tomorrow', 'New job!'],
+            'selftext': ['and I have nobody to tell', '', 'finally some good news'],
+            'sentiment': ['NEGATIVE', 'NEGATIVE', 'POSITIVE'],
+            'confidence': [0.9, 0.7, 0.95]
+        })
+        self.assertTrue(self.index.add(reddit, batch_id='2020'))
+        self.assertFalse(self.index.add(reddit, batch_id='2020'))
+        manual = pd.DataFrame({'text': ["My job is great"], 'source': ['Twitter'],
+                               'timestamp': [datetime(2020, 6, 1)], 'sentiment': ['POSITIVE'], 'confidence': [0.8]})
+        self.index.add(manual)
+
+        self.assertEqual(len(self.index), 4)
+        self.assertEqual(self.index.search("job").total, 4)
+        results = self.index.search("job", sentiment='negative', subreddit='lonely', start='2020', end='2020')
+        self.assertEqual(results.total, 1)
+        self.assertEqual(results.posts['title'].tolist(), ['Lost my job'])
+        self.assertEqual(results.posts['month'].tolist(), ['2020-03'])
+        self.assertEqual(self.index.search("job news").total, 1)
+        self.assertEqual(self.index.search("job", start='2020-04').total, 2)
+        self.assertEqual(self.index.search("job", min_confidence=0.85).total, 2)
+        self.assertEqual(self.index.search("", subreddit='twitter').total, 1)
+        self.assertEqual(self.index.search("unemployed").total, 0)
+        self.assertEqual(self.index.search("the").total, 0)
+        self.assertEqual(self.index.search("  ").total, 4)
+
+        self.index._merge_segments()
+        self.assertEqual(self.index.search("job", limit=2).total, 4)
+        self.assertEqual(len(self.index.search("job", limit=2).posts), 2)
+        print("✓ Post index test passed")
+
+class TestProfiling(unittest.TestCase):
+    def tearDown(self):
+        PROFILER.disable()
+        PROFILER.reset()
+
+    def test_spans_and_exports(self):
+        """Test that pipeline stages are timed across threads and exported as JSON, Chrome trace and pstats"""
+        print("\nTesting profiling hooks...")
+        engine = SentimentEngine('stand-in', analyzer=build_stand_in_analyzer(full_size=False))
+        with span('disabled'):
+            engine.analyze(["Nothing is recorded yet"])
+        self.assertEqual(PROFILER.spans, [])
+
+        PROFILER.reset()
+        PROFILER.enable(cprofile=True)
+        with span('outer', posts=2):
+            engine.analyze(["I love this", "I hate this"])
+
+        def work():
+            with span('worker'):
+                engine.analyze(["A post scored on another thread"])
+
+        worker = threading.Thread(target=work)
+        worker.start()
+        worker.join()
+        PROFILER.disable()
+
+        stages = {stage['name']: stage for stage in PROFILER.summary()}
+        self.assertTrue({'outer', 'tokenize', 'inference', 'worker'} <= set(stages))
+        self.assertNotIn('disabled', stages)
+        self.assertTrue(all(s['depth'] >= 1 for s in PROFILER.spans if s['name'] == 'inference'))
+        self.assertEqual(PROFILER.counters['posts_scored'], 3)
+        outer = next(s for s in PROFILER.spans if s['name'] == 'outer')
+        self.assertEqual((outer['depth'], outer['args']), (0, {'posts': 2}))
+        self.assertEqual(len({s['thread_id'] for s in PROFILER.spans}), 2)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            files = PROFILER.export(os.path.join(temp_dir, 'run'))
+            self.assertEqual([os.path.basename(f) for f in files], ['run.json', 'run.trace.json', 'run.prof'])
+            with open(files[0], encoding='utf-8') as f:
+                self.assertEqual(len(json.load(f)['spans']), len(PROFILER.spans))
+            with open(files[1], encoding='utf-8') as f:
+                events = json.load(f)['traceEvents']
+            self.assertEqual(sum(event['ph'] == 'X' for event in events), len(PROFILER.spans))
+            self.assertIn('posts_scored', {event['name'] for event in events if event['ph'] == 'C'})
+        print("✓ Profiling hooks test passed")
+
+class TestEvaluation(unittest.TestCase):
+    def test_labelled_evaluation(self):
+        """Test that labelled posts are scored per setting with negative-rate, confusion counts and timings"""
+        print("\nTesting labelled evaluation...")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            results = evaluation.run_evaluation(batch_sizes=(4, 16), max_lengths=(64,), model_name='stand-in',
+                                                analyzer=build_stand_in_analyzer(full_size=False), limit=24,
+                                                output_dir=temp_dir)
+            self.assertEqual(len(os.listdir(temp_dir)), 1)
+        self.assertEqual([(r['batch_size'], r['max_length'], r['posts']) for r in results], [(4, 64, 24), (16, 64, 24)])
+        for result in results:
+            self.assertTrue(0 <= result['negative_rate'] <= 1)
+            self.assertGreater(result['posts_per_sec'], 0)
+            self.assertEqual(sum(result['confusion']['All'].values()), 2 * 24)
+            negatives = result['confusion']['All'].get(evaluation.PROXY_SENTIMENT, 0)
+            self.assertAlmostEqual(result['negative_rate'], negatives / 24)
+        # Batching never changes the predictions
+        self.assertEqual(results[0]['confusion'], results[1]['confusion'])
+        print("✓ Labelled evaluation test passed")
+
+class TestStressClassifier(unittest.TestCase):
+    def setUp(self):
+        """Train on a few posts per stress category"""
+        self.texts = ["I drank a whole bottle of vodka again", "Relapsed on pills and beer last night",
+                      "My parents yelled at me every day as a child", "Growing up my childhood home was scary",
+                      "I am too shy and introverted to talk to anyone", "My personality makes people avoid me"]
+        self.labels = ['Drug and alcohol', 'Drug and alcohol', 'Early life', 'Early life',
+                       'Personality', 'Personality']
+        self.classifier = StressClassifier(n_features=2 ** 12).train(self.texts, self.labels)
+
+    def test_per_class_scores(self):
+        """Test that posts get a category, a score per category and a summary row per category"""
+        print("\nTesting stress classifier...")
+        self.assertEqual(self.classifier.classes, ['Drug and alcohol', 'Early life', 'Personality'])
+        self.assertEqual(self.classifier.evaluate(self.texts, self.labels)['accuracy'], 1.0)
+
+        df = self.classifier.score_frame(pd.DataFrame({
+            'text': ["so much vodka and pills", "my childhood and my parents"], 'source': ['Reddit'] * 2,
+            'sentiment': ['NEGATIVE'] * 2, 'confidence': [0.9, 0.8]}))
+        self.assertEqual(df['stress'].tolist(), ['Drug and alcohol', 'Early life'])
+        scores = df[[score_column(label) for label in self.classifier.classes]]
+        np.testing.assert_allclose(scores.sum(axis=1), 1.0, rtol=1e-5)
+        np.testing.assert_allclose(scores.max(axis=1), df['stress_confidence'])
+
+        summary = AnalysisSummary.from_frame(df).merge(AnalysisSummary.from_frame(df))
+        summary = AnalysisSummary.from_dict(json.loads(json.dumps(summary.to_dict())))
+        rows = {category: (count, mean_score) for category, count, _, mean_score in summary.stress_distribution()}
+        self.assertEqual(rows['Drug and alcohol'][0], 2)
+        self.assertEqual(rows['Personality'][0], 0)
+        self.assertAlmostEqual(sum(mean_score for _, mean_score in rows.values()), 1.0, places=5)
+        print("✓ Stress classifier test passed")
+
+    def test_persistence(self):
+        """Test that a saved stress classifier gives the same scores as the original"""
+        print("\nTesting stress classifier persistence...")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'stress.joblib')
+            self.classifier.save(path)
+            loaded = StressClassifier.load(path)
+        pd.testing.assert_frame_equal(loaded.predict_proba(self.texts), self.classifier.predict_proba(self.texts))
+        print("✓ Stress classifier persistence test passed")
+
 def generate_test_report():
     """Generate a comprehensive test report"""
     print("\nGenerating Test Report...")
@@ -58,7 +1073,30 @@ def generate_test_report():
         os.makedirs('test_results')
     
     # Run tests
-    test_suite = unittest.TestLoader().loadTestsFromTestCase(TestMoodDetection)
+    loader = unittest.TestLoader()
+    test_suite = unittest.TestSuite([
+        loader.loadTestsFromTestCase(TestMoodDetection),
+        loader.loadTestsFromTestCase(TestSentimentEngine),
+        loader.loadTestsFromTestCase(TestInferenceBackends),
+        loader.loadTestsFromTestCase(TestModelRegistry),
+        loader.loadTestsFromTestCase(TestResultCache),
+        loader.loadTestsFromTestCase(TestRedditCorpus),
+        loader.loadTestsFromTestCase(TestScoredPostStore),
+        loader.loadTestsFromTestCase(TestCascadeClassifier),
+        loader.loadTestsFromTestCase(TestTextPreprocessing),
+        loader.loadTestsFromTestCase(TestAnalysisSummary),
+        loader.loadTestsFromTestCase(TestSummaryCharts),
+        loader.loadTestsFromTestCase(TestReportGenerator),
+        loader.loadTestsFromTestCase(TestMoodTimeline),
+        loader.loadTestsFromTestCase(TestColumnarPosts),
+        loader.loadTestsFromTestCase(TestPostLog),
+        loader.loadTestsFromTestCase(TestScoringServer),
+        loader.loadTestsFromTestCase(TestNearDuplicates),
+        loader.loadTestsFromTestCase(TestPostIndex),
+        loader.loadTestsFromTestCase(TestProfiling),
+        loader.loadTestsFromTestCase(TestEvaluation),
+        loader.loadTestsFromTestCase(TestStressClassifier)
+    ])
     test_runner = unittest.TextTestRunner(verbosity=2)
     test_results = test_runner.run(test_suite)
     
@@ -102,6 +1140,26 @@ def main():
     print("   - Data Collection")
     print("   - Data Saving")
     print("   - Sentiment Analysis")
+    print("   - Batched Sentiment Engine")
+    print("   - Inference Backends")
+    print("   - Model Registry")
+    print("   - Result Cache")
+    print("   - Reddit Corpus Loader")
+    print("   - Scored Post Store")
+    print("   - Cascade Classifier")
+    print("   - Text Preprocessing")
+    print("   - Analysis Summary")
+    print("   - Chart Cache")
+    print("   - Report Generator")
+    print("   - Mood Timeline")
+    print("   - Columnar Post Store")
+    print("   - JSON Lines Post Log")
+    print("   - Scoring Server")
+    print("   - Near-Duplicate Detection")
+    print("   - Post Search Index")
+    print("   - Profiling Hooks")
+    print("   - Labelled Evaluation")
+    print("   - Stress Classifier")
     print("   - Visualization Generation")
 
 if __name__ == "__main__":
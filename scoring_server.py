@@ -0,0 +1,301 @@
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from inference_backends import BACKENDS, DEFAULT_BACKEND
+from model_registry import DEFAULT_MODEL
+from result_cache import ResultCache
+from sentiment_engine import SentimentEngine
+from stand_in_model import build_stand_in_analyzer
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_SERVER_URL = f'http://{DEFAULT_HOST}:{DEFAULT_PORT}'
+# Frontends score through this server when it is set instead of loading their own model
+SERVER_URL = os.environ.get('MOOD_SCORING_SERVER') or None
+
+# Largest request body accepted (bytes)
+MAX_BODY = 64 * 1024 * 1024
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+class _Pending:
+    """Texts from one request waiting for a micro-batch"""
+    __slots__ = ('texts', 'future', 'queued')
+
+    def __init__(self, texts, future):
+        self.texts = texts
+        self.future = future
+        self.queued = time.perf_counter()
+
+class ScoringServer:
+    """Local HTTP service sharing one warm SentimentEngine, coalescing concurrent requests into micro-batches
+
+    POST /score {"texts": [...]} -> {"labels": [...], "scores": [...]}
+    GET /health, GET /metrics
+    """
+
+    def __init__(self, engine, host=DEFAULT_HOST, port=DEFAULT_PORT, max_batch=64, max_wait_ms=10):
+        self.engine = engine
+        self.host = host
+        self.port = port
+        # A batch is scored once it holds max_batch posts or its first request has waited max_wait_ms
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.started = None
+        self.requests = 0
+        self.posts = 0
+        self.batches = 0
+        self.batched_posts = 0
+        self.largest_batch = 0
+        self.errors = 0
+        self._latencies = deque(maxlen=1000)
+        self._loop = None
+        self._queue = None
+        self._stopping = None
+        self._thread = None
+
+    def serve_forever(self):
+        asyncio.run(self._serve())
+
+    def start(self):
+        """Serve from a background thread; returns once the port is bound"""
+        ready = threading.Event()
+        self._thread = threading.Thread(target=asyncio.run, args=(self._serve(ready),), daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stopping.set)
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    @property
+    def url(self):
+        return f'http://{self.host}:{self.port}'
+
+    def metrics(self):
+        latencies = sorted(self._latencies)
+
+        def percentile(q):
+            return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else 0.0
+
+        metrics = {
+            'uptime_s': time.time() - self.started if self.started else 0.0,
+            'requests': self.requests,
+            'posts': self.posts,
+            'errors': self.errors,
+            'batches': self.batches,
+            'avg_batch_posts': self.batched_posts / self.batches if self.batches else 0.0,
+            'largest_batch': self.largest_batch,
+            'queued_requests': self._queue.qsize() if self._queue is not None else 0,
+            'latency_p50_ms': percentile(0.5),
+            'latency_p95_ms': percentile(0.95)
+        }
+        if getattr(self.engine, 'cache', None) is not None:
+            metrics['cache'] = self.engine.cache.stats()
+        return metrics
+
+    async def _serve(self, ready=None):
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._stopping = asyncio.Event()
+        # The model runs in one worker thread so the event loop keeps accepting requests meanwhile
+        executor = ThreadPoolExecutor(max_workers=1)
+        server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = server.sockets[0].getsockname()[1]
+        self.started = time.time()
+        batcher = asyncio.create_task(self._batcher(executor))
+        print(f"Scoring server listening on {self.url}")
+        if ready is not None:
+            ready.set()
+        try:
+            await self._stopping.wait()
+        finally:
+            server.close()
+            await server.wait_closed()
+            batcher.cancel()
+            executor.shutdown(wait=True)
+
+    async def _batcher(self, executor):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            size = len(batch[0].texts)
+            deadline = loop.time() + self.max_wait
+            while size < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                size += len(item.texts)
+
+            texts = [text for item in batch for text in item.texts]
+            try:
+                labels, scores = await loop.run_in_executor(executor, self.engine.analyze, texts)
+            except Exception as e:
+                for item in batch:
+                    if not item.future.done():
+                        item.future.set_exception(e)
+                continue
+            self.batches += 1
+            self.batched_posts += len(texts)
+            self.largest_batch = max(self.largest_batch, len(texts))
+            offset = 0
+            for item in batch:
+                end = offset + len(item.texts)
+                if not item.future.done():
+                    item.future.set_result((list(labels[offset:end]), [float(score) for score in scores[offset:end]]))
+                offset = end
+
+    async def _handle(self, reader, writer):
+        """One request per connection (HTTP/1.1 with Connection: close)"""
+        try:
+            request_line = await reader.readline()
+            if not request_line:
+                writer.close()
+                return
+            method, path = request_line.decode('latin-1').split()[:2]
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            length = int(headers.get('content-length', 0))
+            if length > MAX_BODY:
+                status, payload = 413, {'error': f"request body over {MAX_BODY} bytes"}
+            else:
+                status, payload = await self._route(method, path.split('?')[0], await reader.readexactly(length))
+        except (ValueError, asyncio.IncompleteReadError) as e:
+            status, payload = 400, {'error': f"malformed request: {e}"}
+        except ConnectionError:
+            writer.close()
+            return
+
+        body = json.dumps(payload).encode('utf-8')
+        writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode('latin-1') + body)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, body):
+        if path == '/health':
+            return 200, {'status': 'ok', 'model': self.engine.model_name,
+                         'backend': getattr(getattr(self.engine, 'backend', None), 'name', None)}
+        if path == '/metrics':
+            return 200, self.metrics()
+        if path != '/score':
+            return 404, {'error': f"unknown endpoint {path}"}
+        if method != 'POST':
+            return 405, {'error': "use POST for /score"}
+
+        try:
+            texts = json.loads(body)['texts']
+        except (ValueError, KeyError, TypeError):
+            return 400, {'error': 'expected a JSON body {"texts": [...]}'}
+        if not isinstance(texts, list):
+            return 400, {'error': "texts must be a list"}
+        texts = [text if isinstance(text, str) else "" for text in texts]
+
+        self.requests += 1
+        self.posts += len(texts)
+        pending = _Pending(texts, self._loop.create_future())
+        if texts:
+            self._queue.put_nowait(pending)
+        else:
+            pending.future.set_result(([], []))
+        try:
+            labels, scores = await pending.future
+        except Exception as e:
+            self.errors += 1
+            return 500, {'error': f"{type(e).__name__}: {e}"}
+        self._latencies.append(time.perf_counter() - pending.queued)
+        return 200, {'labels': labels, 'scores': scores}
+
+class ScoringClient:
+    """Drop-in for SentimentEngine.analyze that scores through a running ScoringServer"""
+
+    def __init__(self, url=DEFAULT_SERVER_URL, timeout=300, batch_size=32):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        # Posts per call the GUI sends at a time, as with SentimentEngine
+        self.batch_size = batch_size
+        # Results are cached on the server side
+        self.cache = None
+        self.model_name = self.health()['model']
+
+    def analyze(self, texts):
+        """Score an iterable of texts and return (labels, scores) in input order"""
+        texts = [text if isinstance(text, str) else "" for text in texts]
+        result = self._request('/score', {'texts': texts})
+        return result['labels'], result['scores']
+
+    def health(self):
+        return self._request('/health')
+
+    def metrics(self):
+        return self._request('/metrics')
+
+    def _request(self, path, payload=None):
+        data = None if payload is None else json.dumps(payload).encode('utf-8')
+        request = urllib.request.Request(self.url + path, data=data,
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            message = e.read().decode('utf-8', 'replace')
+            try:
+                message = json.loads(message)['error']
+            except (ValueError, KeyError):
+                pass
+            raise RuntimeError(f"Scoring server {self.url} returned {e.code}: {message}") from None
+        except urllib.error.URLError as e:
+            raise ConnectionError(f"Cannot reach the scoring server at {self.url}: {e.reason}") from None
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve one shared sentiment model over local HTTP")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--model', default=DEFAULT_MODEL)
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default=DEFAULT_BACKEND)
+    parser.add_argument('--max-batch', type=int, default=64, help="posts per micro-batch")
+    parser.add_argument('--max-wait-ms', type=float, default=10,
+                        help="how long the first request of a batch waits for others to join")
+    parser.add_argument('--stand-in', action='store_true',
+                        help="serve a deterministic local model instead of downloading DistilBERT")
+    args = parser.parse_args()
+
+    if args.stand_in:
+        engine = SentimentEngine('stand-in', analyzer=build_stand_in_analyzer(), cache=ResultCache(),
+                                 backend=args.backend)
+    else:
+        engine = SentimentEngine(args.model, cache=ResultCache(), backend=args.backend)
+    server = ScoringServer(engine, args.host, args.port, args.max_batch, args.max_wait_ms)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nScoring server stopped")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+import time
+import torch
+from inference_backends import DEFAULT_BACKEND, create_backend
+from model_registry import DEFAULT_MODEL, get_backend, get_pipeline
+from profiling import count, span
+
+def _mean_reducer(probs, lengths):
+    return probs.mean(dim=0)
+
+def _weighted_reducer(probs, lengths):
+    weights = lengths.float() / lengths.sum()
+    return (probs * weights[:, None]).sum(dim=0)
+
+def _max_reducer(probs, lengths):
+    return probs[probs.max(dim=-1).values.argmax()]
+
+def _vote_reducer(probs, lengths):
+    votes = torch.bincount(probs.argmax(dim=-1), minlength=probs.shape[1])
+    return votes.float() / len(probs)
+
+# Ways to turn per-window class probabilities into one post-level distribution
+REDUCERS = {
+    'mean': _mean_reducer,
+    'weighted': _weighted_reducer,
+    'max': _max_reducer,
+    'vote': _vote_reducer
+}
+
+class SentimentEngine:
+    """Batched sentiment scoring over whole columns of posts
+
+    on_batch, when set, is called as on_batch(posts, seconds) after every model batch.
+    """
+
+    def __init__(self, model_name=DEFAULT_MODEL, analyzer=None, batch_size=32,
+                 max_batch_tokens=8192, max_length=512, cache=None, backend=DEFAULT_BACKEND):
+        self.model_name = model_name
+        self.cache = cache
+        self.on_batch = None
+        with span('model_load', model=model_name, backend=backend):
+            if analyzer is None:
+                analyzer = get_pipeline(model_name)
+                self.backend = get_backend(model_name, backend)
+            else:
+                self.backend = create_backend(backend, analyzer.model, model_name)
+        self.tokenizer = analyzer.tokenizer
+        self.model = analyzer.model
+        self.batch_size = batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.max_length = min(max_length, self.tokenizer.model_max_length)
+        # Texts differing only in case can share a cached result only if the tokenizer folds case
+        self.lowercase = bool(getattr(self.tokenizer, 'do_lower_case', False))
+        # Cached results are only reused for the exact model weights and backend that produced them
+        self.revision = getattr(self.model.config, '_commit_hash', None) or 'local'
+        if self.backend.name != 'pytorch':
+            self.revision = f"{self.revision}+{self.backend.name}"
+
+    def analyze(self, texts):
+        """Score an iterable of texts and return (labels, scores) in input order"""
+        return self._cached(self._clean(texts), self._cache_revision(), self._score)
+
+    def analyze_long(self, texts, reducer='mean', overlap=128):
+        """Score long texts over overlapping token windows and reduce to one label per post
+
+        reducer is a name from REDUCERS or a callable taking the window probabilities
+        and window lengths of one post and returning its class probabilities.
+        """
+        reduce = REDUCERS[reducer] if isinstance(reducer, str) else reducer
+
+        def score(batch):
+            return self._score_long(batch, reduce, overlap)
+
+        texts = self._clean(texts)
+        # Custom reducers have no stable name to key cached results on
+        if not isinstance(reducer, str):
+            return score(texts)
+        return self._cached(texts, self._cache_revision(f"long-{reducer}-{overlap}"), score)
+
+    def _clean(self, texts):
+        return [text if isinstance(text, str) else "" for text in texts]
+
+    def _cache_revision(self, mode=None):
+        """Revision cached results are keyed on: the weights, backend and every setting that changes a score
+
+        Built per call because max_length can be changed on a live engine.
+        """
+        revision = f"{self.revision}/max{self.max_length}"
+        return f"{revision}/{mode}" if mode else revision
+
+    def _cached(self, texts, revision, score):
+        """Serve what the cache has and score the distinct misses with score()"""
+        if self.cache is None:
+            return score(texts)
+
+        keys = [self.cache.make_key(text, self.model_name, revision, self.lowercase) for text in texts]
+        with span('cache_lookup', posts=len(keys)):
+            cached = self.cache.get_many(keys)
+
+        # Repeated texts share a key, so each distinct miss is scored once
+        pending = {}
+        for i, key in enumerate(keys):
+            if key not in cached:
+                pending.setdefault(key, i)
+        count('cache_hits', len(keys) - len(pending))
+        count('cache_misses', len(pending))
+        if pending:
+            new_labels, new_scores = score([texts[i] for i in pending.values()])
+            fresh = list(zip(pending, new_labels, new_scores))
+            with span('cache_store', posts=len(fresh)):
+                self.cache.put_many(fresh)
+            cached.update((key, (label, value)) for key, label, value in fresh)
+
+        return [cached[key][0] for key in keys], [cached[key][1] for key in keys]
+
+    def _score(self, texts):
+        """Run texts, truncated to the model limit, through the model"""
+        if not texts:
+            return [], []
+        with span('tokenize', posts=len(texts)):
+            encodings = self.tokenizer(texts, truncation=True, max_length=self.max_length)['input_ids']
+        count('posts_scored', len(texts))
+        return self._labels(self._probabilities(encodings))
+
+    def _score_long(self, texts, reduce, overlap):
+        """Split texts into overlapping windows, score all windows together and reduce per post"""
+        if not texts:
+            return [], []
+        window = self.max_length - self.tokenizer.num_special_tokens_to_add()
+        if not 0 <= overlap < window:
+            raise ValueError(f"overlap must be between 0 and {window - 1} tokens")
+        step = window - overlap
+
+        prefix, suffix = self._special_tokens()
+        with span('tokenize', posts=len(texts)):
+            token_ids = self.tokenizer(texts, add_special_tokens=False, verbose=False)['input_ids']
+        count('posts_scored', len(texts))
+        encodings = []
+        spans = []
+        for ids in token_ids:
+            begin = len(encodings)
+            # Every window stays within max_length, so batch sizes stay predictable
+            for start in range(0, max(len(ids) - overlap, 1), step):
+                encodings.append(prefix + ids[start:start + window] + suffix)
+            spans.append((begin, len(encodings)))
+
+        window_probs = self._probabilities(encodings)
+        window_lengths = torch.tensor([len(encoding) for encoding in encodings])
+        post_probs = torch.stack([reduce(window_probs[begin:end], window_lengths[begin:end])
+                                  for begin, end in spans])
+        return self._labels(post_probs)
+
+    def _special_tokens(self):
+        """Token ids the tokenizer puts before and after a single sequence ([CLS] / [SEP])"""
+        bare = self.tokenizer("a", add_special_tokens=False)['input_ids']
+        full = self.tokenizer("a")['input_ids']
+        start = next(i for i in range(len(full)) if full[i:i + len(bare)] == bare)
+        return full[:start], full[start + len(bare):]
+
+    def _labels(self, probs):
+        """Convert class probabilities into label names and confidence scores"""
+        confidence, predicted = probs.max(dim=-1)
+        labels = [self.model.config.id2label[label_id] for label_id in predicted.tolist()]
+        return labels, confidence.tolist()
+
+    def _probabilities(self, encodings):
+        """Class probabilities for encoded inputs, computed in length-sorted batches"""
+        probs = torch.empty(len(encodings), self.model.config.num_labels)
+        # Sorting by token length keeps padding inside each batch to a minimum
+        order = sorted(range(len(encodings)), key=lambda i: len(encodings[i]))
+        for batch in self._batches(order, encodings):
+            probs[batch] = self._forward([encodings[i] for i in batch])
+        return probs
+
+    def _batches(self, order, encodings):
+        """Group length-sorted indices into batches bounded by size and padded token count"""
+        batch = []
+        for i in order:
+            # Lengths are ascending, so the current post sets the padded width
+            width = len(encodings[i])
+            if batch and (len(batch) >= self.batch_size or
+                          (len(batch) + 1) * width > self.max_batch_tokens):
+                yield batch
+                batch = []
+            batch.append(i)
+        if batch:
+            yield batch
+
+    def _forward(self, input_ids):
+        """Run one padded batch through the model and return class probabilities"""
+        padded = self.tokenizer.pad({'input_ids': input_ids}, return_tensors='pt')
+        count('batches')
+        count('padded_tokens', padded['input_ids'].numel())
+        started = time.perf_counter()
+        with span('inference', posts=len(input_ids), width=padded['input_ids'].shape[1]):
+            logits = self.backend.logits(padded['input_ids'], padded['attention_mask'])
+        probs = torch.softmax(logits.float(), dim=-1)
+        if self.on_batch is not None:
+            self.on_batch(len(input_ids), time.perf_counter() - started)
+        return probs
@@ -0,0 +1,46 @@
+import os
+import string
+import tempfile
+from types import SimpleNamespace
+import torch
+from transformers import DistilBertConfig, DistilBertForSequenceClassification, DistilBertTokenizerFast
+
+# Common words so typical posts tokenize to roughly realistic lengths
+COMMON_WORDS = """
+the be to of and a in that have i it for not on with he as you do at this but his by from they we
+say her she or an will my one all would there their what so up out if about who get which go me when
+make can like time no just him know take people into year your good some could them see other than
+then now look only come its over think also back after use two how our work first well way even new
+want because any these give day most us feel feeling life lonely alone friends friend family really
+don't can't i'm i've it's im dont anyone someone never always nothing everything want need help love
+sad happy hate tired anxiety anxious depression depressed talk hard school job home night years
+""".split()
+
+def build_stand_in_analyzer(full_size=True, seed=0):
+    """Deterministic offline replacement for the SST-2 pipeline (tokenizer + model)
+
+    With full_size the network has DistilBERT's real dimensions, so timings are
+    representative; the weights are seeded random, so labels are meaningless.
+    """
+    specials = ['[PAD]', '[UNK]', '[CLS]', '[SEP]', '[MASK]']
+    characters = list(string.ascii_lowercase + string.digits + string.punctuation)
+    vocab = specials + characters + ['##' + c for c in characters] + COMMON_WORDS
+    vocab = list(dict.fromkeys(vocab))
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        vocab_file = os.path.join(temp_dir, 'vocab.txt')
+        with open(vocab_file, 'w', encoding='utf-8') as f:
+            f.write("\n".join(vocab))
+        tokenizer = DistilBertTokenizerFast(vocab_file=vocab_file, model_max_length=512)
+
+    if full_size:
+        config = DistilBertConfig(vocab_size=len(vocab))
+    else:
+        config = DistilBertConfig(vocab_size=len(vocab), dim=32, hidden_dim=64, n_layers=2, n_heads=2)
+    config.id2label = {0: 'NEGATIVE', 1: 'POSITIVE'}
+    config.label2id = {'NEGATIVE': 0, 'POSITIVE': 1}
+
+    torch.manual_seed(seed)
+    model = DistilBertForSequenceClassification(config)
+    model.eval()
+    return SimpleNamespace(tokenizer=tokenizer, model=model)
@@ -0,0 +1,161 @@
+import argparse
+import os
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import classification_report, confusion_matrix
+from sklearn.model_selection import train_test_split
+from reddit_corpus import RedditCorpus, load_labelled_posts, post_text
+from text_preprocessing import clean_series
+
+DEFAULT_STRESS_MODEL_PATH = os.path.join('models', 'stress_classifier.joblib')
+
+def score_column(label):
+    """Name of the column holding one stress category's score ('stress[Early life]')"""
+    return f"stress[{label}]"
+
+class StressClassifier:
+    """Hashed word n-gram features and a linear model over the labelled stress categories
+
+    Hashing needs no fitted vocabulary, so features take fixed memory and texts are
+    transformed independently of each other, chunk by chunk.
+    """
+
+    def __init__(self, n_features=2 ** 20, ngram_range=(1, 2), alpha=1e-4, epochs=30, seed=0):
+        # Texts arrive lowercased and stripped of URLs, punctuation and digits from clean_series
+        self.vectorizer = HashingVectorizer(n_features=n_features, ngram_range=ngram_range, lowercase=False,
+                                            alternate_sign=False, norm='l2', dtype=np.float32)
+        # Logistic loss gives per-class probabilities; balanced weights keep small categories visible
+        self.classifier = SGDClassifier(loss='log_loss', alpha=alpha, max_iter=epochs, tol=None,
+                                        class_weight='balanced', random_state=seed)
+
+    @property
+    def classes(self):
+        return [str(label) for label in self.classifier.classes_]
+
+    def features(self, texts):
+        return self.vectorizer.transform(clean_series(texts))
+
+    def train(self, texts, labels):
+        """Fit the linear model on texts labelled with their stress category"""
+        self.classifier.fit(self.features(texts), np.asarray(labels))
+        return self
+
+    def predict_proba(self, texts):
+        """Per-class scores as a DataFrame with one column per stress category"""
+        if len(texts) == 0:
+            return pd.DataFrame(columns=self.classes, dtype=float)
+        return pd.DataFrame(self.classifier.predict_proba(self.features(texts)), columns=self.classes)
+
+    def analyze(self, texts):
+        """Most likely stress category and its score for each text, in input order"""
+        probs = self.predict_proba(texts)
+        if probs.empty:
+            return [], []
+        return probs.idxmax(axis=1).tolist(), probs.max(axis=1).tolist()
+
+    def score_frame(self, df, text_column='text'):
+        """Add stress, stress_confidence and one stress[<category>] score column per category"""
+        probs = self.predict_proba(df[text_column].tolist())
+        df['stress'] = probs.idxmax(axis=1).to_numpy() if len(probs) else []
+        df['stress_confidence'] = probs.max(axis=1).to_numpy(dtype=float) if len(probs) else []
+        for label in self.classes:
+            df[score_column(label)] = probs[label].to_numpy(dtype=float)
+        return df
+
+    def evaluate(self, texts, labels):
+        """Accuracy, macro F1, per-class precision/recall and the confusion matrix for labelled texts"""
+        predicted, _ = self.analyze(texts)
+        labels = [str(label) for label in labels]
+        report = classification_report(labels, predicted, labels=self.classes, output_dict=True, zero_division=0)
+        return {
+            'posts': len(labels),
+            'accuracy': float(np.mean(np.array(predicted) == np.array(labels))) if labels else 0.0,
+            'macro_f1': report['macro avg']['f1-score'],
+            'per_class': {label: report[label] for label in self.classes},
+            'confusion': pd.DataFrame(confusion_matrix(labels, predicted, labels=self.classes),
+                                      index=self.classes, columns=self.classes)
+        }
+
+    def save(self, path=DEFAULT_STRESS_MODEL_PATH):
+        """Persist the fitted linear model and the hashing settings it was trained with"""
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        joblib.dump({'vectorizer': self.vectorizer, 'classifier': self.classifier}, path)
+        print(f"Stress classifier saved to {path}")
+
+    @classmethod
+    def load(cls, path=DEFAULT_STRESS_MODEL_PATH):
+        state = joblib.load(path)
+        classifier = cls()
+        classifier.vectorizer = state['vectorizer']
+        classifier.classifier = state['classifier']
+        return classifier
+
+def load_default_classifier(path=DEFAULT_STRESS_MODEL_PATH):
+    """The trained stress classifier, or None until train_stress_classifier has been run"""
+    return StressClassifier.load(path) if os.path.exists(path) else None
+
+def train_stress_classifier(path=DEFAULT_STRESS_MODEL_PATH, test_size=0.25, seed=42):
+    """Train on the labelled posts, report held-out quality, then refit on every post and save"""
+    posts = load_labelled_posts()
+    posts = posts[posts['label'].notna()].reset_index(drop=True)
+    texts = post_text(posts).tolist()
+    labels = posts['label'].tolist()
+    train_texts, test_texts, train_labels, test_labels = train_test_split(
+        texts, labels, test_size=test_size, random_state=seed, stratify=labels)
+
+    started = time.perf_counter()
+    held_out = StressClassifier().train(train_texts, train_labels)
+    train_seconds = time.perf_counter() - started
+    results = held_out.evaluate(test_texts, test_labels)
+
+    print(f"Trained on {len(train_texts)} labelled posts in {train_seconds:.2f}s")
+    print(f"Held-out accuracy: {results['accuracy'] * 100:.1f}% (macro F1 {results['macro_f1']:.3f}) "
+          f"on {results['posts']} posts")
+    for label, scores in results['per_class'].items():
+        print(f"  {label}: precision {scores['precision']:.2f}, recall {scores['recall']:.2f}")
+    print(results['confusion'].to_string())
+
+    classifier = StressClassifier().train(texts, labels)
+    classifier.save(path)
+    return classifier, results
+
+def score_corpus(output='stress_scores.csv', path=DEFAULT_STRESS_MODEL_PATH, chunksize=20000, files=None):
+    """Classify every raw Reddit post into a stress category, streaming the corpus chunk by chunk"""
+    classifier = StressClassifier.load(path)
+    corpus = RedditCorpus()
+    files = corpus.discover() if files is None else files
+    started = time.perf_counter()
+    total = 0
+    for corpus_file in files:
+        for chunk in corpus.read_file(corpus_file, chunksize=chunksize):
+            scored = pd.DataFrame({'created_utc': chunk['created_utc'], 'subreddit': chunk['subreddit'],
+                                   'source_file': chunk['source_file'], 'text': post_text(chunk)})
+            classifier.score_frame(scored).drop(columns='text').to_csv(
+                output, mode='w' if total == 0 else 'a', header=total == 0, index=False)
+            total += len(scored)
+    elapsed = time.perf_counter() - started
+    print(f"Classified {total} posts in {elapsed:.1f}s ({total / elapsed if elapsed else 0.0:.0f} posts/sec)")
+    print(f"Results saved to {output}")
+    return output
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the stress category classifier or score the corpus with it")
+    parser.add_argument('--model', default=DEFAULT_STRESS_MODEL_PATH)
+    parser.add_argument('--test-size', type=float, default=0.25, help="share of labelled posts held out")
+    parser.add_argument('--score-corpus', metavar='OUTPUT_CSV', default=None,
+                        help="classify the raw Reddit corpus with a trained model instead of training")
+    args = parser.parse_args()
+
+    if args.score_corpus:
+        score_corpus(args.score_corpus, args.model)
+    else:
+        train_stress_classifier(args.model, args.test_size)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import pandas as pd
+import seaborn as sns
+from profiling import count, span
+
+# Bump when chart styling changes so cached PNGs are redrawn
+CHART_VERSION = 1
+
+FINGERPRINT_FILE = 'chart_fingerprints.json'
+
+# Report charts drawn from an AnalysisSummary onto a given matplotlib Axes
+
+def plot_sentiment_distribution(ax, summary):
+    rows = summary.sentiment_distribution()
+    ax.pie([count for _, count, _ in rows], labels=[sentiment for sentiment, _, _ in rows],
+           autopct='%1.1f%%', colors=['lightgreen', 'lightcoral'])
+    ax.set_title('Sentiment Distribution')
+
+def plot_length_distribution(ax, summary):
+    lengths, counts = summary.length_histogram()
+    sns.histplot(x=lengths, weights=counts, bins=20, ax=ax)
+    ax.set_xlabel('text_length')
+    ax.set_title('Post Length Distribution')
+
+def plot_source_distribution(ax, summary):
+    rows = summary.source_distribution()
+    ax.bar([str(source) for source, _, _ in rows], [count for _, count, _ in rows])
+    ax.set_title('Posts by Source')
+    ax.tick_params(axis='x', labelrotation=45)
+
+def plot_confidence(ax, summary):
+    stats = summary.confidence_box_stats()
+    if stats:
+        ax.bxp(stats, patch_artist=True, boxprops={'facecolor': 'lightsteelblue'})
+    ax.set_xlabel('sentiment')
+    ax.set_ylabel('confidence')
+    ax.set_title('Confidence by Sentiment')
+
+# File name -> (plot function, summary fields the chart depends on)
+CHARTS = {
+    'sentiment_distribution.png': (plot_sentiment_distribution, ['sentiment_counts']),
+    'post_length_distribution.png': (plot_length_distribution, ['length_counts']),
+    'source_distribution.png': (plot_source_distribution, ['source_counts']),
+    'confidence_analysis.png': (plot_confidence, ['sentiment_counts', 'confidence_counts'])
+}
+
+def plot_trend(ax, trend):
+    """Share of negative posts per time bucket"""
+    ax.plot(pd.to_datetime(trend['bucket']), trend['negative_share'] * 100, marker='o', color='lightcoral')
+    ax.set_ylim(0, 100)
+    ax.set_ylabel('negative posts (%)')
+    ax.set_title('Mood Over Time')
+    ax.tick_params(axis='x', labelrotation=45)
+
+def chart_fingerprint(name, inputs, figsize):
+    """Hash of everything a chart is drawn from"""
+    payload = json.dumps([CHART_VERSION, name, list(figsize), inputs], sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def _render_chart(draw, path, figsize):
+    """Draw one chart on its own Agg figure; no pyplot state, so charts can render concurrently"""
+    with span('chart', file=os.path.basename(path)):
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        draw(fig.add_subplot())
+        fig.tight_layout()
+        temp_path = path + '.tmp.png'
+        fig.savefig(temp_path)
+    os.replace(temp_path, path)
+    return path
+
+def _render_cached(charts, output_dir, figsize, workers):
+    """Render {file name: (inputs, draw)} charts, skipping those whose fingerprint is unchanged"""
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    fingerprints_file = os.path.join(output_dir, FINGERPRINT_FILE)
+    fingerprints = {}
+    if os.path.exists(fingerprints_file):
+        with open(fingerprints_file, 'r', encoding='utf-8') as f:
+            fingerprints = json.load(f)
+
+    stale = {}
+    for name, (inputs, _) in charts.items():
+        fingerprint = chart_fingerprint(name, inputs, figsize)
+        if fingerprints.get(name) != fingerprint or not os.path.exists(os.path.join(output_dir, name)):
+            stale[name] = fingerprint
+
+    if stale:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(stale)))) as executor:
+            list(executor.map(lambda name: _render_chart(charts[name][1], os.path.join(output_dir, name), figsize),
+                              stale))
+        fingerprints.update(stale)
+        with open(fingerprints_file + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(fingerprints, f)
+        os.replace(fingerprints_file + '.tmp', fingerprints_file)
+    count('charts_rendered', len(stale))
+    count('charts_reused', len(charts) - len(stale))
+    print(f"Charts: {len(stale)} rendered, {len(charts) - len(stale)} reused from cache")
+    return [os.path.join(output_dir, name) for name in charts]
+
+def render_charts(summary, output_dir, figsize=(10, 6), workers=4):
+    """Write every summary chart PNG to output_dir, redrawing only charts whose inputs changed"""
+    summary_dict = summary.to_dict()
+    charts = {name: ({field: summary_dict[field] for field in fields},
+                     lambda ax, plot=plot: plot(ax, summary))
+              for name, (plot, fields) in CHARTS.items()}
+    return _render_cached(charts, output_dir, figsize, workers)
+
+def render_trend_chart(trend, output_dir, figsize=(10, 6)):
+    """Write the mood-over-time chart for a MoodTimeline query result, reusing it if unchanged"""
+    inputs = trend[['bucket', 'negative_share']].to_dict('list')
+    charts = {'mood_trend.png': (inputs, lambda ax: plot_trend(ax, trend))}
+    return _render_cached(charts, output_dir, figsize, 1)[0]
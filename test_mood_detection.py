@@ -1,13 +1,13 @@
-from transformers import pipeline
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
+from sentiment_engine import SentimentEngine
+from inference_backends import DEFAULT_BACKEND
 
-def test_mood_detection():
+def test_mood_detection(backend=DEFAULT_BACKEND):
     # Initialize the sentiment analyzer
     print("Initializing sentiment analyzer...")
-    sentiment_analyzer = pipeline("sentiment-analysis", 
-                                model="distilbert-base-uncased-finetuned-sst-2-english")
+    sentiment_engine = SentimentEngine(backend=backend)
     
     # Test cases
     test_posts = [
@@ -19,14 +19,14 @@ def test_mood_detection():
     ]
     
     print("\nAnalyzing test posts...")
+    # Score all posts in one batched pass
+    labels, scores = sentiment_engine.analyze(test_posts)
     results = []
-    for post in test_posts:
-        # Get sentiment analysis
-        sentiment = sentiment_analyzer(post)[0]
+    for post, label, score in zip(test_posts, labels, scores):
         results.append({
             'Post': post,
-            'Sentiment': sentiment['label'],
-            'Confidence': f"{sentiment['score']*100:.2f}%"
+            'Sentiment': label,
+            'Confidence': f"{score*100:.2f}%"
         })
     
     # Create DataFrame
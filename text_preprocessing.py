@@ -0,0 +1,144 @@
+import argparse
+import hashlib
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+import pandas as pd
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+from reddit_corpus import RedditCorpus, post_text
+
+# Compiled once instead of on every call
+URL_PATTERN = re.compile(r'http\S+|www\S+|https\S+')
+
+class _NonWordTable(dict):
+    """str.translate table that deletes what [^\\w\\s] and \\d match, filled in per code point on first sight"""
+
+    def __missing__(self, code):
+        char = chr(code)
+        keep = (char.isalnum() or char == '_' or char.isspace()) and not char.isdecimal()
+        self[code] = code if keep else None
+        return self[code]
+
+NON_WORD_TABLE = _NonWordTable()
+
+@lru_cache(maxsize=None)
+def stopword_set():
+    """English stopwords, built once per process (NLTK's list when its corpus is installed)"""
+    try:
+        from nltk.corpus import stopwords
+        return frozenset(stopwords.words('english'))
+    except (ImportError, LookupError):
+        return frozenset(ENGLISH_STOP_WORDS)
+
+@lru_cache(maxsize=None)
+def _lemmatizer():
+    """One shared WordNet lemmatizer, or None when NLTK or its wordnet corpus is missing"""
+    try:
+        from nltk.stem import WordNetLemmatizer
+        lemmatizer = WordNetLemmatizer()
+        lemmatizer.lemmatize('tests')
+        return lemmatizer
+    except (ImportError, LookupError):
+        return None
+
+def preprocessing_signature():
+    """Which stopword list and lemmatizer preprocess_series uses in this environment
+
+    Saved with models trained on preprocessed text, since NLTK's corpora may be installed
+    in one environment and missing in another.
+    """
+    stopwords = "\n".join(sorted(stopword_set()))
+    return {
+        'stopwords': hashlib.sha1(stopwords.encode('utf-8')).hexdigest()[:12],
+        'stopword_count': len(stopword_set()),
+        'lemmatizer': 'wordnet' if _lemmatizer() is not None else 'none'
+    }
+
+@lru_cache(maxsize=200000)
+def lemmatize(token):
+    """Memoized lemma lookup; Reddit vocabulary repeats heavily, so most calls are cache hits"""
+    lemmatizer = _lemmatizer()
+    return token if lemmatizer is None else lemmatizer.lemmatize(token)
+
+def clean_text(text):
+    """Lowercase and strip URLs, punctuation, digits and extra whitespace"""
+    text = text.lower()
+    if 'http' in text or 'www' in text:
+        text = URL_PATTERN.sub('', text)
+    return ' '.join(text.translate(NON_WORD_TABLE).split())
+
+def preprocess_text(text):
+    """Drop stopwords from cleaned text and lemmatize what is left"""
+    stop_words = stopword_set()
+    return ' '.join(lemmatize(token) for token in text.split() if token not in stop_words)
+
+def clean_series(texts):
+    """clean_text for a whole Series using vectorized string operations"""
+    texts = pd.Series(texts, dtype=object).fillna("").astype(str).str.lower()
+    # Only a few percent of posts carry links, so the URL regex skips the rest
+    has_url = texts.str.contains('http', regex=False) | texts.str.contains('www', regex=False)
+    if has_url.any():
+        texts[has_url] = texts[has_url].str.replace(URL_PATTERN, '', regex=True)
+    texts = texts.str.translate(NON_WORD_TABLE)
+    return pd.Series([' '.join(text.split()) for text in texts], index=texts.index, dtype=object)
+
+class _LemmaTable(dict):
+    """Token -> lemma ('' for stopwords), computed once per distinct token"""
+
+    def __missing__(self, token):
+        lemma = '' if token in stopword_set() else lemmatize(token)
+        self[token] = lemma
+        return lemma
+
+def preprocess_series(texts):
+    """Clean a Series, then remove stopwords and lemmatize each distinct token once"""
+    cleaned = clean_series(texts)
+    lookup = _LemmaTable().__getitem__
+    return pd.Series([' '.join(filter(None, map(lookup, text.split()))) for text in cleaned],
+                     index=cleaned.index, dtype=object)
+
+def _preprocess_file(corpus_file):
+    """Worker: read one corpus file and preprocess its post texts"""
+    frames = []
+    for chunk in RedditCorpus().read_file(corpus_file, chunksize=20000):
+        frames.append(pd.DataFrame({
+            'created_utc': chunk['created_utc'],
+            'subreddit': chunk['subreddit'],
+            'processed_text': preprocess_series(post_text(chunk)),
+            'source_file': chunk['source_file']
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+def preprocess_corpus(corpus=None, workers=None, files=None):
+    """Yield preprocessed DataFrames for the raw Reddit corpus, one file per worker task, in file order"""
+    corpus = corpus or RedditCorpus()
+    files = corpus.discover() if files is None else files
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for corpus_file in files:
+            yield _preprocess_file(corpus_file)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for frame in executor.map(_preprocess_file, files):
+            yield frame
+
+def main():
+    parser = argparse.ArgumentParser(description="Preprocess the raw Reddit corpus for the linear models")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--output', default=None, help="optional CSV file for the processed texts")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    total = 0
+    for i, frame in enumerate(preprocess_corpus(workers=args.workers)):
+        total += len(frame)
+        if args.output:
+            frame.to_csv(args.output, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+    elapsed = time.perf_counter() - started
+    print(f"Preprocessed {total} posts in {elapsed:.1f}s ({total / elapsed:.0f} posts/sec)")
+
+if __name__ == "__main__":
+    main()